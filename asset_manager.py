@@ -0,0 +1,223 @@
+import os
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+
+ASSET_ROOT = 'assets'
+
+def solid_surface(size, color):
+    surface = pygame.Surface(size)
+    surface.fill(color)
+    return surface
+
+def surface_bytes(surface):
+    w, h = surface.get_size()
+    return w * h * surface.get_bytesize()
+
+class AssetManager:
+    # Loads images and sounds on a worker pool and shares them by reference.
+    # Decoding happens on the workers; convert()/convert_alpha() and cache
+    # insertion happen on the main thread in update(). Surfaces, loaded or
+    # generated, are evicted least recently used first once they go over the
+    # memory budget, skipping any a sprite still holds, since dropping those
+    # would only make the next lookup build a duplicate. Sounds stay outside
+    # the budget: their listeners keep them for good, so evicting one would
+    # free nothing. Files under the asset root are polled for changes and
+    # reloaded.
+    def __init__(self, root=ASSET_ROOT, workers=2, memory_budget=64 * 1024 * 1024, watch_interval=1.0):
+        self.root = root
+        self.workers = workers
+        self.memory_budget = memory_budget
+        self.watch_interval = watch_interval
+        self.executor = None
+        self.cache = OrderedDict()  # name -> (surface, size in bytes)
+        self.memory_used = 0
+        self.lock = threading.RLock()  # Sprites built on the simulation thread call surface()
+        self.sounds = {}  # name -> sound
+        self.pending = {}  # name -> (kind, options, Future)
+        self.loaders = {}  # name -> (kind, options) for everything ever requested from disk
+        self.listeners = {}  # name -> callbacks run with the new asset on (re)load
+        self.total_requested = 0
+        self.total_loaded = 0
+        self.mixer_lock = threading.Lock()
+        self.changes = queue.SimpleQueue()
+        self.watcher = None
+        self.stop_watching = threading.Event()
+
+    def submit(self, fn, *args):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='assets')
+        return self.executor.submit(fn, *args)
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    # Requests
+
+    def load_image(self, name, alpha=False, on_load=None):
+        return self.request(name, 'image', alpha, on_load)
+
+    def load_sound(self, name, on_load=None):
+        return self.request(name, 'sound', None, on_load)
+
+    def request(self, name, kind, options, on_load):
+        with self.lock:
+            entry = self.cache.get(name)
+            loaded = self.sounds.get(name) if entry is None else entry[0]
+        if on_load is not None:
+            self.listeners.setdefault(name, []).append(on_load)
+            if loaded is not None:
+                on_load(loaded)
+        if loaded is not None:
+            return None
+        if name not in self.pending:
+            self.loaders[name] = (kind, options)
+            self.start_load(name)
+        return self.pending[name][2]
+
+    def start_load(self, name):
+        kind, options = self.loaders[name]
+        loader = self.decode_image if kind == 'image' else self.decode_sound
+        self.pending[name] = (kind, options, self.submit(loader, self.path(name)))
+        self.total_requested += 1
+
+    def decode_image(self, path):
+        return pygame.image.load(path)
+
+    def decode_sound(self, path):
+        with self.mixer_lock:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        return pygame.mixer.Sound(path)
+
+    # Lookup
+
+    def get(self, name):
+        with self.lock:
+            entry = self.cache.get(name)
+            if entry is not None:
+                self.cache.move_to_end(name)
+                return entry[0]
+        sound = self.sounds.get(name)
+        if sound is None and name in self.loaders and name not in self.pending:
+            # Evicted: reload it in the background
+            self.start_load(name)
+        return sound
+
+    def surface(self, key, factory, alpha=False):
+        # Generated surfaces are built once, converted once and shared
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+                return entry[0]
+            surface = self.convert(factory(), alpha)
+            self.store(key, surface)
+            return surface
+
+    @property
+    def progress(self):
+        if self.total_requested == 0:
+            return 1.0
+        return self.total_loaded / self.total_requested
+
+    @property
+    def loading(self):
+        return bool(self.pending)
+
+    def wait(self):
+        for _, _, future in list(self.pending.values()):
+            try:
+                future.result()
+            except Exception:
+                pass
+
+    # Main-thread bookkeeping
+
+    def update(self):
+        for name, (kind, options, future) in list(self.pending.items()):
+            if not future.done():
+                continue
+            del self.pending[name]
+            self.total_loaded += 1
+            try:
+                asset = future.result()
+            except Exception as e:
+                print(f"Couldn't load asset: {name} ({e})")
+                continue
+            if kind == 'image':
+                asset = self.convert(asset, options)
+                self.store(name, asset)
+            else:
+                self.sounds[name] = asset
+            for callback in self.listeners.get(name, ()):
+                callback(asset)
+
+        while True:
+            try:
+                name = self.changes.get_nowait()
+            except queue.Empty:
+                break
+            if name in self.loaders and name not in self.pending:
+                self.start_load(name)
+
+    def convert(self, surface, alpha):
+        # convert() needs a display surface; SDL texture windows don't have one
+        if pygame.display.get_surface() is None:
+            return surface
+        return surface.convert_alpha() if alpha else surface.convert()
+
+    def store(self, name, surface):
+        size = surface_bytes(surface)
+        with self.lock:
+            old = self.cache.pop(name, None)
+            if old is not None:
+                self.memory_used -= old[1]
+            self.cache[name] = (surface, size)
+            self.memory_used += size
+            for key in list(self.cache):  # Least recently used first
+                if self.memory_used <= self.memory_budget:
+                    break
+                if key != name and not self.in_use(self.cache[key][0]):
+                    self.memory_used -= self.cache.pop(key)[1]
+
+    def in_use(self, surface):
+        # Held by anything besides the cache entry, this call and getrefcount
+        return sys.getrefcount(surface) > 3
+
+    # Hot reload
+
+    def watch(self):
+        if self.watcher is None and os.path.isdir(self.root):
+            self.watcher = threading.Thread(target=self.watch_loop, name='asset-watcher', daemon=True)
+            self.watcher.start()
+
+    def scan(self):
+        mtimes = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    mtimes[os.path.relpath(path, self.root)] = os.stat(path).st_mtime_ns
+                except OSError:
+                    pass
+        return mtimes
+
+    def watch_loop(self):
+        known = self.scan()
+        while not self.stop_watching.wait(self.watch_interval):
+            current = self.scan()
+            for name, mtime in current.items():
+                if known.get(name) != mtime:
+                    self.changes.put(name.replace(os.sep, '/'))
+            known = current
+
+    def shutdown(self):
+        self.stop_watching.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+assets = AssetManager()
@@ -0,0 +1,477 @@
+import argparse
+import os
+import time
+import numpy as np
+from constants import *
+from scenarios import keep_alive, tunneling_hit_rate
+
+# Headless benchmarks, run as: python bench.py <name> [options]
+
+def random_actions(rng, num_envs):
+    actions = np.empty((num_envs, 5), dtype=np.float32)
+    actions[:, 0:2] = rng.integers(-1, 2, size=(num_envs, 2))
+    actions[:, 2] = rng.random(num_envs) < 0.5
+    actions[:, 3] = rng.uniform(0, SCREEN_WIDTH, num_envs)
+    actions[:, 4] = rng.uniform(0, SCREEN_HEIGHT, num_envs)
+    return actions
+
+def headless_renderer(name='software'):
+    # A renderer on the dummy video driver, with fonts ready
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from display import config
+    from renderer import create_renderer
+    pygame.display.init()
+    pygame.font.init()
+    return create_renderer(name, config, "bench")
+
+def bench_env(args):
+    from env import VectorEnv, SubprocVectorEnv
+    if args.mode == 'subproc':
+        envs = SubprocVectorEnv(args.envs, num_workers=args.workers, seed=args.seed)
+    else:
+        envs = VectorEnv(args.envs, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    try:
+        envs.reset()
+        batches = max(1, args.steps // args.envs)
+        actions = [random_actions(rng, args.envs) for _ in range(16)]
+        start = time.perf_counter()
+        for i in range(batches):
+            envs.step(actions[i % 16])
+        elapsed = time.perf_counter() - start
+    finally:
+        envs.close()
+    steps = batches * args.envs
+    print(f"{args.mode}: {steps} steps across {args.envs} games in {elapsed:.2f}s "
+          f"= {steps / elapsed:,.0f} steps/s")
+
+def bench_snapshot(args):
+    import snapshot
+    from env import ShooterEnv
+    env = ShooterEnv(seed=args.seed, effects=True)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    actions = random_actions(rng, args.warmup)
+    for action in actions:
+        _, _, done, _ = env.step(action)
+        if done:
+            break
+    game = env.game
+    print(f"scene: {len(game.enemies)} enemies, {len(game.bullets)} bullets, "
+          f"{len(game.effect_manager.particles)} particles")
+
+    data = snapshot.save(game)
+    timings = {}
+    for name, fn in (('save', lambda: snapshot.save(game)),
+                     ('restore', lambda: snapshot.restore(game, data)),
+                     ('fork', lambda: snapshot.fork(game))):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            fn()
+        timings[name] = (time.perf_counter() - start) / args.repeat
+    print(f"{len(data)} bytes; " + ", ".join(f"{name} {t * 1000:.3f} ms" for name, t in timings.items()))
+
+def bench_net(args):
+    from net import GameServer, GameClient
+    for enemy_count in args.enemies:
+        server = GameServer(port=0, seed=args.seed)
+        clients = [GameClient(None, server.address) for _ in range(args.clients)]
+        now = 0.0
+        measured = None
+        for tick in range(args.ticks):
+            now += 1 / server.tick_rate
+            for i, client in enumerate(clients):
+                client.update(((i % 3) - 1, 0, True, (SCREEN_WIDTH // 2, 0)), now=now)
+            # Keep the enemy count topped up and the players alive
+            keep_alive(server.game, enemy_count)
+            if tick == args.ticks // 4:
+                measured = dict(server.stats)
+            server.tick(now=now)
+        stats = {key: server.stats[key] - measured[key] for key in measured}
+        print(f"{enemy_count:5d} enemies, {args.clients} clients: "
+              f"{stats['bytes_sent'] / max(1, stats['packets_sent']):7.0f} bytes/snapshot, "
+              f"{stats['tick_time'] / max(1, stats['ticks']) * 1000:6.2f} ms/server tick")
+        for client in clients:
+            client.close()
+        server.sock.close()
+
+def bench_telemetry(args):
+    import tempfile
+    from telemetry import Telemetry
+    with tempfile.TemporaryDirectory() as directory:
+        telemetry = Telemetry(directory=directory, flush_interval=0.05)
+        telemetry.start()
+        # Bursts of events separated by a frame's worth of idle time
+        elapsed = 0.0
+        for frame in range(args.events // args.per_frame):
+            start = time.perf_counter()
+            for i in range(args.per_frame):
+                telemetry.emit('kill', 'BasicEnemy', i % 800, frame % 600, 3)
+            elapsed += time.perf_counter() - start
+            time.sleep(1 / FPS)
+        telemetry.stop()
+        written = sum(1 for name in os.listdir(directory)
+                      for _ in open(os.path.join(directory, name)))
+    emitted = args.events // args.per_frame * args.per_frame
+    print(f"{elapsed / emitted * 1e6:.2f} us/emit, {emitted} events, {written} lines written")
+
+def bench_quality(args):
+    renderer = headless_renderer()
+    from display import config
+    from game import Game
+    from sounds import SilentSounds
+    from quality import QualityGovernor, QUALITY_LEVELS
+
+    for mode in ('fixed', 'auto'):
+        game = Game(None, SilentSounds(), seed=args.seed)
+        governor = QualityGovernor(budget_ms=args.budget_ms)
+        governor.enabled = mode == 'auto'
+        governor.apply(game)
+        times = []
+        levels = [0] * len(QUALITY_LEVELS)
+        changes = 0
+        for frame in range(args.frames):
+            start = time.perf_counter()
+            # Peak of a wave: a full screen of enemies and constant fire
+            keep_alive(game, args.enemies)
+            target = next(iter(game.enemies)).rect.center
+            for i in range(args.explosions):
+                game.effect_manager.create_explosion(((frame * 37 + i * 101) % config.width, (frame * 53 + i * 71) % config.height), RED)
+            game.step(frame % 3 - 1, 0, True, target)
+            game.draw(renderer)
+            renderer.present()
+            frame_ms = (time.perf_counter() - start) * 1000
+            if governor.add_frame(frame_ms):
+                governor.apply(game)
+                changes += 1
+            if frame >= args.frames // 2:
+                times.append(frame_ms)
+                levels[governor.level] += 1
+        times.sort()
+        p99 = times[int(len(times) * 0.99)]
+        print(f"{mode:5s}: p50 {times[len(times) // 2]:6.2f} ms, p99 {p99:6.2f} ms "
+              f"({'within' if p99 <= args.budget_ms else 'over'} {args.budget_ms:.2f} ms budget), levels "
+              + ", ".join(f"{level['name']} {count}" for level, count in zip(QUALITY_LEVELS, levels) if count)
+              + f"; {changes} level changes")
+
+def bench_pipeline(args):
+    renderer = headless_renderer()
+    from display import config
+    from game import Game
+    from pipeline import SimulationThread
+    from sounds import SilentSounds
+
+    def top_up(game):
+        # Peak of a wave: a full screen of enemies, with the player kept alive
+        keep_alive(game, args.enemies)
+
+    def inputs(frame):
+        return (frame % 3 - 1, (frame // 50) % 3 - 1, True, ((frame * 37) % config.width, (frame * 53) % config.height))
+
+    results = {}
+    for mode in ('serial', 'pipelined'):
+        game = Game(None, SilentSounds(), seed=args.seed)
+        sim = SimulationThread(game) if mode == 'pipelined' else None
+        times = []
+        for frame in range(args.frames):
+            start = time.perf_counter()
+            if sim is not None:
+                sim.call(top_up)
+                sim.submit(*inputs(frame), 1000 / FPS)
+                sim.draw(renderer)
+            else:
+                top_up(game)
+                game.step(*inputs(frame))
+                game.draw(renderer)
+            renderer.present()
+            times.append((time.perf_counter() - start) * 1000)
+        if sim is not None:
+            sim.stop()
+        times.sort()
+        results[mode] = (game.time, game.score, game.wave, tuple(game.player.position),
+                         sorted((e.rect.center for e in game.enemies)))
+        print(f"{mode:9s}: mean {sum(times) / len(times):6.2f} ms, p50 {times[len(times) // 2]:6.2f} ms, "
+              f"p99 {times[int(len(times) * 0.99)]:6.2f} ms per frame")
+    print("gameplay identical" if results['serial'] == results['pipelined'] else "gameplay DIFFERS")
+
+def bench_projectiles(args):
+    renderer = headless_renderer(args.renderer)
+    from display import config
+    from game import Game
+    from sounds import SilentSounds
+
+    game = Game(None, SilentSounds(), seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    sim_times = []
+    frame_times = []
+    for frame in range(args.frames):
+        # Top up with slow rings from random points to hold the target count
+        while game.projectiles.count < args.count:
+            origin = rng.uniform((0, 0), (config.width, config.height))
+            game.projectiles.ring(origin, 64, speed=0.5, phase=rng.uniform(0, 1))
+        keep_alive(game)
+
+        start = time.perf_counter()
+        game.projectiles.update()
+        game.projectiles.collide_circle(game.player.rect.center, PLAYER_SIZE // 2)
+        simulated = time.perf_counter()
+        game.draw(renderer)
+        renderer.present()
+        end = time.perf_counter()
+        sim_times.append((simulated - start) * 1000)
+        frame_times.append((end - start) * 1000)
+    frame_times.sort()
+    print(f"{args.count} projectiles: update+collide {sum(sim_times) / len(sim_times):.3f} ms, "
+          f"frame mean {sum(frame_times) / len(frame_times):.2f} ms, p99 {frame_times[int(len(frame_times) * 0.99)]:.2f} ms "
+          f"(budget {1000 / FPS:.2f} ms)")
+
+def bench_crowd(args):
+    import pygame
+    from game import Game
+    from sounds import SilentSounds
+    from enemies import ENEMY_CLASSES, BasicEnemy
+    from steering import separation_forces, NeighborGrid
+    pygame.font.init()
+
+    def spacing(game):
+        # Mean distance from each enemy to its nearest neighbour
+        positions = np.array([(e.position.x, e.position.y) for e in game.enemies])
+        offsets = positions[:, None, :] - positions[None, :, :]
+        distance = (offsets * offsets).sum(axis=2)
+        np.fill_diagonal(distance, np.inf)
+        return float(np.sqrt(distance.min(axis=1)).mean())
+
+    weights = {cls: cls.separation for cls in ENEMY_CLASSES.values()}
+    for count in args.enemies:
+        for steering in (False, True):
+            for cls in weights:
+                cls.separation = weights[cls] if steering else 0.0
+            game = Game(None, SilentSounds(), seed=args.seed)
+            rng = np.random.default_rng(args.seed)
+            for x, y in rng.uniform((0, 0), (SCREEN_WIDTH, SCREEN_HEIGHT), (count, 2)):
+                enemy = BasicEnemy(pos=(x, y), rng=game.rng)
+                game.enemies.add(enemy)
+                game.all_sprites.add(enemy)
+            separate = 0.0
+            for _ in range(args.ticks):
+                keep_alive(game)
+                game.update_enemies()
+                start = time.perf_counter()
+                game.separate_enemies()
+                separate += time.perf_counter() - start
+            label = f"{separate / args.ticks * 1000:6.2f} ms/tick" if steering else "   off       "
+            print(f"{count:5d} enemies, separation {label}: nearest neighbour {spacing(game):5.1f} px "
+                  f"after {args.ticks} ticks")
+
+        # The all-pairs version of the same forces, for scale
+        positions = np.random.default_rng(args.seed).uniform((0, 0), (SCREEN_WIDTH, SCREEN_HEIGHT), (count, 2))
+        start = time.perf_counter()
+        offsets = positions[:, None, :] - positions[None, :, :]
+        distance = np.sqrt((offsets * offsets).sum(axis=2))
+        np.fill_diagonal(distance, np.inf)
+        with np.errstate(invalid='ignore'):
+            weight = np.where(distance < SEPARATION_RADIUS,
+                              (SEPARATION_RADIUS - distance) / (SEPARATION_RADIUS * distance), 0.0)
+        (offsets * weight[:, :, None]).sum(axis=1)
+        naive = time.perf_counter() - start
+        start = time.perf_counter()
+        separation_forces(positions, SEPARATION_RADIUS, NeighborGrid(SEPARATION_RADIUS))
+        grid = time.perf_counter() - start
+        print(f"{count:5d} enemies, forces only: cell list {grid * 1000:.2f} ms, all pairs {naive * 1000:.2f} ms")
+    for cls in weights:
+        cls.separation = weights[cls]
+
+def bench_tunneling(args):
+    for swept in (False, True):
+        for rate in args.rates:
+            start = time.perf_counter()
+            kills, shots = tunneling_hit_rate(swept, rate, args.seconds, args.enemies, args.seed)
+            elapsed = time.perf_counter() - start
+            print(f"{'swept' if swept else 'discrete':8s} {rate:3d} ticks/s: {kills:4d} kills from {shots:4d} shots "
+                  f"({kills / max(1, shots):4.0%} hit rate), {elapsed * 1000 / (args.seconds * rate):.2f} ms/tick")
+
+def bench_memory(args):
+    import gc
+    import tempfile
+    import pygame
+    from game import Game
+    from sounds import SilentSounds
+    from diagnostics import Diagnostics, GCScheduler
+    pygame.font.init()
+
+    for mode in args.gc_modes:
+        game = Game(None, SilentSounds(), seed=args.seed)
+        diagnostics = Diagnostics(tempfile.mkdtemp(prefix='diagnostics-'), interval=float('inf'),
+                                  trace_frames=1 if args.trace else 0)
+        scheduler = GCScheduler(mode)
+        scheduler.update(game)  # The one-off collection and freeze happen at game start, before measuring
+        diagnostics.start()
+        leaked = set()
+        frame_ms = []
+        ticks = args.waves * WAVE_DURATION * FPS // 1000
+        for tick in range(ticks):
+            start = time.perf_counter()
+            keep_alive(game, args.enemies)
+            target = next(iter(game.enemies)).rect.center
+            game.step(tick % 3 - 1, 0, True, target)
+            if args.leak:
+                leaked.update(game.effect_manager.particles)  # A stale reference that keeps dead particles alive
+            scheduler.update(game)
+            frame_ms.append((time.perf_counter() - start) * 1000)
+            diagnostics.add_frame(frame_ms[-1], game)
+            if (tick + 1) % args.sample_ticks == 0:
+                diagnostics.sample(game)
+        scheduler.stop()
+        diagnostics.stop()
+
+        frame_ms.sort()
+        totals = diagnostics.gc_totals
+        trends = ', '.join(f"{name} {first}->{last}" for name, first, last, _ in diagnostics.trends()) or 'none'
+        print(f"{mode:7s}: {totals['collections']:5d} collections, {totals['ms']:7.1f} ms total, "
+              f"longest {totals['max_ms']:5.2f} ms; tick p99 {frame_ms[int(len(frame_ms) * 0.99)]:.2f} ms, "
+              f"max {frame_ms[-1]:.2f} ms; growth: {trends}")
+        print(f"         report: {os.path.join(diagnostics.directory, f'report-{diagnostics.session}.txt')}")
+        gc.collect()
+
+def bench_input(args):
+    import random
+    from types import SimpleNamespace
+    headless_renderer()
+    import pygame
+    from game import Game
+    from sounds import SilentSounds
+    from inputs import InputBuffer
+
+    # Clicks at random times, each shorter than a frame and after the shot delay
+    rng = random.Random(args.seed)
+    clicks = []
+    t = 1000.0
+    for _ in range(args.clicks):
+        t += SHOOT_DELAY + rng.uniform(20, 300)
+        clicks.append((t, t + rng.uniform(1, args.max_press_ms)))
+    tick_ms = 1000 / args.rate
+    end = clicks[-1][1] + 1000
+
+    for mode in ('polled', 'buffered'):
+        game = Game(None, SilentSounds(), seed=args.seed)
+        buffer = InputBuffer(SimpleNamespace(controls=DEFAULT_CONTROLS))
+        buffer.tick_start = 0
+        shots = []
+        def shoot(target_pos, player=None, late=0.0):
+            shots.append(game.time - tick_ms + late * 1000 / FPS)
+        game.shoot = shoot
+        pending = [(down, pygame.MOUSEBUTTONDOWN) for down, _ in clicks] + [(up, pygame.MOUSEBUTTONUP) for _, up in clicks]
+        pending.sort()
+        now = 0.0
+        while now < end:
+            now += tick_ms
+            keep_alive(game)
+            if mode == 'polled':
+                # Button state at the tick, as pygame.mouse.get_pressed() would see it
+                down = any(start <= now < stop for start, stop in clicks)
+                game.step(0, 0, down, (0, 0), tick_ms, (1.0, 1.0))
+                continue
+            while pending and pending[0][0] <= now:
+                stamp, kind = pending.pop(0)
+                buffer.add(pygame.event.Event(kind, button=pygame.BUTTON_LEFT, pos=(0, 0)), stamp)
+            dx, dy, shooting, target, trigger = buffer.tick(now)
+            game.step(dx, dy, shooting, (0, 0), tick_ms, trigger)
+
+        # Each click should fire one shot, as close to the click as possible
+        errors = []
+        for start, _ in clicks:
+            fired = [s for s in shots if start - 1e-6 <= s < start + SHOOT_DELAY]
+            if fired:
+                errors.append(fired[0] - start)
+        errors.sort()
+        summary = f"mean {sum(errors) / len(errors):5.2f} ms, max {errors[-1]:5.2f} ms" if errors else "no shots"
+        print(f"{mode:8s} {args.rate} ticks/s: {len(errors):4d} of {len(clicks)} clicks fired, "
+              f"click-to-shot {summary}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    env = commands.add_parser('env', help='headless environment stepping throughput')
+    env.add_argument('--mode', choices=('inproc', 'subproc'), default='inproc')
+    env.add_argument('--envs', type=int, default=8)
+    env.add_argument('--workers', type=int, default=None)
+    env.add_argument('--steps', type=int, default=20000)
+    env.add_argument('--seed', type=int, default=0)
+    env.set_defaults(run=bench_env)
+
+    snap = commands.add_parser('snapshot', help='save/restore/fork cost of a mid-game snapshot')
+    snap.add_argument('--warmup', type=int, default=1200, help='steps to play before measuring')
+    snap.add_argument('--repeat', type=int, default=500)
+    snap.add_argument('--seed', type=int, default=0)
+    snap.set_defaults(run=bench_snapshot)
+
+    net = commands.add_parser('net', help='co-op server bandwidth and tick cost on localhost')
+    net.add_argument('--clients', type=int, default=4)
+    net.add_argument('--enemies', type=int, nargs='+', default=[50, 200, 800])
+    net.add_argument('--ticks', type=int, default=300)
+    net.add_argument('--seed', type=int, default=0)
+    net.set_defaults(run=bench_net)
+
+    tel = commands.add_parser('telemetry', help='cost of emitting an event on the game thread')
+    tel.add_argument('--events', type=int, default=60000)
+    tel.add_argument('--per-frame', type=int, default=500)
+    tel.set_defaults(run=bench_telemetry)
+
+    qual = commands.add_parser('quality', help='p99 frame time with and without the quality governor under stress')
+    qual.add_argument('--enemies', type=int, default=300)
+    qual.add_argument('--explosions', type=int, default=20, help='extra kill explosions per frame')
+    qual.add_argument('--frames', type=int, default=1200)
+    qual.add_argument('--budget-ms', type=float, default=1000 / FPS)
+    qual.add_argument('--seed', type=int, default=0)
+    qual.set_defaults(run=bench_quality)
+
+    pipe = commands.add_parser('pipeline', help='frame time of serial vs threaded simulation and rendering')
+    pipe.add_argument('--enemies', type=int, default=300)
+    pipe.add_argument('--frames', type=int, default=1200)
+    pipe.add_argument('--seed', type=int, default=0)
+    pipe.set_defaults(run=bench_pipeline)
+
+    proj = commands.add_parser('projectiles', help='enemy projectile engine cost with thousands of live projectiles')
+    proj.add_argument('--count', type=int, default=5000)
+    proj.add_argument('--frames', type=int, default=600)
+    proj.add_argument('--renderer', default='software')
+    proj.add_argument('--seed', type=int, default=0)
+    proj.set_defaults(run=bench_projectiles)
+
+    crowd = commands.add_parser('crowd', help='crowd separation steering cost and spread')
+    crowd.add_argument('--enemies', type=int, nargs='+', default=[200, 500, 2000])
+    crowd.add_argument('--ticks', type=int, default=300)
+    crowd.add_argument('--seed', type=int, default=0)
+    crowd.set_defaults(run=bench_crowd)
+
+    tunnel = commands.add_parser('tunneling', help='bullet hits at coarse tick rates, discrete vs swept collisions')
+    tunnel.add_argument('--rates', type=int, nargs='+', default=[60, 30, 15, 10])
+    tunnel.add_argument('--seconds', type=int, default=60)
+    tunnel.add_argument('--enemies', type=int, default=6)
+    tunnel.add_argument('--seed', type=int, default=0)
+    tunnel.set_defaults(run=bench_tunneling)
+
+    mem = commands.add_parser('memory', help='GC pauses per GC mode and object growth over several waves')
+    mem.add_argument('--gc-modes', nargs='+', default=['default', 'tuned', 'wave'])
+    mem.add_argument('--waves', type=int, default=4)
+    mem.add_argument('--enemies', type=int, default=40)
+    mem.add_argument('--sample-ticks', type=int, default=300, help='ticks between diagnostics samples')
+    mem.add_argument('--trace', action='store_true', help='also run tracemalloc (slower)')
+    mem.add_argument('--leak', action='store_true', help='keep every particle alive to check growth detection')
+    mem.add_argument('--seed', type=int, default=0)
+    mem.set_defaults(run=bench_memory)
+
+    inp = commands.add_parser('input', help='short clicks caught and shot timing, polled vs buffered input')
+    inp.add_argument('--clicks', type=int, default=500)
+    inp.add_argument('--max-press-ms', type=float, default=30, help='longest click, in ms')
+    inp.add_argument('--rate', type=int, default=60, help='ticks per second')
+    inp.add_argument('--seed', type=int, default=0)
+    inp.set_defaults(run=bench_input)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import numpy as np
+
+SMALL_SWEEP = 64  # Up to this many segment-box pairs, a plain Python loop beats numpy
+
+_EMPTY = np.zeros(0, dtype=np.intp)
+
+def swept_hits(starts, ends, boxes):
+    # Batched segment-vs-AABB test (slab method). starts/ends are (m, 2)
+    # segment endpoints, boxes are (n, 4) left, top, right, bottom. Returns
+    # (segment indices, box indices) of the first box each segment enters
+    # between its start and end; segments that hit nothing are left out.
+    if not len(starts) or not len(boxes):
+        return _EMPTY, _EMPTY
+    if len(starts) * len(boxes) <= SMALL_SWEEP:
+        return _swept_hits_small(starts, ends, boxes)
+    starts = np.asarray(starts, dtype=np.float64)
+    boxes = np.asarray(boxes, dtype=np.float64)
+    delta = np.asarray(ends, dtype=np.float64) - starts
+    # A segment that does not move along an axis gets huge slab times of
+    # the right sign instead of a division by zero
+    delta[delta == 0] = 1e-12
+    inverse = 1.0 / delta
+
+    x = starts[:, 0:1]
+    y = starts[:, 1:2]
+    tx1 = (boxes[:, 0] - x) * inverse[:, 0:1]
+    tx2 = (boxes[:, 2] - x) * inverse[:, 0:1]
+    ty1 = (boxes[:, 1] - y) * inverse[:, 1:2]
+    ty2 = (boxes[:, 3] - y) * inverse[:, 1:2]
+    entry = np.maximum(np.minimum(tx1, tx2), np.minimum(ty1, ty2))
+    exit = np.minimum(np.maximum(tx1, tx2), np.maximum(ty1, ty2))
+
+    hit = (entry <= exit) & (exit >= 0) & (entry <= 1)
+    if not hit.any():
+        return _EMPTY, _EMPTY
+    times = np.where(hit, entry, np.inf)
+    first = times.argmin(axis=1)
+    segments = np.nonzero(hit.any(axis=1))[0]
+    return segments, first[segments]
+
+def _swept_hits_small(starts, ends, boxes):
+    # The same test one pair at a time, for the handful of bullets and
+    # enemies most ticks see
+    segments = []
+    firsts = []
+    for s, ((x, y), (end_x, end_y)) in enumerate(zip(starts, ends)):
+        inverse_x = 1.0 / ((end_x - x) or 1e-12)
+        inverse_y = 1.0 / ((end_y - y) or 1e-12)
+        first = None
+        first_entry = np.inf
+        for b, (left, top, right, bottom) in enumerate(boxes):
+            tx1 = (left - x) * inverse_x
+            tx2 = (right - x) * inverse_x
+            ty1 = (top - y) * inverse_y
+            ty2 = (bottom - y) * inverse_y
+            entry = max(min(tx1, tx2), min(ty1, ty2))
+            exit = min(max(tx1, tx2), max(ty1, ty2))
+            if entry <= exit and exit >= 0 and entry <= 1 and entry < first_entry:
+                first = b
+                first_entry = entry
+        if first is not None:
+            segments.append(s)
+            firsts.append(first)
+    return segments, firsts
@@ -4,6 +4,7 @@ import pygame
 SCREEN_WIDTH = 640
 SCREEN_HEIGHT = 480
 FPS = 60
+MAX_FRAME_MS = 3 * 1000 / FPS  # Longer frames (stalls, window drags) run slowed down
 
 # Colors (RGB tuples)
 BLACK = (0, 0, 0)
@@ -25,6 +26,20 @@ ENEMY_SPEED = 2
 SHOOT_DELAY = 200
 WAVE_DURATION = 20000  # 20 seconds per wave
 
+# Crowd separation
+SEPARATION_RADIUS = ENEMY_SIZE + 8  # Enemies closer than this push apart
+SEPARATION_STRENGTH = 6  # Push per tick at full overlap, before the archetype weight
+SEPARATION_LIMIT = 1.5  # Largest push per tick, in multiples of the enemy's speed
+
+# Enemy projectiles
+MAX_ENEMY_PROJECTILES = 8192
+ENEMY_PROJECTILE_RADIUS = 4
+ENEMY_PROJECTILE_SPEED = 3
+
+# Save states
+QUICKSAVE_FILE = 'quicksave.bin'
+REWIND_FRAMES = FPS * 2  # Backspace rewinds this far
+
 # Default controls
 DEFAULT_CONTROLS = {
     'UP': pygame.K_z,
@@ -0,0 +1,312 @@
+import gc
+import json
+import os
+import time
+import tracemalloc
+import pygame
+from constants import FPS
+
+GC_MODES = ('default', 'tuned', 'wave')
+
+class GCScheduler:
+    # How the cyclic garbage collector runs during play:
+    #   default  Python's own thresholds
+    #   tuned    objects that exist when the first game starts (modules,
+    #            assets, menus) are frozen out of later collections, and
+    #            young collections run less often
+    #   wave     no automatic collection while a wave is on; a full
+    #            collection runs at every wave boundary, game over and
+    #            return to the title screen. A young-only collection still
+    #            runs if that many new objects pile up in between.
+    def __init__(self, mode='default', young_threshold=10000, young_limit=200000):
+        self.mode = mode if mode in GC_MODES else 'default'
+        self.young_threshold = young_threshold
+        self.young_limit = young_limit
+        self.thresholds = gc.get_threshold()
+        self.frozen = False
+        self.boundary = None  # (game, wave, game_over) as of the last frame
+
+    def update(self, game):
+        # Called once per frame with the running game, or None on the title screen
+        if self.mode == 'default':
+            return
+        if game is not None and not self.frozen:
+            self.start()
+        boundary = (id(game), getattr(game, 'wave', 0), getattr(game, 'game_over', False))
+        if boundary != self.boundary:
+            self.boundary = boundary
+            if self.mode == 'wave':
+                gc.collect()
+        elif self.mode == 'wave' and gc.get_count()[0] > self.young_limit:
+            gc.collect(0)
+
+    def start(self):
+        gc.collect()
+        gc.freeze()
+        self.frozen = True
+        if self.mode == 'tuned':
+            gc.set_threshold(self.young_threshold, *self.thresholds[1:])
+        elif self.mode == 'wave':
+            gc.disable()
+
+    def stop(self):
+        if self.frozen:
+            gc.unfreeze()
+            self.frozen = False
+        gc.set_threshold(*self.thresholds)
+        gc.enable()
+
+class Diagnostics:
+    # Allocation and object-lifetime tracking for long sessions.
+    # Every `interval` seconds it records live objects per entity class and
+    # pygame Surfaces per size, memory traced by tracemalloc, and the frame
+    # times and GC pauses of the frames since the last sample, and how long
+    # the sample itself took; the caller leaves that out of its frames. Every
+    # `snapshot_every` samples it compares a tracemalloc snapshot against the
+    # first one. Samples go to an NDJSON file and a text report is rewritten
+    # after each one, flagging counts whose floor keeps rising.
+    def __init__(self, directory='diagnostics', interval=10.0, snapshot_every=6, warmup=3,
+                 trace_frames=1, budget_ms=1000 / FPS, max_samples=1440):
+        self.enabled = False
+        self.directory = directory
+        self.interval = interval
+        self.snapshot_every = snapshot_every
+        self.warmup = warmup  # Samples left out of trend detection while caches fill
+        self.trace_frames = trace_frames
+        self.budget_ms = budget_ms
+        self.max_samples = max_samples  # Samples kept in memory; the NDJSON file has them all
+        self.session = None
+        self.started = 0.0
+        self.next_sample = 0.0
+        self.samples = []
+        self.frames = []  # (frame_ms, gc_ms) since the last sample
+        self.pauses = []  # (generation, ms) since the last sample
+        self.frame_gc_ms = 0.0
+        self.gc_start = None
+        self.gc_totals = {'collections': 0, 'ms': 0.0, 'max_ms': 0.0, 'over_half_budget': 0}
+        self.baseline = None
+        self.allocation_growth = []
+        self.file = None
+
+    def start(self):
+        if self.enabled:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.session = time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}'
+            self.file = open(os.path.join(self.directory, f'samples-{self.session}.ndjson'), 'w')
+        except OSError as e:
+            print(f"Diagnostics disabled: {e}")
+            return
+        if self.trace_frames and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        gc.callbacks.append(self.on_gc)
+        self.enabled = True
+        self.started = time.perf_counter()
+        self.next_sample = self.started + self.interval
+
+    def on_gc(self, phase, info):
+        # Runs on whichever thread triggered the collection
+        if phase == 'start':
+            self.gc_start = time.perf_counter()
+        elif self.gc_start is not None:
+            ms = (time.perf_counter() - self.gc_start) * 1000
+            self.gc_start = None
+            self.pauses.append((info['generation'], ms))
+            self.frame_gc_ms += ms
+
+    def add_frame(self, frame_ms, game=None):
+        # Returns True when it took a sample after this frame
+        if not self.enabled:
+            return False
+        self.frames.append((frame_ms, self.frame_gc_ms))
+        self.frame_gc_ms = 0.0
+        if time.perf_counter() < self.next_sample:
+            return False
+        self.sample(game)
+        return True
+
+    # Sampling
+
+    def count_objects(self):
+        # Live sprites and particles per class, and Surfaces per size. Surfaces
+        # are not tracked by the GC, so they are found through the objects
+        # that refer to them. Objects frozen by GCScheduler are not listed.
+        from effects import Particle
+        objects = gc.get_objects()
+        entities = {}
+        for obj in objects:
+            if isinstance(obj, (pygame.sprite.Sprite, Particle)):
+                name = type(obj).__name__
+                entities[name] = entities.get(name, 0) + 1
+        referents = gc.get_referents(*objects)
+        # Dicts holding only untracked values are untracked themselves
+        referents += gc.get_referents(*[r for r in referents if type(r) is dict and not gc.is_tracked(r)])
+        surfaces = {}
+        seen = set()
+        for obj in referents:
+            if isinstance(obj, pygame.Surface) and id(obj) not in seen:
+                seen.add(id(obj))
+                size = '%dx%d' % obj.get_size()
+                surfaces[size] = surfaces.get(size, 0) + 1
+        return len(objects), entities, surfaces
+
+    def sample(self, game=None):
+        now = time.perf_counter()
+        self.next_sample = now + self.interval
+        tracked, entities, surfaces = self.count_objects()
+        record = {
+            't': round(now - self.started, 1),
+            'objects': tracked,
+            'entities': entities,
+            'surfaces': sum(surfaces.values()),
+            'surface_sizes': surfaces,
+        }
+        if hasattr(game, 'projectiles'):
+            record['projectiles'] = int(game.projectiles.count)
+            record['wave'] = game.wave
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            record['traced_kb'] = current // 1024
+            record['traced_peak_kb'] = peak // 1024
+
+        # Frame times next to the GC pauses that landed in them
+        if self.frames:
+            times = sorted(f for f, _ in self.frames)
+            n = len(times)
+            with_gc = [f for f, g in self.frames if g > 0]
+            record['frames'] = {
+                'count': n,
+                'p50_ms': round(times[n // 2], 3),
+                'p99_ms': round(times[min(n - 1, int(n * 0.99))], 3),
+                'max_ms': round(times[-1], 3),
+                'with_gc': len(with_gc),
+                'with_gc_mean_ms': round(sum(with_gc) / len(with_gc), 3) if with_gc else None,
+            }
+        pauses = self.pauses
+        self.pauses = []
+        self.frames = []
+        generations = [0, 0, 0]
+        for generation, ms in pauses:
+            generations[generation] += 1
+        pause_ms = [ms for _, ms in pauses]
+        record['gc'] = {
+            'collections': generations,
+            'total_ms': round(sum(pause_ms), 3),
+            'max_ms': round(max(pause_ms, default=0.0), 3),
+        }
+        totals = self.gc_totals
+        totals['collections'] += len(pauses)
+        totals['ms'] += sum(pause_ms)
+        totals['max_ms'] = max([totals['max_ms']] + pause_ms)
+        totals['over_half_budget'] += sum(1 for ms in pause_ms if ms > self.budget_ms / 2)
+
+        self.samples.append(record)
+        if len(self.samples) > self.max_samples:
+            # Halve the resolution rather than forget the start of the session
+            self.samples = self.samples[:self.warmup] + self.samples[self.warmup::2]
+        if tracemalloc.is_tracing() and len(self.samples) % self.snapshot_every == 0:
+            self.compare_snapshot()
+        record['sample_ms'] = round((time.perf_counter() - now) * 1000, 3)
+        try:
+            self.file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self.file.flush()
+            self.write_report()
+        except OSError as e:
+            print(f"Error writing diagnostics: {e}")
+        self.frame_gc_ms = 0.0  # Collections while sampling belong to no frame
+
+    def compare_snapshot(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+        if self.baseline is None:
+            self.baseline = snapshot
+            return
+        self.allocation_growth = [
+            (str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+            for stat in snapshot.compare_to(self.baseline, 'lineno')[:10]
+            if stat.size_diff > 0
+        ]
+
+    # Report
+
+    def series(self):
+        # Every sampled counter by name, one value per sample
+        series = {'objects': [r['objects'] for r in self.samples],
+                  'surfaces': [r['surfaces'] for r in self.samples]}
+        if all('traced_kb' in r for r in self.samples):
+            series['traced_kb'] = [r['traced_kb'] for r in self.samples]
+        names = set()
+        for record in self.samples:
+            names.update(record['entities'])
+        for name in sorted(names):
+            series[name] = [r['entities'].get(name, 0) for r in self.samples]
+        return series
+
+    def trends(self, threshold=0.1, minimum=10):
+        # A leak raises the floor a counter falls back to, not just its peaks,
+        # so the session after warm-up is split into thirds and a counter is
+        # flagged when the minimum of each third is higher than the last
+        samples = self.samples[self.warmup:]
+        if len(samples) < 6:
+            return []
+        hours = (samples[-1]['t'] - samples[0]['t']) / 3600
+        flagged = []
+        for name, values in self.series().items():
+            values = values[self.warmup:]
+            if len(values) < 6:
+                continue
+            third = len(values) // 3
+            floors = [min(values[:third]), min(values[third:2 * third]), min(values[2 * third:])]
+            growth = floors[2] - floors[0]
+            if floors[0] < floors[1] < floors[2] and growth >= max(minimum, floors[0] * threshold):
+                flagged.append((name, values[0], values[-1], growth / hours if hours else 0.0))
+        return flagged
+
+    def write_report(self):
+        latest = self.samples[-1]
+        totals = self.gc_totals
+        lines = [f"Diagnostics session {self.session}: {latest['t'] / 3600:.2f} h, {len(self.samples)} samples", ""]
+        lines.append("Growth trends (floor rising through the session):")
+        trends = self.trends()
+        for name, first, last, per_hour in trends:
+            lines.append(f"  {name:20s} {first:>10} -> {last:<10} {per_hour:+,.0f}/h")
+        if not trends:
+            lines.append("  none" if len(self.samples) >= self.warmup + 6 else "  not enough samples yet")
+        lines.append("")
+        lines.append(f"GC: {totals['collections']} collections, {totals['ms']:.1f} ms total, "
+                     f"longest {totals['max_ms']:.2f} ms, {totals['over_half_budget']} over half the frame budget")
+        frames = latest.get('frames')
+        if frames:
+            lines.append(f"Frames (last sample): p50 {frames['p50_ms']} ms, p99 {frames['p99_ms']} ms, "
+                         f"max {frames['max_ms']} ms; {frames['with_gc']} with a GC pause"
+                         + (f" (mean {frames['with_gc_mean_ms']} ms)" if frames['with_gc'] else ""))
+        lines.append(f"Sampling took {latest['sample_ms']} ms, left out of the frame times")
+        lines.append("")
+        lines.append(f"Live: {latest['objects']} tracked objects, {latest['surfaces']} surfaces"
+                     + (f", {latest['traced_kb']} KiB traced" if 'traced_kb' in latest else ""))
+        for name, count in sorted(latest['entities'].items(), key=lambda item: -item[1]):
+            lines.append(f"  {name:20s} {count}")
+        if self.allocation_growth:
+            lines.append("")
+            lines.append("Allocation growth since the first snapshot:")
+            for where, size, count in self.allocation_growth:
+                lines.append(f"  {size / 1024:+10.1f} KiB {count:+8d} blocks  {where}")
+        with open(os.path.join(self.directory, f'report-{self.session}.txt'), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+        if self.trace_frames:
+            tracemalloc.stop()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
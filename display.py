@@ -0,0 +1,62 @@
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+class DisplayConfig:
+    # Runtime render resolution and how it maps onto the window.
+    # Game logic reads width/height from here instead of the import-time constants.
+    def __init__(self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.width = width
+        self.height = height
+        self.window_size = (width, height)
+        self.scale = 1
+        self.viewport = pygame.Rect(0, 0, width, height)
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @property
+    def center(self):
+        return (self.width // 2, self.height // 2)
+
+    def set_resolution(self, width, height):
+        self.width = int(width)
+        self.height = int(height)
+        self.set_window_size(self.window_size)
+
+    def set_window_size(self, window_size):
+        # Largest integer scale that fits, centered with letterboxing.
+        # The offset is kept a multiple of the scale so SDL viewports line up.
+        self.window_size = (max(self.width, int(window_size[0])),
+                            max(self.height, int(window_size[1])))
+        self.scale = max(1, min(self.window_size[0] // self.width,
+                                self.window_size[1] // self.height))
+        scaled_w = self.width * self.scale
+        scaled_h = self.height * self.scale
+        self.viewport = pygame.Rect(
+            max(0, (self.window_size[0] - scaled_w) // 2 // self.scale * self.scale),
+            max(0, (self.window_size[1] - scaled_h) // 2 // self.scale * self.scale),
+            scaled_w,
+            scaled_h
+        )
+
+    def fit_window_size(self, window_scale):
+        # window_scale 0 means the largest integer multiple that fits the
+        # desktop; anything bigger than that is clamped to it
+        try:
+            desktop_w, desktop_h = pygame.display.get_desktop_sizes()[0]
+            largest = max(1, min((desktop_w - 64) // self.width,
+                                 (desktop_h - 96) // self.height))
+        except (pygame.error, IndexError):
+            largest = 1
+        if window_scale <= 0 or window_scale > largest:
+            window_scale = largest
+        return (self.width * window_scale, self.height * window_scale)
+
+    def to_logical(self, pos):
+        # Map a window-space position (e.g. the mouse) into render space
+        x = (pos[0] - self.viewport.x) // self.scale
+        y = (pos[1] - self.viewport.y) // self.scale
+        return (max(0, min(self.width - 1, x)), max(0, min(self.height - 1, y)))
+
+config = DisplayConfig()
@@ -2,9 +2,10 @@ import pygame
 import random
 import math
 from constants import *
+from quality import QUALITY_LEVELS
 
 class Particle:
-    def __init__(self, pos, color, speed, lifetime):
+    def __init__(self, pos, color, speed, lifetime, birth_time):
         self.pos = pygame.math.Vector2(pos)
         self.velocity = pygame.math.Vector2(
             random.uniform(-speed, speed),
@@ -13,11 +14,10 @@ class Particle:
         # Ensure color values are integers
         self.color = tuple(int(c) for c in color[:3])  # Take only RGB values
         self.lifetime = lifetime
-        self.birth_time = pygame.time.get_ticks()
+        self.birth_time = birth_time
         self.alive = True
 
-    def update(self):
-        current_time = pygame.time.get_ticks()
+    def update(self, current_time):
         if current_time - self.birth_time > self.lifetime:
             self.alive = False
             return
@@ -25,62 +25,70 @@ class Particle:
         self.pos += self.velocity
         self.velocity *= 0.95  # Slow down over time
 
-    def draw(self, screen):
-        # Calculate alpha based on remaining lifetime
-        remaining_time = self.lifetime - (pygame.time.get_ticks() - self.birth_time)
-        alpha = int(255 * (remaining_time / self.lifetime))
-        
+    def draw(self, renderer):
         # Ensure the position is converted to integers
         pos = (int(self.pos.x), int(self.pos.y))
         # Draw directly to screen with current color
-        pygame.draw.circle(screen, self.color, pos, 2)
+        renderer.draw_circle(self.color, pos, 2)
 
 class EffectManager:
     def __init__(self):
         self.particles = []
         self.screen_shake = 0
         self.screen_shake_intensity = 0
+        self.time = 0
+        self.enabled = True  # Headless simulations skip particles entirely
+        self.event_log = None  # Set to a list to record effect triggers (used by the net server)
+        self.quality = QUALITY_LEVELS[0]  # Set by the quality governor
         
     def create_explosion(self, pos, color, count=20):
-        for _ in range(count):
-            self.particles.append(
-                Particle(pos, color, 5, 500)  # 500ms lifetime
-            )
+        if self.event_log is not None:
+            self.event_log.append(('explosion', pos, color, count))
+        if not self.enabled:
+            return
+        self.add_particles(pos, color, 5, 500, count)  # 500ms lifetime
             
     def create_hit_effect(self, pos):
-        for _ in range(5):
-            self.particles.append(
-                Particle(pos, (255, 255, 255), 3, 200)
-            )
+        if self.event_log is not None:
+            self.event_log.append(('hit', pos, WHITE, HIT_PARTICLE_COUNT))
+        if not self.enabled:
+            return
+        self.add_particles(pos, WHITE, 3, 200, HIT_PARTICLE_COUNT)
+
+    def add_particles(self, pos, color, speed, lifetime, count):
+        count = round(count * self.quality['particles'])
+        lifetime *= self.quality['lifetime']
+        for _ in range(count):
+            self.particles.append(Particle(pos, color, speed, lifetime, self.time))
             
     def add_screen_shake(self, intensity, duration):
         self.screen_shake = duration
-        self.screen_shake_intensity = intensity
+        self.screen_shake_intensity = round(intensity * self.quality['shake'])
 
-    def update(self):
+    def update(self, current_time):
         # Update particles
-        current_time = pygame.time.get_ticks()
+        self.time = current_time
         self.particles = [p for p in self.particles if p.alive]
         for particle in self.particles:
-            particle.update()
+            particle.update(current_time)
             
         # Update screen shake
         if self.screen_shake > 0:
             self.screen_shake -= 1
 
-    def draw(self, screen):
-        # Draw particles
-        for particle in self.particles:
-            if particle.alive:
-                particle.draw(screen)
-            
-        # Apply screen shake
+    def shake_offset(self):
         if self.screen_shake > 0:
-            offset = (
+            return (
                 random.randint(-self.screen_shake_intensity, self.screen_shake_intensity),
                 random.randint(-self.screen_shake_intensity, self.screen_shake_intensity)
             )
-            screen.blit(screen, offset)
+        return (0, 0)
+
+    def draw(self, renderer):
+        # Draw particles
+        for particle in self.particles:
+            if particle.alive:
+                particle.draw(renderer)
 
 class AnimatedSprite(pygame.sprite.Sprite):
     def __init__(self, images, pos, animation_speed):
@@ -2,104 +2,107 @@ import pygame
 import random
 import math
 from constants import *
+from display import config
+from asset_manager import assets, solid_surface
 
 class BaseEnemy(pygame.sprite.Sprite):
-    def __init__(self, pos=None):
+    ranged = False  # Ranged enemies also fire(game, target_pos) every tick
+    separation = 1.0  # Weight of crowd separation steering, 0 to switch it off
+
+    def __init__(self, pos=None, rng=random):
         super().__init__()
         if pos is None:
-            self.position = self.random_spawn_position()
+            self.position = self.random_spawn_position(rng)
         else:
             self.position = pygame.math.Vector2(pos)
         self.rect.center = self.position
         
-    def random_spawn_position(self):
-        side = random.randint(0, 3)
+    def random_spawn_position(self, rng=random):
+        side = rng.randint(0, 3)
         if side == 0:  # top
             return pygame.math.Vector2(
-                random.randint(0, SCREEN_WIDTH),
+                rng.randint(0, config.width),
                 -self.rect.height
             )
         elif side == 1:  # right
             return pygame.math.Vector2(
-                SCREEN_WIDTH + self.rect.width,
-                random.randint(0, SCREEN_HEIGHT)
+                config.width + self.rect.width,
+                rng.randint(0, config.height)
             )
         elif side == 2:  # bottom
             return pygame.math.Vector2(
-                random.randint(0, SCREEN_WIDTH),
-                SCREEN_HEIGHT + self.rect.height
+                rng.randint(0, config.width),
+                config.height + self.rect.height
             )
         else:  # left
             return pygame.math.Vector2(
                 -self.rect.width,
-                random.randint(0, SCREEN_HEIGHT)
+                rng.randint(0, config.height)
             )
 
 class BasicEnemy(BaseEnemy):
-    def __init__(self, pos=None):
-        self.image = pygame.Surface((ENEMY_SIZE, ENEMY_SIZE))
-        self.image.fill(RED)
+    def __init__(self, pos=None, rng=random):
+        self.image = assets.surface('enemy_basic', lambda: solid_surface((ENEMY_SIZE, ENEMY_SIZE), RED))
         self.rect = self.image.get_rect()
-        super().__init__(pos)
+        super().__init__(pos, rng)
         self.speed = ENEMY_SPEED
         self.health = 1
         self.score_value = 10
 
-    def update(self, player_pos):
+    def update(self, player_pos, scale=1.0):
         direction = pygame.math.Vector2(player_pos) - self.position
         if direction.length() > 0:
             direction = direction.normalize()
-        self.position += direction * self.speed
+        self.position += direction * (self.speed * scale)
         self.rect.center = self.position
 
 class FastEnemy(BaseEnemy):
-    def __init__(self, pos=None):
-        self.image = pygame.Surface((ENEMY_SIZE - 5, ENEMY_SIZE - 5))
-        self.image.fill((255, 150, 150))
+    def __init__(self, pos=None, rng=random):
+        self.image = assets.surface('enemy_fast', lambda: solid_surface((ENEMY_SIZE - 5, ENEMY_SIZE - 5), (255, 150, 150)))
         self.rect = self.image.get_rect()
-        super().__init__(pos)
+        super().__init__(pos, rng)
         self.speed = ENEMY_SPEED * 1.5
         self.health = 1
         self.score_value = 15
 
-    def update(self, player_pos):
+    def update(self, player_pos, scale=1.0):
         direction = pygame.math.Vector2(player_pos) - self.position
         if direction.length() > 0:
             direction = direction.normalize()
-        self.position += direction * self.speed
+        self.position += direction * (self.speed * scale)
         self.rect.center = self.position
 
 class TankEnemy(BaseEnemy):
-    def __init__(self, pos=None):
-        self.image = pygame.Surface((ENEMY_SIZE + 10, ENEMY_SIZE + 10))
-        self.image.fill((139, 0, 0))
+    separation = 0.5  # Heavy, shoves others more than it gets shoved
+    def __init__(self, pos=None, rng=random):
+        self.image = assets.surface('enemy_tank', lambda: solid_surface((ENEMY_SIZE + 10, ENEMY_SIZE + 10), (139, 0, 0)))
         self.rect = self.image.get_rect()
-        super().__init__(pos)
+        super().__init__(pos, rng)
         self.speed = ENEMY_SPEED * 0.7
         self.health = 3
         self.score_value = 25
 
-    def update(self, player_pos):
+    def update(self, player_pos, scale=1.0):
         direction = pygame.math.Vector2(player_pos) - self.position
         if direction.length() > 0:
             direction = direction.normalize()
-        self.position += direction * self.speed
+        self.position += direction * (self.speed * scale)
         self.rect.center = self.position
 
 class CirclingEnemy(BaseEnemy):
-    def __init__(self, pos=None):
-        self.image = pygame.Surface((ENEMY_SIZE, ENEMY_SIZE))
-        self.image.fill((255, 0, 255))
+    separation = 0.0  # Its orbit sets the position outright
+    def __init__(self, pos=None, rng=random):
+        self.image = assets.surface('enemy_circling', lambda: solid_surface((ENEMY_SIZE, ENEMY_SIZE), (255, 0, 255)))
         self.rect = self.image.get_rect()
-        super().__init__(pos)
+        super().__init__(pos, rng)
         self.speed = ENEMY_SPEED * 0.8
-        self.angle = random.uniform(0, 2 * math.pi)
+        self.angle = rng.uniform(0, 2 * math.pi)
         self.circle_radius = 100
         self.circle_speed = 0.05
         self.health = 1
         self.score_value = 20
 
-    def update(self, player_pos):
+    def update(self, player_pos, scale=1.0):
         # Move toward player while circling
         direction = pygame.math.Vector2(player_pos) - self.position
         distance = direction.length()
@@ -108,10 +111,10 @@ class CirclingEnemy(BaseEnemy):
             # Move toward player if too far
             if direction.length() > 0:
                 direction = direction.normalize()
-            self.position += direction * self.speed
+            self.position += direction * (self.speed * scale)
         else:
             # Circle around player
-            self.angle += self.circle_speed
+            self.angle += self.circle_speed * scale
             offset = pygame.math.Vector2(
                 math.cos(self.angle) * self.circle_radius,
                 math.sin(self.angle) * self.circle_radius
@@ -120,6 +123,56 @@ class CirclingEnemy(BaseEnemy):
             
         self.rect.center = self.position
 
+class RangedEnemy(BaseEnemy):
+    # Keeps its distance and fires projectile patterns (see projectiles.py)
+    PATTERNS = ('ring', 'spiral', 'aimed')
+    ranged = True
+
+    def __init__(self, pos=None, rng=random):
+        self.image = assets.surface('enemy_ranged', lambda: solid_surface((ENEMY_SIZE + 4, ENEMY_SIZE + 4), (255, 140, 0)))
+        self.rect = self.image.get_rect()
+        super().__init__(pos, rng)
+        self.speed = ENEMY_SPEED * 0.6
+        self.health = 2
+        self.score_value = 30
+        self.pattern = rng.randrange(len(self.PATTERNS))
+        self.angle = rng.uniform(0, 2 * math.pi)  # Spiral phase
+        self.next_shot = 0  # Game time of the next volley
+        self.preferred_distance = 220
+
+    def update(self, player_pos, scale=1.0):
+        direction = pygame.math.Vector2(player_pos) - self.position
+        distance = direction.length()
+        if distance > 0:
+            direction = direction.normalize()
+            # Close in from afar, back off when too close
+            if distance > self.preferred_distance + 20:
+                self.position += direction * (self.speed * scale)
+            elif distance < self.preferred_distance - 20:
+                self.position -= direction * (self.speed * scale)
+        self.rect.center = self.position
+
+    def fire(self, game, target_pos):
+        if game.time < self.next_shot or not game.screen_rect.colliderect(self.rect):
+            return
+        pattern = self.PATTERNS[self.pattern]
+        projectiles = game.projectiles
+        if pattern == 'ring':
+            projectiles.ring(self.position, min(32, 10 + 2 * game.wave), phase=self.angle)
+            self.angle += 0.2
+            self.next_shot = game.time + 1500
+        elif pattern == 'spiral':
+            projectiles.ring(self.position, 4, phase=self.angle)
+            self.angle += 0.35
+            self.next_shot = game.time + 120
+        else:
+            projectiles.aimed(self.position, target_pos, min(7, 2 + game.wave), 0.6)
+            self.next_shot = game.time + 1000
+
+# Stable ids for observations and snapshots
+ENEMY_TYPE_IDS = {BasicEnemy: 1, FastEnemy: 2, TankEnemy: 3, CirclingEnemy: 4, RangedEnemy: 5}
+ENEMY_CLASSES = {type_id: cls for cls, type_id in ENEMY_TYPE_IDS.items()}
+
 class EnemySpawner:
     def __init__(self, game):
         self.game = game
@@ -127,7 +180,8 @@ class EnemySpawner:
             (BasicEnemy, 60),    # (class, weight)
             (FastEnemy, 20),
             (TankEnemy, 10),
-            (CirclingEnemy, 10)
+            (CirclingEnemy, 10),
+            (RangedEnemy, 8)
         ]
         self.total_weight = sum(weight for _, weight in self.enemy_types)
         self.spawn_rate = 0.02
@@ -138,17 +192,17 @@ class EnemySpawner:
         # Increase spawn rate over time
         self.spawn_rate = min(0.05, 0.02 + (self.time_elapsed / 60000) * 0.03)
         
-        if random.random() < self.spawn_rate:
+        if self.game.rng.random() < self.spawn_rate * dt * FPS:  # Per 60 FPS frame
             self.spawn_enemy()
             
     def spawn_enemy(self):
-        roll = random.randint(1, self.total_weight)
+        roll = self.game.rng.randint(1, self.total_weight)
         cumulative_weight = 0
         
         for enemy_class, weight in self.enemy_types:
             cumulative_weight += weight
             if roll <= cumulative_weight:
-                enemy = enemy_class()
+                enemy = enemy_class(rng=self.game.rng)
                 self.game.enemies.add(enemy)
                 self.game.all_sprites.add(enemy)
                 break
\ No newline at end of file
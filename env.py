@@ -0,0 +1,303 @@
+import multiprocessing as mp
+from itertools import islice
+from multiprocessing import shared_memory
+import numpy as np
+import pygame
+from constants import *
+from game import Game
+from enemies import ENEMY_TYPE_IDS
+from powerups import POWERUP_TYPE_IDS
+from sounds import SilentSounds
+
+# Observation layout: one flat float32 vector per game, zero-padded.
+# Entities beyond the caps are left out (oldest first are kept, except
+# enemy projectiles, where the nearest to the player are kept).
+MAX_ENEMIES = 64
+MAX_BULLETS = 64
+MAX_PROJECTILES = 64  # Enemy projectiles nearest the player
+MAX_OBSERVED_POWERUPS = MAX_POWERUPS + 1
+
+GAME_FEATURES = 3     # score, wave, time (s)
+PLAYER_FEATURES = 7   # x, y, lives, speed, shield, spread shot, invulnerable
+ENEMY_FEATURES = 5    # x, y, health, type id, present
+BULLET_FEATURES = 5   # x, y, vx, vy, present
+POWERUP_FEATURES = 4  # x, y, type id, present
+
+def _layout():
+    sizes = [
+        ('game', GAME_FEATURES),
+        ('player', PLAYER_FEATURES),
+        ('enemies', MAX_ENEMIES * ENEMY_FEATURES),
+        ('bullets', MAX_BULLETS * BULLET_FEATURES),
+        ('powerups', MAX_OBSERVED_POWERUPS * POWERUP_FEATURES),
+        ('projectiles', MAX_PROJECTILES * BULLET_FEATURES),
+    ]
+    slices = {}
+    start = 0
+    for name, size in sizes:
+        slices[name] = slice(start, start + size)
+        start += size
+    return slices, start
+
+OBS_SLICES, OBS_SIZE = _layout()
+
+# Action: dx, dy in -1..1, shoot flag, aim x, aim y (render coordinates)
+ACTION_SIZE = 5
+
+LIFE_PENALTY = 50
+
+def split_observation(obs):
+    # Views of one observation vector as per-entity tables
+    return {
+        'game': obs[OBS_SLICES['game']],
+        'player': obs[OBS_SLICES['player']],
+        'enemies': obs[OBS_SLICES['enemies']].reshape(MAX_ENEMIES, ENEMY_FEATURES),
+        'bullets': obs[OBS_SLICES['bullets']].reshape(MAX_BULLETS, BULLET_FEATURES),
+        'powerups': obs[OBS_SLICES['powerups']].reshape(MAX_OBSERVED_POWERUPS, POWERUP_FEATURES),
+        'projectiles': obs[OBS_SLICES['projectiles']].reshape(MAX_PROJECTILES, BULLET_FEATURES),
+    }
+
+class ShooterEnv:
+    # Gym-style wrapper around Game: fixed simulation steps, no rendering,
+    # no real-time clock and no input devices
+    def __init__(self, seed=None, frame_skip=1, dt_ms=1000 / FPS, effects=False):
+        self.seed = seed
+        self.frame_skip = frame_skip
+        self.dt_ms = dt_ms
+        self.effects = effects
+        self.game = None
+        self.obs = np.zeros(OBS_SIZE, dtype=np.float32)
+        # Power-up icons are still built (once) with a font, no display needed
+        pygame.font.init()
+
+    # reset() and step() return a fresh copy of the observation; the vector
+    # envs use new_game() and advance() and observe straight into their rows
+
+    def reset(self, seed=None):
+        self.new_game(seed)
+        return self.observe().copy()
+
+    def step(self, action):
+        reward, done, info = self.advance(action)
+        return self.observe().copy(), reward, done, info
+
+    def new_game(self, seed=None):
+        if seed is not None:
+            self.seed = seed
+        self.game = Game(None, SilentSounds(), seed=self.seed)
+        self.game.effect_manager.enabled = self.effects
+        if self.seed is not None:
+            # Successive episodes shouldn't replay the same game
+            self.seed += 1
+
+    def advance(self, action):
+        # Steps the game without observing it; returns reward, done, info
+        game = self.game
+        dx, dy, shoot, aim_x, aim_y = action[:ACTION_SIZE]
+        dx = max(-1, min(1, int(round(dx))))
+        dy = max(-1, min(1, int(round(dy))))
+        # Plain floats: NumPy scalars make every vector op in the game slower
+        target = (float(aim_x), float(aim_y))
+        shoot = bool(shoot > 0.5)
+        score = game.score
+        lives = game.player.lives
+        for _ in range(self.frame_skip):
+            game.step(dx, dy, shoot, target, self.dt_ms)
+            if game.game_over:
+                break
+        reward = (game.score - score) - LIFE_PENALTY * (lives - game.player.lives)
+        info = {'score': game.score, 'wave': game.wave, 'lives': game.player.lives}
+        return float(reward), game.game_over, info
+
+    def observe(self, out=None):
+        # Each table is written as one flat run of values straight into the
+        # vector; building per-row tuples and reshaped views cost more than
+        # the game step itself on small scenes
+        if out is None:
+            out = self.obs
+        out.fill(0)
+        game = self.game
+        player = game.player
+        out[0:GAME_FEATURES + PLAYER_FEATURES] = (
+            game.score, game.wave, game.time / 1000.0,
+            player.position.x, player.position.y, player.lives, player.speed,
+            player.has_shield, player.spread_shot, player.invulnerable
+        )
+
+        values = []
+        for e in islice(game.enemies, MAX_ENEMIES):
+            values += (e.position.x, e.position.y, e.health, ENEMY_TYPE_IDS.get(type(e), 0), 1.0)
+        if values:
+            start = OBS_SLICES['enemies'].start
+            out[start:start + len(values)] = values
+
+        values = []
+        for b in islice(game.bullets, MAX_BULLETS):
+            values += (b.position.x, b.position.y, b.velocity.x, b.velocity.y, 1.0)
+        if values:
+            start = OBS_SLICES['bullets'].start
+            out[start:start + len(values)] = values
+
+        values = []
+        for p in islice(game.powerups, MAX_OBSERVED_POWERUPS):
+            values += (p.rect.centerx, p.rect.centery, POWERUP_TYPE_IDS[p.type], 1.0)
+        if values:
+            start = OBS_SLICES['powerups'].start
+            out[start:start + len(values)] = values
+
+        projectiles = game.projectiles
+        count = projectiles.count
+        if count:
+            positions = projectiles.positions[:count]
+            velocities = projectiles.velocities[:count]
+            if count > MAX_PROJECTILES:
+                offsets = positions - (player.position.x, player.position.y)
+                nearest = np.argpartition(np.einsum('ij,ij->i', offsets, offsets), MAX_PROJECTILES)[:MAX_PROJECTILES]
+                positions = positions[nearest]
+                velocities = velocities[nearest]
+                count = MAX_PROJECTILES
+            start = OBS_SLICES['projectiles'].start
+            table = out[start:start + count * BULLET_FEATURES].reshape(count, BULLET_FEATURES)
+            table[:, 0:2] = positions
+            table[:, 2:4] = velocities
+            table[:, 4] = 1.0
+        return out
+
+class VectorEnv:
+    # Steps N games in lockstep in this process; finished games reset themselves
+    def __init__(self, num_envs, seed=None, **kwargs):
+        self.num_envs = num_envs
+        self.envs = [
+            ShooterEnv(seed=None if seed is None else seed + i * 1000003, **kwargs)
+            for i in range(num_envs)
+        ]
+        self.obs = np.zeros((num_envs, OBS_SIZE), dtype=np.float32)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=np.bool_)
+
+    def reset(self):
+        for i, env in enumerate(self.envs):
+            env.new_game()
+            env.observe(self.obs[i])
+        return self.obs
+
+    def step(self, actions):
+        for i, (env, action) in enumerate(zip(self.envs, np.asarray(actions).tolist())):
+            reward, done, _ = env.advance(action)
+            self.rewards[i] = reward
+            self.dones[i] = done
+            if done:
+                env.new_game()
+            env.observe(self.obs[i])
+        return self.obs, self.rewards, self.dones, {}
+
+    def close(self):
+        pass
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _subproc_worker(conn, names, num_envs, start, stop, seed, kwargs):
+    shms = []
+    arrays = []
+    for key, shape, dtype in (('obs', (num_envs, OBS_SIZE), np.float32),
+                              ('actions', (num_envs, ACTION_SIZE), np.float32),
+                              ('rewards', (num_envs,), np.float32),
+                              ('dones', (num_envs,), np.bool_)):
+        shm, array = _attach(names[key], shape, dtype)
+        shms.append(shm)
+        arrays.append(array)
+    obs, actions, rewards, dones = arrays
+    local = VectorEnv(stop - start, seed=None if seed is None else seed + start * 1000003, **kwargs)
+    # Write straight into this worker's rows of the shared buffers
+    local.obs = obs[start:stop]
+    local.rewards = rewards[start:stop]
+    local.dones = dones[start:stop]
+    try:
+        while True:
+            command = conn.recv()
+            if command == 'step':
+                local.step(actions[start:stop])
+            elif command == 'reset':
+                local.reset()
+            elif command == 'close':
+                break
+            conn.send(True)
+    finally:
+        # Views must be gone before the shared blocks can be closed
+        del obs, actions, rewards, dones, arrays, local
+        for shm in shms:
+            shm.close()
+        conn.close()
+
+class SubprocVectorEnv:
+    # Same interface as VectorEnv, with the games split across worker
+    # processes. Observations, actions, rewards and dones live in shared
+    # memory, so a step only sends one short command per worker.
+    def __init__(self, num_envs, num_workers=None, seed=None, **kwargs):
+        self.num_envs = num_envs
+        num_workers = min(num_envs, num_workers or mp.cpu_count())
+        specs = {
+            'obs': ((num_envs, OBS_SIZE), np.float32),
+            'actions': ((num_envs, ACTION_SIZE), np.float32),
+            'rewards': ((num_envs,), np.float32),
+            'dones': ((num_envs,), np.bool_),
+        }
+        self.blocks = {}
+        self.arrays = {}
+        for key, (shape, dtype) in specs.items():
+            nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+            self.blocks[key] = shm
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        self.obs = self.arrays['obs']
+        self.actions = self.arrays['actions']
+        self.rewards = self.arrays['rewards']
+        self.dones = self.arrays['dones']
+
+        names = {key: shm.name for key, shm in self.blocks.items()}
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        self.conns = []
+        self.processes = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent, child = mp.Pipe()
+            process = mp.Process(
+                target=_subproc_worker,
+                args=(child, names, num_envs, int(start), int(stop), seed, kwargs),
+                daemon=True
+            )
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def broadcast(self, command):
+        for conn in self.conns:
+            conn.send(command)
+        for conn in self.conns:
+            conn.recv()
+
+    def reset(self):
+        self.broadcast('reset')
+        return self.obs
+
+    def step(self, actions):
+        self.actions[:] = actions
+        self.broadcast('step')
+        return self.obs, self.rewards, self.dones, {}
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send('close')
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        self.obs = self.actions = self.rewards = self.dones = None
+        self.arrays = {}
+        for shm in self.blocks.values():
+            shm.close()
+            shm.unlink()
+        self.blocks = {}
@@ -1,20 +1,49 @@
+import math
+import numpy as np
 import pygame
 import sys
 import random
+from collections import namedtuple
 from typing import Optional, Tuple
 from constants import *
+from display import config
 from sprites import Player, Bullet
 from enemies import EnemySpawner
 from powerups import PowerUpManager
 from effects import EffectManager
+from projectiles import ProjectileEngine, projectile_image
+from steering import NeighborGrid, SWEEP_CROWD, any_close, separation_forces, sweep_forces
+from collision import swept_hits
+from renderer import get_font
+from telemetry import telemetry
+from quality import QUALITY_LEVELS
+
+# Everything Game.draw needs, as plain values, so a frame can be drawn
+# while the simulation moves on (see pipeline.py)
+RenderState = namedtuple('RenderState', 'sprites projectiles particles shake score wave lives effects quality game_over')
+
+def poll_controls(settings) -> Tuple[int, int, bool, Optional[Tuple[int, int]]]:
+    keys = pygame.key.get_pressed()
+    dx = (keys[settings.controls['RIGHT']] - 
+          keys[settings.controls['LEFT']])
+    dy = (keys[settings.controls['DOWN']] - 
+          keys[settings.controls['UP']])
+
+    # Shooting
+    mouse_pressed = pygame.mouse.get_pressed()[0]
+    mouse_pos = config.to_logical(pygame.mouse.get_pos()) if mouse_pressed else None
+    return dx, dy, mouse_pressed, mouse_pos
 
 class Game:
-    def __init__(self, settings, sound_manager):
+    def __init__(self, settings, sound_manager, seed=None):
         self.settings = settings
         self.sound_manager = sound_manager
         
-        self.clock = pygame.time.Clock()
         self.dt = 0  # Delta time for frame-independent updates
+        self.time = 0  # Simulation clock in ms, advanced by step()
+        self.ticks = 0
+        self.quality = QUALITY_LEVELS[0]  # Set by the quality governor
+        self.rng = random.Random(seed)  # Gameplay randomness, seedable for bots
         
         # Sprite groups
         self.all_sprites = pygame.sprite.Group()
@@ -23,169 +52,356 @@ class Game:
         self.powerups = pygame.sprite.Group()
         
         # Initialize systems
-        self.player = Player()
+        self.player = Player()  # The local player; co-op games have more in self.players
+        self.players = [self.player]
         self.all_sprites.add(self.player)
         
         self.enemy_spawner = EnemySpawner(self)
         self.powerup_manager = PowerUpManager(self)
         self.effect_manager = EffectManager()
+        self.projectiles = ProjectileEngine()  # Enemy bullets
+        self.crowd_grid = NeighborGrid(SEPARATION_RADIUS)
+        self.swept_collisions = True  # Test bullets along their whole path, not just where they end up
         
         # Game state
         self.score = 0
         self.game_over = False
-        self.last_shot = 0
         self.wave = 1
-        self.wave_timer = pygame.time.get_ticks()
-        self.font = pygame.font.Font(None, 36)
-
-    def handle_input(self) -> None:
-        keys = pygame.key.get_pressed()
-        dx = (keys[self.settings.controls['RIGHT']] - 
-              keys[self.settings.controls['LEFT']])
-        dy = (keys[self.settings.controls['DOWN']] - 
-              keys[self.settings.controls['UP']])
-        self.player.move(dx, dy)
-
-        # Shooting
-        mouse_pressed = pygame.mouse.get_pressed()[0]
-        if mouse_pressed:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.last_shot > SHOOT_DELAY:
-                self.last_shot = current_time
-                mouse_pos = pygame.mouse.get_pos()
-                self.shoot(mouse_pos)
-
-    def shoot(self, target_pos: Tuple[int, int]) -> None:
+        self.wave_timer = 0
+        self.wave_kills = 0
+
+    @property
+    def last_shot(self):
+        return self.player.last_shot
+
+    @last_shot.setter
+    def last_shot(self, value):
+        self.player.last_shot = value
+
+    def add_player(self) -> Player:
+        # Extra co-op players join next to the first one
+        player = Player()
+        offset = 40 * len(self.players)
+        player.position.x += offset if len(self.players) % 2 else -offset
+        player.rect.center = player.position
+        self.players.append(player)
+        self.all_sprites.add(player)
+        return player
+
+    def remove_player(self, player) -> None:
+        if player in self.players and len(self.players) > 1:
+            self.players.remove(player)
+            player.kill()
+            if player is self.player:
+                self.player = self.players[0]
+
+    def handle_input(self) -> Tuple[int, int, bool, Optional[Tuple[int, int]]]:
+        return poll_controls(self.settings)
+
+    def shoot(self, target_pos: Tuple[int, int], player: Optional[Player] = None, late: float = 0.0) -> None:
+        # late: how far into the tick the shot was fired, in 60 FPS frames
+        player = player or self.player
         # Normal shot
-        bullet = Bullet(self.player.rect.center, target_pos)
+        bullet = Bullet(player.rect.center, target_pos, late=late)
         self.all_sprites.add(bullet)
         self.bullets.add(bullet)
         
-        # Spread shot if power-up is active
-        if self.player.spread_shot:
-            spread_angles = [-15, 15]  # Degrees
-            for angle in spread_angles:
-                bullet = Bullet(self.player.rect.center, target_pos, angle)
-                self.all_sprites.add(bullet)
-                self.bullets.add(bullet)
+        # Extra bullets from shot pattern power-ups
+        for angle in player.shot_pattern:
+            bullet = Bullet(player.rect.center, target_pos, angle, late)
+            self.all_sprites.add(bullet)
+            self.bullets.add(bullet)
         
         self.sound_manager.play('shoot')
-        self.effect_manager.create_hit_effect(self.player.rect.center)
+        self.effect_manager.create_hit_effect(player.rect.center)
+
+    def bullet_hits(self):
+        # Each bullet hits the first enemy along the path it moved this tick,
+        # so fast bullets and long ticks cannot skip over small enemies
+        bullets = self.bullets.sprites()
+        enemies = self.enemies.sprites()
+        if not bullets or not enemies:
+            return {}
+        # Broad phase: enemy boxes grown by the furthest a bullet moves in a
+        # tick (plus a pixel of rounding), so only bullets that end a tick
+        # within reach of an enemy go on
+        reach = 2 * (math.ceil(BULLET_SPEED * self.dt * FPS) + 1)
+        rects = [e.rect.inflate(reach, reach) for e in enemies]
+        near = [b for b in bullets if b.rect.collidelist(rects) >= 0]
+        if not near:
+            return {}
+        half = BULLET_SIZE / 2
+        bullets = near
+        starts = [b.previous for b in bullets]
+        ends = [(b.position.x, b.position.y) for b in bullets]
+        # Enemy boxes grown by half a bullet, so each bullet is a point
+        boxes = [(e.rect.left - half, e.rect.top - half, e.rect.right + half, e.rect.bottom + half)
+                 for e in enemies]
+        hits = {}
+        for b, e in zip(*swept_hits(starts, ends, boxes)):
+            bullets[b].kill()
+            hits.setdefault(enemies[e], []).append(bullets[b])
+        return hits
 
     def check_collisions(self) -> None:
         # Bullet-enemy collisions
-        hits = pygame.sprite.groupcollide(self.enemies, self.bullets, False, True)
+        if self.swept_collisions:
+            hits = self.bullet_hits()
+        else:
+            hits = pygame.sprite.groupcollide(self.enemies, self.bullets, False, True)
         for enemy, bullets in hits.items():
             enemy.health -= len(bullets)
             if enemy.health <= 0:
                 self.score += enemy.score_value
+                self.wave_kills += 1
+                telemetry.emit('kill', type(enemy).__name__, enemy.rect.centerx, enemy.rect.centery, self.wave)
                 self.effect_manager.create_explosion(enemy.rect.center, RED)
                 self.sound_manager.play('kill')
                 enemy.kill()
             else:
                 self.effect_manager.create_hit_effect(enemy.rect.center)
 
-        # Player-enemy collisions
-        if not self.player.invulnerable:
-            enemy_hits = pygame.sprite.spritecollide(self.player, self.enemies, True)
-            if enemy_hits:
+        for player in list(self.players):
+            # Player-enemy and player-projectile collisions
+            if not player.invulnerable:
+                enemy_hits = pygame.sprite.spritecollide(player, self.enemies, True)
                 for enemy in enemy_hits:
                     self.effect_manager.create_explosion(enemy.rect.center, RED)
-                if not self.player.has_shield:
-                    self.sound_manager.play('shield')
-                    if self.player.hit():  # Returns True if player dies
-                        self.game_over = True
-                        self.effect_manager.create_explosion(self.player.rect.center, GREEN, 40)
-                        self.effect_manager.add_screen_shake(10, 30)
-                else:
-                    self.player.has_shield = False  # Remove shield
-
-        # Player-powerup collisions
-        powerup_hits = pygame.sprite.spritecollide(self.player, self.powerups, True)
-        for powerup in powerup_hits:
-            self.powerup_manager.collect_powerup(powerup)
-            self.sound_manager.play('powerup')
+                projectile_hits = self.projectiles.collide_circle(player.rect.center, PLAYER_SIZE // 2)
+                if (enemy_hits or projectile_hits) and self.damage_player(player):
+                    continue
+
+            # Player-powerup collisions
+            powerup_hits = pygame.sprite.spritecollide(player, self.powerups, True)
+            for powerup in powerup_hits:
+                self.powerup_manager.collect_powerup(powerup, player)
+                self.sound_manager.play('powerup')
+
+    def damage_player(self, player) -> bool:
+        # Returns True if the player died and left a co-op game
+        if player.has_shield:
+            player.has_shield = False  # Remove shield
+            return False
+        self.sound_manager.play('shield')
+        dead = player.hit(self.time)  # Returns True if player dies
+        telemetry.emit('player_hit', player.lives, self.wave)
+        if dead:
+            telemetry.emit('death', self.wave, self.score, self.time)
+            self.effect_manager.create_explosion(player.rect.center, GREEN, 40)
+            self.effect_manager.add_screen_shake(10, 30)
+            if len(self.players) > 1:
+                self.remove_player(player)
+                return True
+            self.game_over = True
+        return False
+
+    def fire(self, player, target_pos, dt_ms, trigger=None) -> None:
+        # Fire every shot the delay allows while the trigger was down this
+        # tick, each at its own time rather than at the end of the tick.
+        # trigger: (pressed, released) as fractions of the tick; None means
+        # held for all of it.
+        pressed, released = trigger or (0.0, 1.0)
+        tick_start = self.time - dt_ms
+        shot = max(tick_start + pressed * dt_ms, player.last_shot + SHOOT_DELAY)
+        while shot <= tick_start + released * dt_ms:
+            player.last_shot = shot
+            self.shoot(target_pos, player, (shot - tick_start) * FPS / 1000.0)
+            shot += SHOOT_DELAY
 
     def update_wave(self):
-        current_time = pygame.time.get_ticks()
+        current_time = self.time
         if current_time - self.wave_timer > WAVE_DURATION:
+            telemetry.emit('wave', self.wave, current_time - self.wave_timer, self.wave_kills, self.score)
+            self.wave_kills = 0
             self.wave += 1
             self.wave_timer = current_time
             self.enemy_spawner.spawn_rate *= 1.2  # Increase spawn rate
             self.effect_manager.add_screen_shake(5, 20)
 
-    def update(self) -> None:
+    def update(self, controls=None, dt_ms=1000 / FPS) -> None:
+        # controls: (dx, dy, shooting, target_pos, trigger) from an InputBuffer,
+        # or None to poll the devices
         if not self.game_over:
-            # Calculate delta time
-            self.dt = self.clock.tick(FPS) / 1000.0
-            
-            self.handle_input()
-            self.update_wave()
-            
-            # Update all systems
-            self.player.update()
-            self.enemy_spawner.update(self.dt)
-            self.powerup_manager.update()
-            self.effect_manager.update()
-            
-            # Update sprites
-            self.bullets.update()
-            self.enemies.update(pygame.math.Vector2(self.player.rect.center))
-            self.powerups.update()
-            
-            self.check_collisions()
-
-    def draw_hud(self, screen):
-        # Score
-        score_text = self.font.render(f'Score: {self.score}', True, WHITE)
-        screen.blit(score_text, (10, 10))
+            dx, dy, shooting, target_pos, *trigger = controls or self.handle_input()
+            self.step(dx, dy, shooting, target_pos, dt_ms, *trigger)
+
+    def step(self, dx, dy, shooting, target_pos, dt_ms=1000 / FPS, trigger=None) -> None:
+        # One simulation tick on the game's own clock, independent of the
+        # real-time clock and input devices so bots can drive it directly
+        self.step_players(((self.player, dx, dy, shooting, target_pos, trigger),), dt_ms)
+
+    def step_players(self, inputs, dt_ms=1000 / FPS) -> None:
+        # inputs: (player, dx, dy, shooting, target_pos[, trigger]) for every player that acts this tick
+        if self.game_over:
+            return
+        self.time += dt_ms
+        self.ticks += 1
+        self.dt = dt_ms / 1000.0
+        # Movement speeds are per 60 FPS frame; longer ticks move further.
+        # Divided this way a 60 FPS tick comes out at exactly 1.0
+        scale = dt_ms / (1000.0 / FPS)
         
-        # Wave
-        wave_text = self.font.render(f'Wave: {self.wave}', True, WHITE)
-        wave_rect = wave_text.get_rect(midtop=(SCREEN_WIDTH // 2, 10))
-        screen.blit(wave_text, wave_rect)
+        for player, dx, dy, shooting, target_pos, *trigger in inputs:
+            player.move(dx, dy, scale)
+            if shooting:
+                self.fire(player, target_pos, dt_ms, *trigger)
+        self.update_wave()
         
-        # Lives
-        heart_width = 20
-        heart_spacing = 5
-        start_x = SCREEN_WIDTH - (heart_width + heart_spacing) * 3 - 10
+        # Update all systems
+        for player in self.players:
+            player.update(self.time)
+        self.enemy_spawner.update(self.dt)
+        self.powerup_manager.update()
+        self.effect_manager.update(self.time)
         
-        for i in range(self.player.lives):
-            heart_rect = pygame.Rect(
-                start_x + (heart_width + heart_spacing) * i,
-                10,
-                heart_width,
-                heart_width
-            )
-            pygame.draw.rect(screen, RED, heart_rect)
+        # Update sprites
+        self.bullets.update(scale)
+        self.update_enemies(scale)
+        self.separate_enemies(scale)
+        self.fire_projectiles()
+        self.projectiles.update(scale)
+        self.powerups.update()
         
-        # Active power-ups
-        self.powerup_manager.draw_active_effects(screen)
+        self.check_collisions()
 
-    def draw(self, screen) -> None:
-        screen.fill(BLACK)
-        
-        # Draw all sprites
-        self.all_sprites.draw(screen)
-        self.powerups.draw(screen)
-        
-        # Draw effects
-        self.effect_manager.draw(screen)
-        
-        # Draw HUD
-        self.draw_hud(screen)
+    def update_enemies(self, scale=1.0):
+        interval = self.quality['offscreen_interval']
+        if len(self.players) == 1 and interval == 1:
+            self.enemies.update(pygame.math.Vector2(self.player.rect.center), scale)
+            return
+
+        # Every enemy chases the closest player
+        targets = [pygame.math.Vector2(p.rect.center) for p in self.players]
+        screen = self.screen_rect
+        for i, enemy in enumerate(self.enemies):
+            target = targets[0] if len(targets) == 1 else min(targets, key=enemy.position.distance_squared_to)
+            if interval == 1 or screen.colliderect(enemy.rect):
+                enemy.update(target, scale)
+            elif (self.ticks + i) % interval == 0:
+                # Off-screen enemies take one bigger step every few ticks
+                enemy.update(target, scale * interval)
+
+    def separate_enemies(self, scale=1.0):
+        # Spread the crowd out instead of letting it collapse into one blob
+        if len(self.enemies) < 2:
+            return
+        points = [(e.position.x, e.position.y) for e in self.enemies if e.separation]
+        if len(points) < 2 or not any_close(points, SEPARATION_RADIUS):
+            return  # Nobody overlaps, so every push would be zero
+        if len(points) <= SWEEP_CROWD:
+            pushes = sweep_forces(points, SEPARATION_RADIUS)
+        else:
+            pushes = separation_forces(np.array(points), SEPARATION_RADIUS, self.crowd_grid).tolist()
+        crowd = [e for e in self.enemies if e.separation]
+        for enemy, (px, py) in zip(crowd, pushes):
+            if px or py:
+                push = pygame.math.Vector2(px, py) * (SEPARATION_STRENGTH * enemy.separation * scale)
+                limit = enemy.speed * SEPARATION_LIMIT * scale
+                if push.length_squared() > limit * limit:
+                    push.scale_to_length(limit)
+                enemy.position += push
+                enemy.rect.center = enemy.position
+
+    def fire_projectiles(self):
+        ranged = [e for e in self.enemies if e.ranged]
+        if not ranged:
+            return
+        targets = [p.rect.center for p in self.players]
+        for enemy in ranged:
+            target = targets[0] if len(targets) == 1 else \
+                min(targets, key=enemy.position.distance_squared_to)
+            enemy.fire(self, target)
+
+    @property
+    def screen_rect(self):
+        return pygame.Rect(0, 0, config.width, config.height)
+
+    def render_state(self) -> RenderState:
+        return RenderState(
+            sprites=[(s.image, s.rect.copy()) for s in self.all_sprites] +
+                    [(s.image, s.rect.copy()) for s in self.powerups],
+            projectiles=self.projectiles.draw_positions(),
+            particles=[(p.color, (int(p.pos.x), int(p.pos.y))) for p in self.effect_manager.particles if p.alive],
+            shake=self.effect_manager.shake_offset(),
+            score=self.score,
+            wave=self.wave,
+            lives=self.player.lives,
+            effects=self.powerup_manager.effect_bars(),
+            quality=self.quality['name'],
+            game_over=self.game_over
+        )
+
+    def draw(self, renderer) -> None:
+        draw_render_state(renderer, self.render_state())
+
+def draw_hud(renderer, state):
+    font = get_font(36)
+
+    # Score
+    score_text = renderer.text(font, f'Score: {state.score}', WHITE)
+    renderer.blit(score_text, (10, 10))
+    
+    # Wave
+    wave_text = renderer.text(font, f'Wave: {state.wave}', WHITE)
+    wave_rect = wave_text.get_rect(midtop=(config.width // 2, 10))
+    renderer.blit(wave_text, wave_rect)
+    
+    # Lives
+    heart_width = 20
+    heart_spacing = 5
+    start_x = config.width - (heart_width + heart_spacing) * 3 - 10
+    
+    for i in range(state.lives):
+        heart_rect = pygame.Rect(
+            start_x + (heart_width + heart_spacing) * i,
+            10,
+            heart_width,
+            heart_width
+        )
+        renderer.fill_rect(RED, heart_rect)
+    
+    # Active power-ups, one pip per extra stack
+    x = 10
+    y = 40
+    for color, width, extra_stacks in state.effects:
+        renderer.fill_rect(color, (x, y, width, 10))
+        for i in range(1, extra_stacks + 1):
+            renderer.fill_rect(color, (x + 100 + 6 * i, y, 4, 10))
+        y += 15
+
+    # Reduced detail indicator
+    if state.quality != QUALITY_LEVELS[0]['name']:
+        quality_text = renderer.text(get_font(20), f"Quality: {state.quality}", GRAY)
+        renderer.blit(quality_text, quality_text.get_rect(bottomleft=(10, config.height - 10)))
+
+def draw_render_state(renderer, state) -> None:
+    renderer.clear(BLACK)
+    
+    # Draw all sprites, shaken along with the effects
+    renderer.set_offset(state.shake)
+    renderer.draw_images(state.sprites)
+    if len(state.projectiles):
+        renderer.draw_points(projectile_image(), state.projectiles)
+    
+    # Draw effects
+    for color, pos in state.particles:
+        renderer.draw_circle(color, pos, 2)
+    renderer.set_offset((0, 0))
+    
+    # Draw HUD
+    draw_hud(renderer, state)
+    
+    if state.game_over:
+        font = get_font(36)
+        game_over_text = renderer.text(
+            font,
+            f'Game Over! Wave {state.wave} - Score {state.score}', 
+            WHITE
+        )
+        restart_text = renderer.text(font, 'Press R to restart', WHITE)
         
-        if self.game_over:
-            game_over_text = self.font.render(
-                f'Game Over! Wave {self.wave} - Score {self.score}', 
-                True, WHITE
-            )
-            restart_text = self.font.render('Press R to restart', True, WHITE)
-            
-            text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
-            restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20))
-            
-            screen.blit(game_over_text, text_rect)
-            screen.blit(restart_text, restart_rect)
+        text_rect = game_over_text.get_rect(center=(config.width // 2, config.height // 2 - 20))
+        restart_rect = restart_text.get_rect(center=(config.width // 2, config.height // 2 + 20))
         
-        pygame.display.flip()
\ No newline at end of file
+        renderer.blit(game_over_text, text_rect)
+        renderer.blit(restart_text, restart_rect)
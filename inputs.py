@@ -0,0 +1,139 @@
+from collections import deque
+import pygame
+from display import config
+from telemetry import telemetry
+
+class InputBuffer:
+    # Timestamped input between simulation ticks.
+    # The main loop sleeps until the next frame inside wait(), which hands
+    # back events as SDL delivers them, so each one is stamped within about a
+    # millisecond of arriving instead of at the next frame. Events update a
+    # per-tick record: a key or button that goes down and up between two
+    # ticks still counts for that tick, and the trigger window tells the
+    # game where inside the tick the shoot button went down and up.
+    def __init__(self, settings, window=120):
+        self.settings = settings
+        self.events = []  # Events for the menu and game manager, in order
+        self.held = set()  # Controls down right now
+        self.tapped = set()  # Controls that went down since the last tick
+        self.pressed_at = None  # When the shoot button went down this tick
+        self.released_at = None  # When it last went up this tick
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.tick_start = pygame.time.get_ticks()
+        self.frame = 0
+        self.unshown = deque()  # (frame, time) of the first press in each tick not yet on screen
+        self.latency = deque(maxlen=window)  # Input-to-photon times in ms
+        self.window = window
+        self.new_samples = 0
+
+    def control(self, event):
+        # The control an event presses or releases, or None
+        controls = self.settings.controls
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            code = event.key
+            mouse = False
+        elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            code = event.button
+            mouse = True
+        else:
+            return None
+        for action, value in controls.items():
+            # Mouse buttons are 1-5, well below any key code
+            if value == code and (value <= pygame.BUTTON_X2) == mouse:
+                return action
+        return None
+
+    def add(self, event, stamp=None):
+        if stamp is None:
+            stamp = pygame.time.get_ticks()
+        self.events.append(event)
+        if event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            self.mouse_pos = event.pos
+        if event.type == pygame.WINDOWFOCUSLOST:
+            # Key-up events never arrive for keys released in another window
+            if 'SHOOT' in self.held:
+                self.released_at = stamp
+            self.held.clear()
+            return
+        action = self.control(event)
+        if action is None:
+            return
+        if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            if action in self.held:
+                return
+            self.held.add(action)
+            self.tapped.add(action)
+            if action == 'SHOOT' and self.pressed_at is None:
+                self.pressed_at = stamp
+            if not self.unshown or self.unshown[-1][0] != self.frame:
+                self.unshown.append((self.frame, stamp))
+        elif action in self.held:
+            self.held.discard(action)
+            if action == 'SHOOT':
+                self.released_at = stamp
+
+    def poll(self):
+        for event in pygame.event.get():
+            self.add(event)
+
+    def wait(self, until_ms):
+        # Sleep until until_ms (pygame.time.get_ticks), taking events as they come
+        while True:
+            remaining = int(until_ms - pygame.time.get_ticks())
+            if remaining <= 0:
+                break
+            event = pygame.event.wait(remaining)
+            if event.type != pygame.NOEVENT:
+                self.add(event)
+        self.poll()
+
+    def take_events(self):
+        events = self.events
+        self.events = []
+        return events
+
+    def tick(self, now=None):
+        # Input for the tick that ends now. trigger is the (pressed, released)
+        # part of the tick the shoot button was down for, as fractions of it.
+        now = pygame.time.get_ticks() if now is None else now
+        length = max(1, now - self.tick_start)
+        down = self.held | self.tapped
+        dx = ('RIGHT' in down) - ('LEFT' in down)
+        dy = ('DOWN' in down) - ('UP' in down)
+        # Released this tick after being held since an earlier one still
+        # fires the shots that came due before the release
+        shooting = 'SHOOT' in down or self.released_at is not None
+        trigger = None
+        if shooting:
+            pressed = 0.0 if self.pressed_at is None else (self.pressed_at - self.tick_start) / length
+            released = 1.0 if 'SHOOT' in self.held else (self.released_at - self.tick_start) / length
+            pressed = min(1.0, max(0.0, pressed))
+            trigger = (pressed, max(pressed, min(1.0, released)))
+        target = config.to_logical(self.mouse_pos) if shooting else None
+
+        self.tick_start = now
+        self.tapped.clear()
+        self.pressed_at = None
+        self.released_at = None
+        return dx, dy, shooting, target, trigger
+
+    def presented(self, lag=0):
+        # Call right after a frame reaches the screen. lag is how many frames
+        # behind the newest input that frame is (1 when simulating ahead).
+        now = pygame.time.get_ticks()
+        while self.unshown and self.unshown[0][0] <= self.frame - lag:
+            self.latency.append(now - self.unshown.popleft()[1])
+            self.new_samples += 1
+        self.frame += 1
+        if self.new_samples >= self.window:
+            self.new_samples = 0
+            samples = sorted(self.latency)
+            n = len(samples)
+            telemetry.emit('input_latency', n, samples[n // 2], samples[int(n * 0.95)], samples[-1])
+
+    def latency_stats(self):
+        # (p50, p95) input-to-photon ms over the recent presses, or None
+        if not self.latency:
+            return None
+        samples = sorted(self.latency)
+        return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
@@ -1,62 +1,267 @@
-import pygame
+import os
 import sys
-from game import Game
+import threading
+import time
+from startup import StartupProfiler
+
+# Installed before anything else is imported so every module load is timed
+profiler = StartupProfiler('--profile-startup' in sys.argv[1:])
+profiler.install_import_hook()
+
+import pygame
 from menu import Menu
 from settings import Settings
 from sounds import SoundManager
+from asset_manager import assets
+from renderer import create_renderer, get_font
+from display import config
+from telemetry import telemetry, FrameStats
+from quality import QualityGovernor, QUALITY_LEVELS
+from diagnostics import Diagnostics, GCScheduler
+from inputs import InputBuffer
 from constants import *
 
 class GameManager:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Top-Down Shooter")
+    def __init__(self, connect=None):
+        self.connect = connect  # (host, port) of a co-op server, or None for a local game
+        # Only what the title screen needs; the mixer is opened by the sound loader
+        with profiler.measure('pygame display/font init'):
+            pygame.display.init()
+            pygame.font.init()
+        with profiler.measure('settings'):
+            self.settings = Settings()
+        with profiler.measure('renderer'):
+            config.set_resolution(*self.settings.resolution)
+            config.set_window_size(config.fit_window_size(self.settings.window_scale))
+            self.renderer = create_renderer(self.settings.renderer, config, "Top-Down Shooter")
         self.clock = pygame.time.Clock()
-        
-        self.settings = Settings()
-        self.sound_manager = SoundManager()
-        self.sound_manager.set_volume(self.settings.sound_volume)
-        
+        self.input = InputBuffer(self.settings)
+        self.show_stats = False  # F3 in game
+        if self.settings.telemetry:
+            telemetry.start(renderer=self.settings.renderer, resolution=list(config.size))
+        self.frame_stats = FrameStats(telemetry)
+        self.diagnostics = Diagnostics()
+        if self.settings.diagnostics:
+            self.diagnostics.start()
+        self.gc = GCScheduler(self.settings.gc_mode)
+        self.quality = QualityGovernor()
+        names = [level['name'] for level in QUALITY_LEVELS]
+        if self.settings.quality in names:
+            self.quality.enabled = False
+            self.quality.level = names.index(self.settings.quality)
+
+        self.assets = assets
+        self.sound_manager = SoundManager(self.settings.sound_volume)
+
         self.state = 'title'  # 'title' or 'game'
-        self.menu = Menu(self)
+        with profiler.measure('menu'):
+            self.menu = Menu(self)
         self.game = None
+        self.Game = None
+        self.sim = None  # SimulationThread when the pipeline setting is on
+
+        # Put the title screen up before anything else is loaded
+        with profiler.measure('first frame'):
+            self.menu.draw(self.renderer)
+            self.renderer.present()
+        profiler.report('first frame')
+
+        self.preloader = threading.Thread(target=self.preload, name='preload', daemon=True)
+        self.preloader.start()
+        self.assets.watch()
+
+    def preload(self):
+        # Warm up gameplay modules while the player looks at the menu
+        with profiler.measure('preload gameplay'):
+            from game import Game
+            self.Game = Game
+        self.assets.wait()
+        profiler.mark('assets loaded')
+        profiler.report('background loading')
+        profiler.remove_import_hook()
+
+    def new_game(self):
+        self.stop_simulation()
+        if self.connect is not None:
+            from net import GameClient
+            self.rewind = None
+            game = GameClient(self.settings, self.connect, self.sound_manager)
+        else:
+            from snapshot import RewindBuffer
+            if self.Game is None:
+                from game import Game
+                self.Game = Game
+            self.rewind = RewindBuffer()
+            game = self.Game(self.settings, self.sound_manager)
+            if self.settings.pipeline:
+                from pipeline import SimulationThread
+                self.sim = SimulationThread(game, self.record_rewind)
+        self.quality.apply(game)
+        return game
+
+    def stop_simulation(self):
+        if self.sim is not None:
+            self.sim.stop()
+            self.sim = None
+
+    def on_simulation(self, fn):
+        # Game state is owned by the simulation thread while it runs
+        if self.sim is not None:
+            self.sim.call(fn)
+        else:
+            fn(self.game)
+
+    def record_rewind(self, game):
+        if not game.game_over:
+            self.rewind.record(game)
+
+    def quick_save(self, game):
+        from snapshot import save
+        # Written next to the old save and swapped in, so a crash mid-write keeps it
+        temp_file = QUICKSAVE_FILE + '.tmp'
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(save(game))
+            os.replace(temp_file, QUICKSAVE_FILE)
+        except OSError:
+            print("Error saving quicksave")
+
+    def quick_load(self, game):
+        from snapshot import restore
+        try:
+            with open(QUICKSAVE_FILE, 'rb') as f:
+                restore(game, f.read())
+            self.rewind.clear()
+        except (OSError, ValueError) as e:
+            print(f"Error loading quicksave: {e}")
 
     def handle_events(self):
-        for event in pygame.event.get():
+        # Gameplay controls were already taken from these by the input buffer
+        for event in self.input.take_events():
             if event.type == pygame.QUIT:
                 return False
-            
+            if event.type == pygame.WINDOWSIZECHANGED:
+                self.renderer.resize((event.x, event.y))
+                continue
+
             if self.state == 'title':
                 self.menu.handle_input(event)
             elif self.state == 'game':
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     self.state = 'title'
+                    self.stop_simulation()
+                    if self.connect is not None and self.game is not None:
+                        self.game.close()
                     self.game = None
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.show_stats = not self.show_stats
+                elif self.game is None or self.rewind is None:
+                    continue
                 elif event.type == pygame.KEYDOWN and event.key == pygame.K_r and self.game.game_over:
-                    self.game = Game(self.settings, self.sound_manager)
+                    self.game = self.new_game()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                    self.on_simulation(self.quick_save)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                    self.on_simulation(self.quick_load)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_BACKSPACE:
+                    self.on_simulation(lambda game: self.rewind.rewind(game, REWIND_FRAMES))
         return True
 
+    def draw_stats(self):
+        text = f"{self.clock.get_fps():.0f} FPS"
+        latency = self.input.latency_stats()
+        if latency is not None:
+            text += f", input {latency[0]} ms (p95 {latency[1]} ms)"
+        stats_text = self.renderer.text(get_font(20), text, GRAY)
+        self.renderer.blit(stats_text, stats_text.get_rect(bottomright=(config.width - 10, config.height - 10)))
+
     def run(self):
         running = True
+        frame_start = time.perf_counter()
+        next_frame = pygame.time.get_ticks()
         while running:
-            self.clock.tick(FPS)
-            
+            # Sleep until the next frame while stamping input as it arrives
+            next_frame += 1000 / FPS
+            self.input.wait(next_frame)
+            next_frame = max(next_frame, pygame.time.get_ticks() - 1000 / FPS)  # Don't race to catch up
+            # A stall shouldn't move everything one huge step at once
+            dt_ms = min(self.clock.tick(), MAX_FRAME_MS)
+            work_start = time.perf_counter()
+
             running = self.handle_events()
-            
+            self.assets.update()
+            controls = self.input.tick()
+
             # Update and draw
             if self.state == 'title':
-                self.menu.draw(self.screen)
+                self.menu.draw(self.renderer)
             elif self.state == 'game':
                 if self.game is None:
-                    self.game = Game(self.settings, self.sound_manager)
-                self.game.update()
-                self.game.draw(self.screen)
+                    self.game = self.new_game()
+                if self.sim is not None:
+                    # Hand this frame's input to the worker and draw the last finished tick
+                    dx, dy, shooting, target, trigger = controls
+                    self.sim.submit(dx, dy, shooting, target, dt_ms, trigger)
+                    self.sim.draw(self.renderer)
+                elif self.connect is not None:
+                    self.game.update(controls)
+                    self.game.draw(self.renderer)
+                else:
+                    self.game.update(controls, dt_ms)
+                    self.record_rewind(self.game)
+                    self.game.draw(self.renderer)
+                if self.show_stats:
+                    self.draw_stats()
+
+            self.renderer.present()
+            self.input.presented(1 if self.sim is not None else 0)
 
-            pygame.display.flip()
+            # Frame-to-frame time as the player sees it
+            now = time.perf_counter()
+            frame_ms = (now - frame_start) * 1000
+            frame_start = now
+            self.frame_stats.add(frame_ms)
+            # The governor only sees the work, not the wait for the next frame
+            if self.quality.add_frame((now - work_start) * 1000) and self.game is not None:
+                self.quality.apply(self.game)
+            if self.diagnostics.add_frame(frame_ms, self.game):
+                # Leave the time spent sampling out of the next frame's time and dt
+                frame_start = time.perf_counter()
+                self.clock.tick()
+            self.gc.update(self.game)
 
+        self.stop_simulation()
+        telemetry.stop()
+        self.diagnostics.stop()
+        self.gc.stop()
+        self.assets.shutdown()
         pygame.quit()
         sys.exit()
 
+def parse_address(text, default_host):
+    from net import DEFAULT_PORT
+    host, sep, port = text.rpartition(':')
+    if not sep:
+        return (default_host, int(text)) if text.isdigit() else (text, DEFAULT_PORT)
+    return (host or default_host, int(port))
+
 if __name__ == "__main__":
-    game = GameManager()
-    game.run()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Top-Down Shooter")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print import and initialization times')
+    parser.add_argument('--server', metavar='[HOST]:PORT',
+                        help='run a headless co-op server instead of the game')
+    parser.add_argument('--connect', metavar='HOST[:PORT]',
+                        help='play co-op on a server')
+    args = parser.parse_args()
+
+    if args.server:
+        from net import GameServer
+        server = GameServer(*parse_address(args.server, '0.0.0.0'))
+        print(f"Serving co-op on {server.address[0]}:{server.address[1]}")
+        server.serve_forever()
+    else:
+        connect = parse_address(args.connect, '127.0.0.1') if args.connect else None
+        game = GameManager(connect)
+        game.run()
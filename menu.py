@@ -1,6 +1,8 @@
 import sys
 import pygame
 from constants import *
+from display import config
+from renderer import get_font
 
 class Button:
     def __init__(self, x, y, width, height, text, action=None):
@@ -10,16 +12,16 @@ class Button:
         self.is_selected = False
         self.is_waiting_for_key = False
 
-    def draw(self, screen, font):
+    def draw(self, renderer, font):
         color = LIGHT_BLUE if self.is_selected else DARK_GRAY
         if self.is_waiting_for_key:
             color = YELLOW
-        pygame.draw.rect(screen, color, self.rect)
-        pygame.draw.rect(screen, WHITE, self.rect, 2)
+        renderer.fill_rect(color, self.rect)
+        renderer.fill_rect(WHITE, self.rect, 2)
 
-        text_surface = font.render(self.text, True, WHITE)
+        text_surface = renderer.text(font, self.text, WHITE)
         text_rect = text_surface.get_rect(center=self.rect.center)
-        screen.blit(text_surface, text_rect)
+        renderer.blit(text_surface, text_rect)
 
 class Slider:
     def __init__(self, x, y, width, height, value=0.5, text="Volume"):
@@ -29,20 +31,20 @@ class Slider:
         self.is_selected = False
         self.is_dragging = False
 
-    def draw(self, screen, font):
+    def draw(self, renderer, font):
         # Draw slider background
-        pygame.draw.rect(screen, DARK_GRAY, self.rect)
-        pygame.draw.rect(screen, WHITE, self.rect, 2)
+        renderer.fill_rect(DARK_GRAY, self.rect)
+        renderer.fill_rect(WHITE, self.rect, 2)
 
         # Draw slider position
         pos_x = self.rect.x + (self.rect.width * self.value)
         slider_handle = pygame.Rect(pos_x - 5, self.rect.y, 10, self.rect.height)
-        pygame.draw.rect(screen, LIGHT_BLUE if self.is_selected else WHITE, slider_handle)
+        renderer.fill_rect(LIGHT_BLUE if self.is_selected else WHITE, slider_handle)
 
         # Draw text
-        text_surface = font.render(f"{self.text}: {int(self.value * 100)}%", True, WHITE)
+        text_surface = renderer.text(font, f"{self.text}: {int(self.value * 100)}%", WHITE)
         text_rect = text_surface.get_rect(midleft=(self.rect.x, self.rect.y - 10))
-        screen.blit(text_surface, text_rect)
+        renderer.blit(text_surface, text_rect)
 
     def handle_mouse(self, pos):
         if self.is_dragging:
@@ -55,15 +57,15 @@ class Slider:
 class Menu:
     def __init__(self, game):
         self.game = game
-        self.font = pygame.font.Font(None, MENU_FONT_SIZE)
+        self.font = get_font(MENU_FONT_SIZE)
         self.state = 'title'  # 'title', 'settings', 'controls'
         self.selected_button = 0
         self.waiting_for_key = None
         self.create_buttons()
 
     def create_buttons(self):
-        center_x = SCREEN_WIDTH // 2
-        start_y = SCREEN_HEIGHT // 2 - 100
+        center_x = config.width // 2
+        start_y = config.height // 2 - 100
 
         self.title_buttons = [
             Button(center_x - BUTTON_WIDTH//2, start_y, 
@@ -127,7 +129,7 @@ class Menu:
                 self.handle_selection()
 
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = config.to_logical(pygame.mouse.get_pos())
             for i, button in enumerate(buttons):
                 if button.rect.collidepoint(mouse_pos):
                     self.selected_button = i
@@ -141,7 +143,7 @@ class Menu:
                     button.is_dragging = False
 
         elif event.type == pygame.MOUSEMOTION:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = config.to_logical(pygame.mouse.get_pos())
             for button in buttons:
                 if isinstance(button, Slider) and button.is_dragging:
                     button.handle_mouse(mouse_pos)
@@ -177,8 +179,8 @@ class Menu:
             else:
                 self.waiting_for_key = self.selected_button
 
-    def draw(self, screen):
-        screen.fill(BLACK)
+    def draw(self, renderer):
+        renderer.clear(BLACK)
         
         # Draw title
         title_text = "TOP-DOWN SHOOTER"
@@ -187,9 +189,9 @@ class Menu:
         elif self.state == 'controls':
             title_text = "CONTROLS"
         
-        title_surface = self.font.render(title_text, True, WHITE)
-        title_rect = title_surface.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        screen.blit(title_surface, title_rect)
+        title_surface = renderer.text(self.font, title_text, WHITE)
+        title_rect = title_surface.get_rect(center=(config.width // 2, 100))
+        renderer.blit(title_surface, title_rect)
 
         # Draw buttons
         buttons = self.get_current_buttons()
@@ -198,11 +200,15 @@ class Menu:
             if self.waiting_for_key is not None and i == self.waiting_for_key:
                 button.is_waiting_for_key = True
                 button.text = "Press any key..."
-            button.draw(screen, self.font)
+            button.draw(renderer, self.font)
 
-        if self.waiting_for_key is not None:
-            text = self.font.render("Press any key to bind...", True, WHITE)
-            text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, 50))
-            screen.blit(text, text_rect)
+        # Loading progress while assets stream in
+        if self.game.assets.loading:
+            bar = pygame.Rect(config.width // 2 - 100, config.height - 30, 200, 8)
+            renderer.fill_rect(DARK_GRAY, bar)
+            renderer.fill_rect(LIGHT_BLUE, (bar.x, bar.y, int(bar.width * self.game.assets.progress), bar.height))
 
-        pygame.display.flip()
\ No newline at end of file
+        if self.waiting_for_key is not None:
+            text = renderer.text(self.font, "Press any key to bind...", WHITE)
+            text_rect = text.get_rect(center=(config.width // 2, 50))
+            renderer.blit(text, text_rect)
\ No newline at end of file
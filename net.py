@@ -0,0 +1,498 @@
+import socket
+import struct
+import time
+import weakref
+from collections import deque
+import numpy as np
+import pygame
+from constants import *
+from display import config
+from game import Game, poll_controls
+from sprites import Player, Bullet
+from enemies import ENEMY_TYPE_IDS, ENEMY_CLASSES
+from powerups import PowerUp, POWERUP_TYPE_IDS, POWERUP_TYPES
+from effects import EffectManager
+from sounds import SilentSounds
+from renderer import get_font
+
+# LAN co-op over UDP. The server owns the only simulation; clients send
+# their controls every frame and get back per-client snapshots that are
+# quantized, delta-compressed against the last snapshot the client
+# acknowledged and limited to entities near that client's player.
+
+DEFAULT_PORT = 47800
+TICK_RATE = 30
+INTEREST_RADIUS = 420     # px around a client's player
+MAX_ENTITIES = 128        # per snapshot, nearest first; keeps a packet under ~1.3 KB
+MAX_EVENTS = 24           # particle triggers per snapshot
+HISTORY_TICKS = 64        # sent snapshots kept per client as delta baselines
+INTERP_TICKS = 2          # clients render this far behind the newest snapshot
+CLIENT_TIMEOUT = 5.0      # seconds without input before a client is dropped
+RESTART_DELAY = 5.0       # seconds between game over and a fresh game
+FIRST_ENTITY_ID = 256     # entity ids below this are reserved for players
+
+MSG_JOIN = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_LEAVE = 4
+MSG_SNAPSHOT = 5
+
+WELCOME = struct.Struct('<BHH')                  # type, player entity id, tick rate
+INPUT = struct.Struct('<BIIbbBhh')               # type, seq, acked tick, dx, dy, shoot, aim x, aim y
+SNAPSHOT = struct.Struct('<BIIIHBBHHHH')         # type, tick, baseline tick, score, wave, lives, flags,
+                                                 # own player id, entities, removals, events
+ENTITY = struct.Struct('<HBHHB')                 # id, kind, x, y, extra
+REMOVED = struct.Struct('<H')
+EVENT = struct.Struct('<IBHHBB')                 # seq, kind, x, y, color index, particle count
+
+FLAG_GAME_OVER = 1
+
+# Entity kinds: enemy type ids are used as-is
+KIND_BULLET = 10
+KIND_POWERUP = 20  # + power-up type id
+KIND_PLAYER = 30
+PLAYER_SHIELD = 1
+PLAYER_INVULNERABLE = 2
+
+EVENT_EXPLOSION = 1
+EVENT_HIT = 2
+EVENT_COLORS = [RED, GREEN, WHITE]
+
+# Positions are sent in 1/8 px steps with a margin for off-screen spawns
+QUANT = 8
+QUANT_OFFSET = 256
+
+def quantize(value):
+    return max(0, min(0xFFFF, int((value + QUANT_OFFSET) * QUANT + 0.5)))
+
+def dequantize(value):
+    return value / QUANT - QUANT_OFFSET
+
+class _ClientState:
+    def __init__(self, address, player, now):
+        self.address = address
+        self.player = player
+        self.controls = (0, 0, False, None)
+        self.shoot_latched = False
+        self.input_seq = 0
+        self.acked_tick = 0
+        self.last_heard = now
+        self.history = {}  # tick -> {entity id: record} as sent
+
+class GameServer:
+    # Authoritative co-op server; run serve_forever() or call tick() yourself
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, tick_rate=TICK_RATE, seed=None):
+        pygame.font.init()  # Power-up icons are built with a font, no display needed
+        self.tick_rate = tick_rate
+        self.seed = seed
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        self.clients = {}  # address -> _ClientState
+        self.ids = weakref.WeakKeyDictionary()  # sprite -> entity id
+        self.live_ids = set()  # ids of sprites that still exist
+        self.next_id = FIRST_ENTITY_ID
+        self.tick_count = 0
+        self.events = deque(maxlen=MAX_EVENTS * 4)  # (seq, tick, kind, qx, qy, color, count)
+        self.event_seq = 0
+        self.game_over_at = None
+        self.stats = {'ticks': 0, 'tick_time': 0.0, 'bytes_sent': 0, 'packets_sent': 0}
+        self.new_game()
+
+    def new_game(self):
+        # The server has no display and plays no sound; it only records effect triggers
+        self.game = Game(None, SilentSounds(), seed=self.seed)
+        self.game.effect_manager.enabled = False
+        self.game.effect_manager.event_log = []
+        # Enemy projectiles are not replicated yet, so co-op leaves out ranged enemies
+        spawner = self.game.enemy_spawner
+        spawner.enemy_types = [(cls, weight) for cls, weight in spawner.enemy_types if not cls.ranged]
+        spawner.total_weight = sum(weight for _, weight in spawner.enemy_types)
+        self.game_over_at = None
+        players = iter([self.game.player])
+        for client in self.clients.values():
+            client.player = next(players, None) or self.game.add_player()
+            client.history.clear()
+            client.acked_tick = 0
+
+    def entity_id(self, sprite):
+        # Players get ids from their own range; everything else wraps around
+        # the rest, skipping ids still held by live sprites
+        entity_id = self.ids.get(sprite)
+        if entity_id is None:
+            if isinstance(sprite, Player):
+                entity_id = next(i for i in range(1, FIRST_ENTITY_ID) if i not in self.live_ids)
+            else:
+                while self.next_id in self.live_ids:
+                    self.next_id = self.next_id + 1 if self.next_id < 0xFFFF else FIRST_ENTITY_ID
+                entity_id = self.next_id
+                self.next_id = self.next_id + 1 if self.next_id < 0xFFFF else FIRST_ENTITY_ID
+            self.ids[sprite] = entity_id
+            self.live_ids.add(entity_id)
+            weakref.finalize(sprite, self.live_ids.discard, entity_id)
+        return entity_id
+
+    # Networking
+
+    def poll(self, now):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                continue
+            if not data:
+                continue
+            kind = data[0]
+            if kind == MSG_JOIN:
+                self.join(address, now)
+            elif kind == MSG_INPUT and len(data) >= INPUT.size and address in self.clients:
+                _, seq, acked_tick, dx, dy, shoot, aim_x, aim_y = INPUT.unpack_from(data)
+                client = self.clients[address]
+                client.last_heard = now
+                if seq <= client.input_seq:
+                    continue  # Late or duplicated datagram
+                client.input_seq = seq
+                client.acked_tick = max(client.acked_tick, acked_tick)
+                client.controls = (max(-1, min(1, dx)), max(-1, min(1, dy)), bool(shoot), (aim_x, aim_y))
+                # Clicks shorter than a server tick still fire
+                client.shoot_latched = client.shoot_latched or bool(shoot)
+            elif kind == MSG_LEAVE and address in self.clients:
+                self.leave(address)
+
+    def join(self, address, now):
+        client = self.clients.get(address)
+        if client is None:
+            taken = {c.player for c in self.clients.values()}
+            player = self.game.player if self.game.player not in taken else self.game.add_player()
+            client = _ClientState(address, player, now)
+            self.clients[address] = client
+        self.send(address, WELCOME.pack(MSG_WELCOME, self.entity_id(client.player), self.tick_rate))
+
+    def leave(self, address):
+        client = self.clients.pop(address)
+        self.game.remove_player(client.player)
+
+    def send(self, address, data):
+        try:
+            self.sock.sendto(data, address)
+        except OSError:
+            return
+        self.stats['bytes_sent'] += len(data)
+        self.stats['packets_sent'] += 1
+
+    # Simulation
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        started = time.perf_counter()
+        self.poll(now)
+        for address in [a for a, c in self.clients.items() if now - c.last_heard > CLIENT_TIMEOUT]:
+            self.leave(address)
+        if not self.clients:
+            return
+
+        game = self.game
+        if game.game_over:
+            if self.game_over_at is None:
+                self.game_over_at = now
+            elif now - self.game_over_at > RESTART_DELAY:
+                self.new_game()
+        else:
+            inputs = []
+            for client in self.clients.values():
+                dx, dy, shoot, target = client.controls
+                if client.player in game.players:
+                    inputs.append((client.player, dx, dy, shoot or client.shoot_latched, target))
+                client.shoot_latched = False
+            game.step_players(inputs, 1000 / self.tick_rate)
+        self.tick_count += 1
+        self.collect_events()
+
+        scene = self.scene_entities()
+        for client in self.clients.values():
+            self.send(client.address, self.build_snapshot(client, scene))
+        self.stats['ticks'] += 1
+        self.stats['tick_time'] += time.perf_counter() - started
+
+    def collect_events(self):
+        log = self.game.effect_manager.event_log
+        for kind, pos, color, count in log:
+            self.event_seq += 1
+            color_index = EVENT_COLORS.index(color) if color in EVENT_COLORS else 0
+            self.events.append((self.event_seq, self.tick_count,
+                                EVENT_EXPLOSION if kind == 'explosion' else EVENT_HIT,
+                                quantize(pos[0]), quantize(pos[1]), color_index, min(255, count)))
+        log.clear()
+
+    def scene_entities(self):
+        # Every replicated sprite besides the players, its (kind, x, y, extra)
+        # record and one array of their positions; built once per tick and
+        # queried per client
+        game = self.game
+        sprites = game.enemies.sprites() + game.bullets.sprites() + game.powerups.sprites()
+        kinds = [ENEMY_TYPE_IDS[type(s)] for s in game.enemies]
+        kinds += [KIND_BULLET] * len(game.bullets)
+        kinds += [KIND_POWERUP + POWERUP_TYPE_IDS[s.type] for s in game.powerups]
+        extras = [max(0, min(255, getattr(s, 'health', 0))) for s in sprites]
+        positions = np.array([s.rect.center for s in sprites], dtype=np.float64).reshape(-1, 2)
+        # quantize() for the whole array at once
+        quantized = np.clip(((positions + QUANT_OFFSET) * QUANT + 0.5).astype(np.int64), 0, 0xFFFF).tolist()
+        records = [(kind, x, y, extra) for kind, (x, y), extra in zip(kinds, quantized, extras)]
+        return sprites, records, positions
+
+    def visible_entities(self, client, scene=None):
+        # Interest management: nearby entities only, nearest first, capped
+        game = self.game
+        sprites, scene_records, positions = scene or self.scene_entities()
+        center = pygame.math.Vector2(client.player.rect.center)
+        offsets = positions - (center.x, center.y)
+        distance_sq = np.einsum('ij,ij->i', offsets, offsets)
+        near = np.flatnonzero(distance_sq <= INTEREST_RADIUS * INTEREST_RADIUS)
+        if len(near) > MAX_ENTITIES:
+            near = near[np.argsort(distance_sq[near], kind='stable')[:MAX_ENTITIES]]
+
+        records = {}
+        for player in game.players:
+            extra = (PLAYER_SHIELD if player.has_shield else 0) | (PLAYER_INVULNERABLE if player.invulnerable else 0)
+            records[self.entity_id(player)] = (KIND_PLAYER, quantize(player.position.x),
+                                               quantize(player.position.y), extra)
+        for i in near.tolist():
+            records[self.entity_id(sprites[i])] = scene_records[i]
+        return records, center
+
+    def build_snapshot(self, client, scene=None):
+        records, center = self.visible_entities(client, scene)
+        baseline_tick = client.acked_tick if client.acked_tick in client.history else 0
+        baseline = client.history.get(baseline_tick, {})
+
+        changed = [(entity_id, record) for entity_id, record in records.items()
+                   if baseline.get(entity_id) != record]
+        removed = [entity_id for entity_id in baseline if entity_id not in records]
+
+        radius_sq = INTEREST_RADIUS * INTEREST_RADIUS
+        events = [
+            event for event in self.events
+            if event[1] > client.acked_tick
+            and (dequantize(event[3]) - center.x) ** 2 + (dequantize(event[4]) - center.y) ** 2 <= radius_sq
+        ][-MAX_EVENTS:]
+
+        game = self.game
+        player = client.player
+        parts = [SNAPSHOT.pack(
+            MSG_SNAPSHOT, self.tick_count, baseline_tick, game.score, game.wave,
+            player.lives if player in game.players else 0,
+            FLAG_GAME_OVER if game.game_over else 0,
+            self.entity_id(player), len(changed), len(removed), len(events)
+        )]
+        parts.extend(ENTITY.pack(entity_id, *record) for entity_id, record in changed)
+        parts.extend(REMOVED.pack(entity_id) for entity_id in removed)
+        parts.extend(EVENT.pack(seq, kind, x, y, color, count) for seq, _, kind, x, y, color, count in events)
+
+        client.history[self.tick_count] = records
+        stale = self.tick_count - HISTORY_TICKS
+        for tick in [t for t in client.history if t < stale]:
+            del client.history[tick]
+        return b''.join(parts)
+
+    def serve_forever(self):
+        interval = 1.0 / self.tick_rate
+        next_tick = time.perf_counter()
+        try:
+            while True:
+                self.tick()
+                next_tick += interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        finally:
+            self.sock.close()
+
+class GameClient:
+    # Remote view of a server's game with the same update()/draw() interface as Game
+    def __init__(self, settings, server_address, sound_manager=None):
+        self.settings = settings
+        self.sound_manager = sound_manager or SilentSounds()
+        self.server_address = server_address
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        try:
+            # Connected, so datagrams from anyone but the server are dropped
+            self.sock.connect(server_address)
+        except OSError as e:
+            print(f"Error connecting to {server_address}: {e}")
+        self.player_id = None
+        self.tick_rate = TICK_RATE
+        self.input_seq = 0
+        self.last_join = None
+        self.states = {}  # tick -> {entity id: (kind, x, y, extra)}
+        self.latest_tick = 0
+        self.latest_received_at = 0.0
+        self.hud = (0, 1, 0)  # score, wave, lives
+        self.game_over = False
+        self.last_event_seq = 0
+        self.effect_manager = EffectManager()
+        self.images = {}
+        self.bytes_received = 0
+
+    @property
+    def score(self):
+        return self.hud[0]
+
+    def send(self, data):
+        try:
+            self.sock.send(data)
+        except OSError:
+            pass
+
+    def update(self, controls=None, now=None):
+        now = time.perf_counter() if now is None else now
+        if self.player_id is None and (self.last_join is None or now - self.last_join > 0.5):
+            self.last_join = now
+            self.send(bytes([MSG_JOIN]))
+        self.receive(now)
+        if self.player_id is not None:
+            dx, dy, shoot, target = controls[:4] if controls is not None else poll_controls(self.settings)
+            aim_x, aim_y = target if target is not None else (0, 0)
+            self.input_seq += 1
+            self.send(INPUT.pack(MSG_INPUT, self.input_seq, self.latest_tick, int(dx), int(dy),
+                                 1 if shoot else 0, int(aim_x), int(aim_y)))
+        self.effect_manager.update(now * 1000)
+
+    def receive(self, now):
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                continue
+            if not data:
+                continue
+            self.bytes_received += len(data)
+            if data[0] == MSG_WELCOME and len(data) >= WELCOME.size:
+                _, self.player_id, self.tick_rate = WELCOME.unpack_from(data)
+            elif data[0] == MSG_SNAPSHOT and len(data) >= SNAPSHOT.size:
+                self.apply_snapshot(data, now)
+
+    def apply_snapshot(self, data, now):
+        (_, tick, baseline_tick, score, wave, lives, flags, player_id,
+         n_changed, n_removed, n_events) = SNAPSHOT.unpack_from(data)
+        if tick <= self.latest_tick:
+            return  # Out of order
+        if SNAPSHOT.size + n_changed * ENTITY.size + n_removed * REMOVED.size + n_events * EVENT.size > len(data):
+            return  # Truncated
+        if baseline_tick and baseline_tick not in self.states:
+            return  # Baseline already discarded; the server falls back to our newer acks
+
+        state = dict(self.states.get(baseline_tick, {}))
+        offset = SNAPSHOT.size
+        for _ in range(n_changed):
+            entity_id, kind, x, y, extra = ENTITY.unpack_from(data, offset)
+            state[entity_id] = (kind, dequantize(x), dequantize(y), extra)
+            offset += ENTITY.size
+        for _ in range(n_removed):
+            (entity_id,) = REMOVED.unpack_from(data, offset)
+            state.pop(entity_id, None)
+            offset += REMOVED.size
+        for _ in range(n_events):
+            seq, kind, x, y, color, count = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            if seq <= self.last_event_seq:
+                continue
+            self.last_event_seq = seq
+            pos = (dequantize(x), dequantize(y))
+            if kind == EVENT_EXPLOSION:
+                self.effect_manager.create_explosion(pos, EVENT_COLORS[color], count)
+            else:
+                self.effect_manager.create_hit_effect(pos)
+
+        self.states[tick] = state
+        self.latest_tick = tick
+        self.latest_received_at = now
+        self.player_id = player_id
+        self.hud = (score, wave, lives)
+        self.game_over = bool(flags & FLAG_GAME_OVER)
+        for old in [t for t in self.states if t < tick - HISTORY_TICKS]:
+            del self.states[old]
+
+    def interpolated(self, now=None):
+        # Entity positions INTERP_TICKS behind the newest snapshot, blended
+        # between the two snapshots around that moment
+        if not self.states:
+            return {}
+        now = time.perf_counter() if now is None else now
+        render_tick = self.latest_tick + (now - self.latest_received_at) * self.tick_rate - INTERP_TICKS
+        ticks = sorted(self.states)
+        older = ticks[0]
+        newer = ticks[-1]
+        for tick in ticks:
+            if tick <= render_tick:
+                older = tick
+            else:
+                newer = tick
+                break
+        if newer <= older:
+            return self.states[older]
+        alpha = max(0.0, min(1.0, (render_tick - older) / (newer - older)))
+        before = self.states[older]
+        result = {}
+        for entity_id, (kind, x, y, extra) in self.states[newer].items():
+            previous = before.get(entity_id)
+            if previous is not None:
+                x = previous[1] + (x - previous[1]) * alpha
+                y = previous[2] + (y - previous[2]) * alpha
+            result[entity_id] = (kind, x, y, extra)
+        return result
+
+    def image_for(self, kind, extra):
+        key = (kind, extra) if kind == KIND_PLAYER else kind
+        image = self.images.get(key)
+        if image is None:
+            if kind == KIND_PLAYER:
+                player = Player()
+                image = player.shield_images['normal'] if extra & PLAYER_SHIELD else player.original_image
+            elif kind == KIND_BULLET:
+                image = Bullet((0, 0), (0, 0)).image
+            elif kind > KIND_POWERUP:
+                image = PowerUp((0, 0), POWERUP_TYPES[kind - KIND_POWERUP]).image
+            else:
+                image = ENEMY_CLASSES[kind](pos=(0, 0)).image
+            self.images[key] = image
+        return image
+
+    def draw(self, renderer):
+        renderer.clear(BLACK)
+        renderer.set_offset(self.effect_manager.shake_offset())
+        rect = pygame.Rect(0, 0, 0, 0)
+        for entity_id, (kind, x, y, extra) in self.interpolated().items():
+            image = self.image_for(kind, extra)
+            rect.size = image.get_size()
+            rect.center = (x, y)
+            renderer.blit(image, rect.move(renderer.offset))
+        self.effect_manager.draw(renderer)
+        renderer.set_offset((0, 0))
+
+        font = get_font(36)
+        score, wave, lives = self.hud
+        renderer.blit(renderer.text(font, f'Score: {score}', WHITE), (10, 10))
+        wave_text = renderer.text(font, f'Wave: {wave}', WHITE)
+        renderer.blit(wave_text, wave_text.get_rect(midtop=(config.width // 2, 10)))
+        start_x = config.width - 25 * 3 - 10
+        for i in range(lives):
+            renderer.fill_rect(RED, (start_x + 25 * i, 10, 20, 20))
+        if self.player_id is None:
+            text = renderer.text(font, f'Connecting to {self.server_address[0]}:{self.server_address[1]}...', WHITE)
+            renderer.blit(text, text.get_rect(center=config.center))
+        elif self.game_over:
+            text = renderer.text(font, f'Game Over! Wave {wave} - Score {score}', WHITE)
+            renderer.blit(text, text.get_rect(center=config.center))
+
+    def close(self):
+        if self.player_id is not None:
+            self.send(bytes([MSG_LEAVE]))
+        self.sock.close()
@@ -0,0 +1,69 @@
+import queue
+import threading
+from game import draw_render_state
+
+class SimulationThread:
+    # Runs Game.step on a worker thread one tick ahead of rendering.
+    # The main thread submits one input per frame and draws the most recent
+    # RenderState while the worker simulates the next tick. States are
+    # built fresh every tick, never modified afterwards, and published into
+    # two alternating slots, so the renderer never sees a half-built frame.
+    # Inputs and commands travel through a SimpleQueue and are applied in
+    # order, so gameplay is the same as stepping serially. An exception on
+    # the worker stops it and is raised again on the main thread.
+    def __init__(self, game, on_tick=None, timeout=5.0):
+        self.game = game
+        self.on_tick = on_tick  # Called on the worker after every step, e.g. to record rewind
+        self.timeout = timeout  # Longest wait for a tick before giving up
+        self.error = None
+        self.inputs = queue.SimpleQueue()
+        self.buffers = [game.render_state(), None]
+        self.front = 0
+        self.ready = threading.Semaphore(1)  # One token per published state
+        self.thread = threading.Thread(target=self.run, name='simulation', daemon=True)
+        self.thread.start()
+
+    def submit(self, dx, dy, shooting, target_pos, dt_ms, trigger=None):
+        self.inputs.put((dx, dy, shooting, target_pos, dt_ms, trigger))
+
+    def call(self, fn):
+        # Run fn(game) on the worker between ticks
+        self.inputs.put(fn)
+
+    def latest_state(self):
+        # Blocks until the tick before the newest submitted input is done
+        if not self.ready.acquire(timeout=self.timeout):
+            raise RuntimeError(f"Simulation thread gave no frame in {self.timeout} s")
+        if self.error is not None:
+            raise self.error
+        return self.buffers[self.front]
+
+    def draw(self, renderer):
+        draw_render_state(renderer, self.latest_state())
+
+    def run(self):
+        game = self.game
+        while True:
+            item = self.inputs.get()
+            if item is None:
+                break
+            try:
+                if callable(item):
+                    item(game)
+                    continue
+                game.step(*item)
+                if self.on_tick is not None:
+                    self.on_tick(game)
+                back = 1 - self.front
+                self.buffers[back] = game.render_state()
+            except Exception as e:
+                # Wake the renderer so it raises this instead of waiting forever
+                self.error = e
+                self.ready.release()
+                break
+            self.front = back
+            self.ready.release()
+
+    def stop(self):
+        self.inputs.put(None)
+        self.thread.join()
@@ -1,6 +1,11 @@
+import heapq
 import pygame
 import random
 from constants import *
+from display import config
+from renderer import get_font
+from asset_manager import assets
+from telemetry import telemetry
 
 class PowerUp(pygame.sprite.Sprite):
     TYPES = {
@@ -15,85 +20,169 @@ class PowerUp(pygame.sprite.Sprite):
         self.type = power_type
         self.props = self.TYPES[power_type]
         
-        # Create power-up appearance
-        self.image = pygame.Surface((30, 30))
-        self.image.fill(self.props['color'])
+        # Create power-up appearance, shared by every power-up of this type
+        self.image = assets.surface(f'powerup_{power_type}', self.create_image)
         self.rect = self.image.get_rect(center=pos)
         
+        self.start_time = None
+
+    def create_image(self):
+        image = pygame.Surface((30, 30))
+        image.fill(self.props['color'])
+        
         # Add symbol
-        font = pygame.font.Font(None, 25)
+        font = get_font(25)
         symbol = font.render(self.props['symbol'], True, BLACK)
         symbol_rect = symbol.get_rect(center=(15, 15))
-        self.image.blit(symbol, symbol_rect)
-        
-        self.start_time = None
+        image.blit(symbol, symbol_rect)
+        return image
 
     @staticmethod
-    def random_position():
-        x = random.randint(50, SCREEN_WIDTH - 50)
-        y = random.randint(50, SCREEN_HEIGHT - 50)
+    def random_position(rng=random):
+        x = rng.randint(50, config.width - 50)
+        y = rng.randint(50, config.height - 50)
         return (x, y)
 
+# Stable ids for observations and snapshots
+POWERUP_TYPE_IDS = {name: i + 1 for i, name in enumerate(PowerUp.TYPES)}
+POWERUP_TYPES = {type_id: name for name, type_id in POWERUP_TYPE_IDS.items()}
+
+# What each power-up does. Timed effects modify player attributes while any
+# of their stacks is active:
+#   speed         multiplier, compounded per stack
+#   shield        absorbs the next hit
+#   shot_pattern  extra shot angles in degrees
+# Picking up an effect that is already active follows its stacking policy:
+#   refresh  restart the timer
+#   extend   add the duration to what is left, up to max_duration
+#   stack    add another stack up to max_stacks, then refresh the oldest
+EFFECTS = {
+    'speed': {'modifiers': {'speed': 1.5}, 'stacking': 'stack', 'max_stacks': 2},
+    'shield': {'modifiers': {'shield': True}, 'stacking': 'refresh'},
+    'spread_shot': {'modifiers': {'shot_pattern': (-15, 15)}, 'stacking': 'extend', 'max_duration': 20000},
+    'health': {'instant': {'lives': 1}, 'max_lives': 3},
+}
+
 class PowerUpManager:
     def __init__(self, game):
         self.game = game
-        self.powerup_group = pygame.sprite.Group()
-        self.active_effects = {}
+        self.powerup_group = game.powerups  # Drawn and collided by Game
+        self.active_effects = {}  # effect type -> list of stacks {'start_time', 'duration'}
+        self.expirations = []  # Min-heap of (expires at, sequence, effect type, stack)
+        self.sequence = 0
         self.spawn_timer = 0
         self.spawn_interval = 10000  # 10 seconds
 
     def update(self):
-        current_time = pygame.time.get_ticks()
+        current_time = self.game.time
         
         # Spawn new power-ups
         if current_time - self.spawn_timer > self.spawn_interval:
             self.spawn_timer = current_time
             if len(self.powerup_group) < 3:  # Maximum 3 power-ups at once
-                power_type = random.choice(list(PowerUp.TYPES.keys()))
-                pos = PowerUp.random_position()
+                power_type = self.game.rng.choice(list(PowerUp.TYPES.keys()))
+                pos = PowerUp.random_position(self.game.rng)
                 self.powerup_group.add(PowerUp(pos, power_type))
 
-        # Update active effects
-        for effect_type in list(self.active_effects.keys()):
-            effect_data = self.active_effects[effect_type]
-            if current_time - effect_data['start_time'] > effect_data['duration']:
-                self.remove_effect(effect_type)
+        # Expire effects; only heap entries that are due are touched
+        expirations = self.expirations
+        while expirations and expirations[0][0] < current_time:
+            expires_at, _, effect_type, stack = heapq.heappop(expirations)
+            stacks = self.active_effects.get(effect_type)
+            # Refreshed or extended stacks left a stale entry behind. Stacks
+            # are matched by identity: two picked up on one tick compare equal
+            if stacks and any(s is stack for s in stacks) and \
+                    stack['start_time'] + stack['duration'] == expires_at:
+                self.remove_stack(effect_type, stack)
+
+    def schedule(self, effect_type, stack):
+        self.sequence += 1
+        heapq.heappush(self.expirations,
+                       (stack['start_time'] + stack['duration'], self.sequence, effect_type, stack))
+
+    def collect_powerup(self, powerup, player=None):
+        player = player or self.game.player
+        telemetry.emit('powerup', powerup.type, self.game.wave)
+        effect = EFFECTS[powerup.type]
+        if 'instant' in effect:
+            lives = effect['instant'].get('lives', 0)
+            player.lives = max(player.lives, min(effect['max_lives'], player.lives + lives))
+        else:
+            self.add_effect(powerup.type, powerup.props['duration'])
 
-    def collect_powerup(self, powerup):
-        if powerup.type == 'health':
-            if self.game.player.lives < 3:
-                self.game.player.lives += 1
+    def add_effect(self, effect_type, duration):
+        effect = EFFECTS[effect_type]
+        now = self.game.time
+        stacks = self.active_effects.setdefault(effect_type, [])
+        policy = effect['stacking']
+        if stacks and policy == 'extend':
+            stack = stacks[0]
+            remaining = stack['start_time'] + stack['duration'] - now
+            stack['start_time'] = now
+            stack['duration'] = min(effect.get('max_duration', duration * 2), remaining + duration)
+        elif stacks and (policy == 'refresh' or len(stacks) >= effect.get('max_stacks', 1)):
+            stack = min(stacks, key=lambda s: s['start_time'] + s['duration'])
+            stack['start_time'] = now
+            stack['duration'] = duration
         else:
-            self.active_effects[powerup.type] = {
-                'start_time': pygame.time.get_ticks(),
-                'duration': powerup.props['duration']
-            }
-            self.apply_effect(powerup.type)
+            stack = {'start_time': now, 'duration': duration}
+            stacks.append(stack)
+        self.schedule(effect_type, stack)
+        self.apply_effect(effect_type)
+
+    def remove_stack(self, effect_type, stack):
+        stacks = self.active_effects[effect_type]
+        stacks[:] = [s for s in stacks if s is not stack]
+        if not stacks:
+            del self.active_effects[effect_type]
+        self.apply_effect(effect_type)
 
     def apply_effect(self, effect_type):
-        if effect_type == 'speed':
-            self.game.player.speed = PLAYER_SPEED * 1.5
-        elif effect_type == 'shield':
-            self.game.player.has_shield = True
-        elif effect_type == 'spread_shot':
-            self.game.player.spread_shot = True
+        # Recompute only the attributes this effect modifies, so a shield
+        # spent on a hit is not restored by an unrelated pickup. Timed
+        # effects are shared by the whole co-op team.
+        for attribute in EFFECTS[effect_type]['modifiers']:
+            if attribute == 'speed':
+                speed = PLAYER_SPEED
+                for other, stacks in self.active_effects.items():
+                    speed *= EFFECTS[other]['modifiers'].get('speed', 1) ** len(stacks)
+                for player in self.game.players:
+                    player.speed = speed
+            elif attribute == 'shield':
+                shield = any('shield' in EFFECTS[other]['modifiers'] for other in self.active_effects)
+                for player in self.game.players:
+                    player.has_shield = shield
+            elif attribute == 'shot_pattern':
+                pattern = tuple(sorted({angle for other in self.active_effects
+                                        for angle in EFFECTS[other]['modifiers'].get('shot_pattern', ())}))
+                for player in self.game.players:
+                    player.shot_pattern = pattern
+                    player.spread_shot = bool(pattern)
 
-    def remove_effect(self, effect_type):
-        if effect_type == 'speed':
-            self.game.player.speed = PLAYER_SPEED
-        elif effect_type == 'shield':
-            self.game.player.has_shield = False
-        elif effect_type == 'spread_shot':
-            self.game.player.spread_shot = False
-        del self.active_effects[effect_type]
+    def restore_effects(self, records):
+        # records: (effect type, start time, duration) per stack, e.g. from a snapshot
+        self.active_effects = {}
+        self.expirations = []
+        for effect_type, start_time, duration in records:
+            stack = {'start_time': start_time, 'duration': duration}
+            self.active_effects.setdefault(effect_type, []).append(stack)
+            self.schedule(effect_type, stack)
+        # The shield may have been spent already, so it is restored as saved
+        shields = [player.has_shield for player in self.game.players]
+        for effect_type, effect in EFFECTS.items():
+            if 'modifiers' in effect:
+                self.apply_effect(effect_type)
+        for player, has_shield in zip(self.game.players, shields):
+            player.has_shield = has_shield
 
-    def draw_active_effects(self, screen):
-        x = 10
-        y = 40
-        for effect_type in self.active_effects:
-            effect_data = self.active_effects[effect_type]
-            remaining = effect_data['duration'] - (pygame.time.get_ticks() - effect_data['start_time'])
-            width = 100 * (remaining / PowerUp.TYPES[effect_type]['duration'])
-            
-            pygame.draw.rect(screen, PowerUp.TYPES[effect_type]['color'], (x, y, width, 10))
-            y += 15
\ No newline at end of file
+    def effect_bars(self):
+        # (color, bar width, extra stacks) per active effect, for the HUD
+        current_time = self.game.time
+        bars = []
+        for effect_type, stacks in self.active_effects.items():
+            stack = max(stacks, key=lambda s: s['start_time'] + s['duration'])
+            remaining = stack['start_time'] + stack['duration'] - current_time
+            bars.append((PowerUp.TYPES[effect_type]['color'],
+                         100 * max(0, remaining) / stack['duration'],
+                         len(stacks) - 1 if self.game.quality['hud_detail'] else 0))
+        return tuple(bars)
@@ -0,0 +1,93 @@
+import math
+import numpy as np
+import pygame
+from constants import *
+from display import config
+from asset_manager import assets
+
+def projectile_image():
+    def create():
+        size = ENEMY_PROJECTILE_RADIUS * 2
+        image = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(image, (255, 120, 40), (ENEMY_PROJECTILE_RADIUS, ENEMY_PROJECTILE_RADIUS),
+                           ENEMY_PROJECTILE_RADIUS)
+        return image
+    return assets.surface('enemy_projectile', create, alpha=True)
+
+class ProjectileEngine:
+    # Enemy bullets as preallocated position/velocity arrays instead of
+    # sprites. Live projectiles are packed at the front, so patterns are
+    # emitted with one slice assignment and moving, culling and collision
+    # are single vectorized passes. Emits past capacity are dropped.
+    def __init__(self, capacity=MAX_ENEMY_PROJECTILES):
+        self.capacity = capacity
+        self.positions = np.zeros((capacity, 2))
+        self.velocities = np.zeros((capacity, 2))
+        self.count = 0
+
+    def emit(self, origin, angles, speed=ENEMY_PROJECTILE_SPEED):
+        angles = np.asarray(angles, dtype=np.float64)
+        n = min(len(angles), self.capacity - self.count)
+        if n <= 0:
+            return
+        start = self.count
+        self.positions[start:start + n] = origin
+        self.velocities[start:start + n, 0] = np.cos(angles[:n]) * speed
+        self.velocities[start:start + n, 1] = np.sin(angles[:n]) * speed
+        self.count += n
+
+    def ring(self, origin, count, speed=ENEMY_PROJECTILE_SPEED, phase=0.0):
+        # Evenly spaced in every direction; advance phase between rings for a spiral
+        self.emit(origin, phase + np.arange(count) * (2 * math.pi / count), speed)
+
+    def aimed(self, origin, target, count, spread, speed=ENEMY_PROJECTILE_SPEED):
+        # A fan of `count` shots `spread` radians wide, centred on the target
+        base = math.atan2(target[1] - origin[1], target[0] - origin[0])
+        if count == 1:
+            self.emit(origin, (base,), speed)
+        else:
+            self.emit(origin, base + np.linspace(-spread / 2, spread / 2, count), speed)
+
+    def update(self, scale=1.0):
+        # scale: length of the tick in 60 FPS frames
+        n = self.count
+        if not n:
+            return
+        positions = self.positions[:n]
+        if scale == 1.0:
+            positions += self.velocities[:n]
+        else:
+            positions += self.velocities[:n] * scale
+
+        margin = ENEMY_PROJECTILE_RADIUS
+        inside = (positions > -margin) & (positions < (config.width + margin, config.height + margin))
+        if np.count_nonzero(inside) < inside.size:  # Cheaper than inside.all() on small arrays
+            self.compact(inside[:, 0] & inside[:, 1])
+
+    def compact(self, keep):
+        kept = int(np.count_nonzero(keep))
+        if kept < self.count:
+            self.positions[:kept] = self.positions[:self.count][keep]
+            self.velocities[:kept] = self.velocities[:self.count][keep]
+            self.count = kept
+
+    def collide_circle(self, center, radius):
+        # Removes and counts the projectiles touching a circle
+        n = self.count
+        if not n:
+            return 0
+        offsets = self.positions[:n] - center
+        offsets *= offsets
+        reach = radius + ENEMY_PROJECTILE_RADIUS
+        hit = offsets[:, 0] + offsets[:, 1] < reach * reach
+        hits = int(np.count_nonzero(hit))
+        if hits:
+            self.compact(~hit)
+        return hits
+
+    def clear(self):
+        self.count = 0
+
+    def draw_positions(self):
+        # Top-left corners of the live projectiles, as a new array
+        return (self.positions[:self.count] - ENEMY_PROJECTILE_RADIUS).astype(np.int32)
@@ -0,0 +1,90 @@
+from constants import *
+from telemetry import telemetry
+
+# Detail levels from best to cheapest:
+#   particles           fraction of particles spawned per effect
+#   lifetime            particle lifetime multiplier
+#   shake               screen shake intensity multiplier
+#   hud_detail          draw power-up stack pips
+#   offscreen_interval  off-screen enemies move every Nth tick, in bigger steps
+QUALITY_LEVELS = [
+    {'name': 'high', 'particles': 1.0, 'lifetime': 1.0, 'shake': 1.0, 'hud_detail': True, 'offscreen_interval': 1},
+    {'name': 'medium', 'particles': 0.6, 'lifetime': 0.8, 'shake': 0.7, 'hud_detail': True, 'offscreen_interval': 2},
+    {'name': 'low', 'particles': 0.3, 'lifetime': 0.6, 'shake': 0.4, 'hud_detail': False, 'offscreen_interval': 3},
+    {'name': 'minimal', 'particles': 0.1, 'lifetime': 0.5, 'shake': 0.0, 'hud_detail': False, 'offscreen_interval': 4},
+]
+
+class QualityGovernor:
+    # Watches frame work times and moves between QUALITY_LEVELS to stay
+    # inside the frame budget. It degrades as soon as one window's p95 is
+    # over budget, but only recovers after several calm windows in a row.
+    # A level that could not hold after a recovery needs twice as many calm
+    # windows before it is tried again, so the governor settles instead of
+    # bouncing between two levels.
+    def __init__(self, budget_ms=1000 / FPS, window=30, degrade_at=0.9, recover_at=0.5, recover_windows=4,
+                 max_recover_windows=256):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.degrade_at = degrade_at
+        self.recover_at = recover_at
+        self.recover_windows = recover_windows
+        self.max_recover_windows = max_recover_windows
+        self.level = 0
+        self.samples = []
+        self.calm_windows = 0
+        self.last_p95 = 0.0
+        self.enabled = True
+        self.needed = {}  # Calm windows needed before recovering to a level that failed before
+        self.trial = None  # Level just recovered to, until it has held for recover_windows
+        self.trial_windows = 0
+
+    @property
+    def current(self):
+        return QUALITY_LEVELS[self.level]
+
+    def add_frame(self, frame_ms):
+        # Returns True when the level changed
+        if not self.enabled:
+            return False
+        self.samples.append(frame_ms)
+        if len(self.samples) < self.window:
+            return False
+        samples = sorted(self.samples)
+        self.samples = []
+        self.last_p95 = samples[int(len(samples) * 0.95)]
+
+        if self.last_p95 > self.budget_ms * self.degrade_at:
+            self.calm_windows = 0
+            if self.trial == self.level:
+                # The recovery failed: wait longer before trying this level again
+                needed = self.needed.get(self.level, self.recover_windows)
+                self.needed[self.level] = min(needed * 2, self.max_recover_windows)
+            self.trial = None
+            if self.level < len(QUALITY_LEVELS) - 1:
+                return self.set_level(self.level + 1)
+            return False
+
+        if self.trial is not None:
+            self.trial_windows += 1
+            if self.trial_windows >= self.recover_windows:
+                self.trial = None
+        if self.last_p95 < self.budget_ms * self.recover_at:
+            self.calm_windows += 1
+            needed = self.needed.get(self.level - 1, self.recover_windows)
+            if self.calm_windows >= needed and self.level > 0:
+                self.calm_windows = 0
+                self.trial = self.level - 1
+                self.trial_windows = 0
+                return self.set_level(self.level - 1)
+        else:
+            self.calm_windows = 0
+        return False
+
+    def set_level(self, level):
+        self.level = level
+        telemetry.emit('quality', self.current['name'], round(self.last_p95, 3))
+        return True
+
+    def apply(self, game):
+        game.quality = self.current
+        game.effect_manager.quality = self.current
@@ -0,0 +1,182 @@
+import weakref
+from functools import lru_cache
+import pygame
+from constants import *
+
+@lru_cache(maxsize=None)
+def get_font(size):
+    # Fonts are shared instead of being rebuilt by every Game, Menu and PowerUp
+    return pygame.font.Font(None, size)
+
+class SurfaceRenderer:
+    # Default backend: software blits onto the display surface.
+    # When the window is larger than the render resolution, frames are drawn
+    # to an internal surface and upscaled by an integer factor into a cached
+    # subsurface of the window, so no Surface is allocated per frame.
+    def __init__(self, display, caption):
+        self.display = display
+        pygame.display.set_caption(caption)
+        self.offset = (0, 0)
+        self.text_cache = {}
+        self.resize(display.window_size)
+
+    def resize(self, window_size):
+        if getattr(self, 'window', None) is not None and tuple(window_size) == self.display.window_size:
+            return
+        self.display.set_window_size(window_size)
+        self.window = pygame.display.set_mode(self.display.window_size, pygame.RESIZABLE)
+        self.window.fill(BLACK)
+        if self.display.scale == 1 and self.display.viewport.topleft == (0, 0):
+            self.screen = self.window
+            self.target = None
+        else:
+            self.screen = pygame.Surface(self.display.size).convert()
+            self.target = self.window.subsurface(self.display.viewport)
+
+    def set_offset(self, offset):
+        self.offset = offset
+
+    def clear(self, color):
+        self.screen.fill(color)
+
+    def text(self, font, text, color):
+        key = (id(font), text, color)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            if len(self.text_cache) > 256:
+                self.text_cache.clear()
+            surface = font.render(text, True, color)
+            self.text_cache[key] = surface
+        return surface
+
+    def blit(self, image, dest):
+        self.screen.blit(image, dest)
+
+    def draw_images(self, items):
+        # items: (surface, rect) pairs
+        ox, oy = self.offset
+        if ox or oy:
+            self.screen.blits([(image, rect.move(ox, oy)) for image, rect in items], False)
+        else:
+            self.screen.blits(items, False)
+
+    def draw_points(self, image, points):
+        # The same image at many top-left positions, e.g. an (N, 2) array
+        ox, oy = self.offset
+        if ox or oy:
+            points = points + (ox, oy)
+        self.screen.blits([(image, p) for p in points.tolist()], False)
+
+    def fill_rect(self, color, rect, width=0):
+        pygame.draw.rect(self.screen, color, rect, width)
+
+    def draw_circle(self, color, center, radius):
+        ox, oy = self.offset
+        pygame.draw.circle(self.screen, color, (center[0] + ox, center[1] + oy), radius)
+
+    def present(self):
+        if self.target is not None:
+            pygame.transform.scale(self.screen, self.target.get_size(), self.target)
+        pygame.display.flip()
+
+class TextureRenderer:
+    # SDL renderer backend: every surface is uploaded once as a texture and
+    # drawn with batched texture copies, integer-scaled by SDL to the window
+    def __init__(self, display, caption, accelerated=-1):
+        from pygame._sdl2.video import Window, Renderer, Texture
+        self.Texture = Texture
+        self.display = display
+        self.window = Window(caption, size=display.window_size, resizable=True)
+        self.renderer = Renderer(self.window, accelerated=accelerated)
+        self.offset = (0, 0)
+        self.textures = weakref.WeakKeyDictionary()
+        self.text_cache = {}
+        self.resize(display.window_size)
+
+        # One white dot texture, tinted per particle
+        dot = pygame.Surface((PARTICLE_SIZE + 1, PARTICLE_SIZE + 1), pygame.SRCALPHA)
+        pygame.draw.circle(dot, WHITE, (PARTICLE_SIZE // 2, PARTICLE_SIZE // 2), PARTICLE_SIZE // 2)
+        self.dot = Texture.from_surface(self.renderer, dot)
+
+    def resize(self, window_size):
+        self.display.set_window_size(window_size)
+        if tuple(self.window.size) != self.display.window_size:
+            self.window.size = self.display.window_size
+        scale = self.display.scale
+        viewport = self.display.viewport
+        # The viewport is expressed in scaled coordinates
+        self.renderer.scale = (scale, scale)
+        self.renderer.set_viewport((viewport.x // scale, viewport.y // scale,
+                                    self.display.width, self.display.height))
+
+    def set_offset(self, offset):
+        self.offset = offset
+
+    def texture_for(self, surface):
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = self.Texture.from_surface(self.renderer, surface)
+            self.textures[surface] = texture
+        return texture
+
+    def clear(self, color):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.clear()
+
+    def text(self, font, text, color):
+        key = (id(font), text, color)
+        texture = self.text_cache.get(key)
+        if texture is None:
+            if len(self.text_cache) > 256:
+                self.text_cache.clear()
+            texture = self.Texture.from_surface(self.renderer, font.render(text, True, color))
+            self.text_cache[key] = texture
+        return texture
+
+    def blit(self, image, dest):
+        if isinstance(image, pygame.Surface):
+            image = self.texture_for(image)
+        rect = image.get_rect()
+        rect.topleft = (dest[0], dest[1])
+        image.draw(dstrect=rect)
+
+    def draw_images(self, items):
+        ox, oy = self.offset
+        for image, rect in items:
+            self.texture_for(image).draw(dstrect=rect.move(ox, oy))
+
+    def draw_points(self, image, points):
+        ox, oy = self.offset
+        texture = self.texture_for(image)
+        w, h = image.get_size()
+        for x, y in points.tolist():
+            texture.draw(dstrect=(x + ox, y + oy, w, h))
+
+    def fill_rect(self, color, rect, width=0):
+        self.renderer.draw_color = pygame.Color(color)
+        if width:
+            # Outline as four thin filled rects, matching pygame.draw.rect
+            rect = pygame.Rect(rect)
+            self.renderer.fill_rect((rect.x, rect.y, rect.width, width))
+            self.renderer.fill_rect((rect.x, rect.bottom - width, rect.width, width))
+            self.renderer.fill_rect((rect.x, rect.y, width, rect.height))
+            self.renderer.fill_rect((rect.right - width, rect.y, width, rect.height))
+        else:
+            self.renderer.fill_rect(rect)
+
+    def draw_circle(self, color, center, radius):
+        ox, oy = self.offset
+        self.dot.color = color
+        size = radius * 2
+        self.dot.draw(dstrect=(center[0] + ox - radius, center[1] + oy - radius, size, size))
+
+    def present(self):
+        self.renderer.present()
+
+def create_renderer(name, display, caption):
+    if name in ('sdl2', 'sdl2-software'):
+        try:
+            return TextureRenderer(display, caption, accelerated=0 if name == 'sdl2-software' else -1)
+        except Exception as e:
+            print(f"Couldn't create {name} renderer ({e}), using software")
+    return SurfaceRenderer(display, caption)
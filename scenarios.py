@@ -0,0 +1,32 @@
+# Scripted game setups shared by bench.py and the tests
+
+def keep_alive(game, enemies=0):
+    # Top the enemy count up and keep every player invulnerable
+    while len(game.enemies) < enemies:
+        game.enemy_spawner.spawn_enemy()
+    for player in game.players:
+        player.invulnerable = True
+        player.invulnerable_timer = game.time
+
+def tunneling_hit_rate(swept, rate, seconds=60, enemies=6, seed=0):
+    # The player fires at the nearest FastEnemy, the smallest target, at a
+    # fixed tick rate. Returns (kills, shots).
+    import pygame
+    from game import Game
+    from sounds import SilentSounds
+    from enemies import FastEnemy
+    pygame.font.init()
+
+    game = Game(None, SilentSounds(), seed=seed)
+    game.swept_collisions = swept
+    game.enemy_spawner.enemy_types = [(FastEnemy, 1)]
+    game.enemy_spawner.total_weight = 1
+    shots = 0
+    while game.time < seconds * 1000:
+        keep_alive(game, enemies)
+        center = pygame.math.Vector2(game.player.rect.center)
+        target = min(game.enemies, key=lambda e: center.distance_squared_to(e.position))
+        last_shot = game.player.last_shot
+        game.step(0, 0, True, target.rect.center, 1000 / rate)
+        shots += game.player.last_shot != last_shot
+    return game.score // target.score_value, shots  # One hit each
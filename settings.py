@@ -1,13 +1,25 @@
 import json
 import os
 import pygame
-from constants import DEFAULT_CONTROLS
+from constants import DEFAULT_CONTROLS, SCREEN_WIDTH, SCREEN_HEIGHT
+
+MIN_RESOLUTION = (160, 120)
+MAX_RESOLUTION = (7680, 4320)
+MAX_WINDOW_SCALE = MAX_RESOLUTION[0] // MIN_RESOLUTION[0]
 
 class Settings:
     def __init__(self):
         self.filename = 'game_settings.json'
         self.controls = DEFAULT_CONTROLS.copy()
         self.sound_volume = 0.5
+        self.renderer = 'software'  # 'software', 'sdl2' or 'sdl2-software'
+        self.resolution = (SCREEN_WIDTH, SCREEN_HEIGHT)  # Internal render resolution
+        self.window_scale = 1  # Integer window multiple, 0 to fit the desktop
+        self.telemetry = False  # Write gameplay events to telemetry/*.ndjson
+        self.quality = 'auto'  # 'auto' or a fixed level: 'high', 'medium', 'low', 'minimal'
+        self.pipeline = False  # Simulate on a worker thread while the last tick is drawn
+        self.diagnostics = False  # Track live objects, memory and GC pauses in diagnostics/
+        self.gc_mode = 'default'  # 'default', 'tuned' or 'wave' (collect only between waves)
         self.load_settings()
 
     def load_settings(self):
@@ -17,17 +29,66 @@ class Settings:
                     data = json.load(f)
                     self.controls = {k: int(v) for k, v in data.get('controls', DEFAULT_CONTROLS).items()}
                     self.sound_volume = float(data.get('sound_volume', 0.5))
+                    self.renderer = str(data.get('renderer', 'software'))
+                    self.resolution = self.parse_resolution(data.get('resolution'))
+                    self.window_scale = self.parse_window_scale(data.get('window_scale', 1))
+                    self.telemetry = bool(data.get('telemetry', False))
+                    self.quality = str(data.get('quality', 'auto'))
+                    self.pipeline = bool(data.get('pipeline', False))
+                    self.diagnostics = bool(data.get('diagnostics', False))
+                    self.gc_mode = str(data.get('gc_mode', 'default'))
         except:
             print("Error loading settings, using defaults")
             self.controls = DEFAULT_CONTROLS.copy()
             self.sound_volume = 0.5
+            self.renderer = 'software'
+            self.resolution = (SCREEN_WIDTH, SCREEN_HEIGHT)
+            self.window_scale = 1
+            self.telemetry = False
+            self.quality = 'auto'
+            self.pipeline = False
+            self.diagnostics = False
+            self.gc_mode = 'default'
+
+    def parse_resolution(self, value):
+        # Two whole numbers within sane bounds, or the default resolution
+        if value is None:
+            return (SCREEN_WIDTH, SCREEN_HEIGHT)
+        try:
+            width, height = value
+            if all(type(v) is int and low <= v <= high
+                   for v, low, high in zip((width, height), MIN_RESOLUTION, MAX_RESOLUTION)):
+                return (width, height)
+        except (TypeError, ValueError):
+            pass
+        print(f"Invalid resolution {value!r}, using {SCREEN_WIDTH}x{SCREEN_HEIGHT}")
+        return (SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    def parse_window_scale(self, value):
+        # A whole multiple, 0 to fit the desktop. Scales that don't fit the
+        # desktop are clamped again when the window opens.
+        if type(value) is int and 0 <= value <= MAX_WINDOW_SCALE:
+            return value
+        if type(value) is int and value > MAX_WINDOW_SCALE:
+            print(f"Window scale {value} is too large, fitting the desktop instead")
+            return 0
+        print(f"Invalid window scale {value!r}, using 1")
+        return 1
 
     def save_settings(self):
         try:
             with open(self.filename, 'w') as f:
                 json.dump({
                     'controls': self.controls,
-                    'sound_volume': self.sound_volume
+                    'sound_volume': self.sound_volume,
+                    'renderer': self.renderer,
+                    'resolution': list(self.resolution),
+                    'window_scale': self.window_scale,
+                    'telemetry': self.telemetry,
+                    'quality': self.quality,
+                    'pipeline': self.pipeline,
+                    'diagnostics': self.diagnostics,
+                    'gc_mode': self.gc_mode
                 }, f)
         except:
             print("Error saving settings")
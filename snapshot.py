@@ -0,0 +1,277 @@
+import struct
+from array import array
+from collections import deque
+import numpy as np
+import pygame
+from constants import *
+from sprites import Bullet
+from enemies import ENEMY_TYPE_IDS, ENEMY_CLASSES
+from powerups import PowerUp, POWERUP_TYPE_IDS, POWERUP_TYPES
+from effects import Particle
+
+# Binary snapshot of a Game, little-endian:
+#   header, game/player/system scalars, Mersenne Twister state, then one
+#   length-prefixed float64 table per entity kind. No pickle, so snapshots
+#   are safe to load from disk and cheap to build.
+SNAPSHOT_MAGIC = b'BBSN'
+SNAPSHOT_VERSION = 4  # v2 adds enemy firing state and enemy projectiles, v3 the tick count, v4 wave kills
+
+HEADER = struct.Struct('<4sH')
+STATE = struct.Struct(
+    '<d i i d d B'      # time, score, wave, last shot, wave timer, game over
+    'd d i d B B B d'   # player x, y, lives, speed, shield, spread, invulnerable, invulnerable timer
+    'd d d'             # spawn rate, spawner time, power-up spawn timer
+    'i i d'             # screen shake, shake intensity, effect time
+    'B d'               # has gauss_next, gauss_next
+)
+TICKS = struct.Struct('<q')  # v3: tick count, which staggers off-screen enemy updates
+WAVE_KILLS = struct.Struct('<i')  # v4: kills so far this wave, reported when the wave ends
+COUNT = struct.Struct('<I')
+RNG_WORDS = 625
+
+# Columns per entity record
+ENEMY_FIELDS = 7     # type id, x, y, health, angle, next shot, pattern (v1: first five)
+BULLET_FIELDS = 4    # x, y, vx, vy
+POWERUP_FIELDS = 3   # type id, x, y
+EFFECT_FIELDS = 3    # type id, start time, duration, one record per stack
+PARTICLE_FIELDS = 9  # x, y, vx, vy, r, g, b, lifetime, birth time
+# Projectiles: count, then the (count, 2) float64 position and velocity arrays
+
+def _pack_table(parts, values, fields):
+    table = array('d', values)
+    parts.append(COUNT.pack(len(table) // fields))
+    parts.append(table.tobytes())
+
+def _unpack_table(data, offset, fields):
+    (count,) = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    table = array('d')
+    end = offset + count * fields * table.itemsize
+    if end > len(data):
+        raise ValueError("Truncated snapshot")
+    table.frombytes(data[offset:end])
+    return table, end
+
+def save(game):
+    player = game.player
+    spawner = game.enemy_spawner
+    effects = game.effect_manager
+    version, mt_state, gauss_next = game.rng.getstate()
+
+    parts = [
+        HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+        STATE.pack(
+            game.time, game.score, game.wave, game.last_shot, game.wave_timer, game.game_over,
+            player.position.x, player.position.y, player.lives, player.speed,
+            player.has_shield, player.spread_shot, player.invulnerable, player.invulnerable_timer,
+            spawner.spawn_rate, spawner.time_elapsed, game.powerup_manager.spawn_timer,
+            effects.screen_shake, effects.screen_shake_intensity, effects.time,
+            gauss_next is not None, gauss_next or 0.0
+        ),
+        TICKS.pack(game.ticks),
+        WAVE_KILLS.pack(game.wave_kills),
+        array('I', mt_state).tobytes(),
+    ]
+
+    _pack_table(parts, [
+        v for e in game.enemies
+        for v in (ENEMY_TYPE_IDS[type(e)], e.position.x, e.position.y, e.health, getattr(e, 'angle', 0.0),
+                  getattr(e, 'next_shot', 0.0), getattr(e, 'pattern', 0))
+    ], ENEMY_FIELDS)
+    _pack_table(parts, [
+        v for b in game.bullets
+        for v in (b.position.x, b.position.y, b.velocity.x, b.velocity.y)
+    ], BULLET_FIELDS)
+    _pack_table(parts, [
+        v for p in game.powerups
+        for v in (POWERUP_TYPE_IDS[p.type], p.rect.centerx, p.rect.centery)
+    ], POWERUP_FIELDS)
+    _pack_table(parts, [
+        v for effect_type, stacks in game.powerup_manager.active_effects.items() for stack in stacks
+        for v in (POWERUP_TYPE_IDS[effect_type], stack['start_time'], stack['duration'])
+    ], EFFECT_FIELDS)
+    _pack_table(parts, [
+        v for p in effects.particles
+        for v in (p.pos.x, p.pos.y, p.velocity.x, p.velocity.y, *p.color, p.lifetime, p.birth_time)
+    ], PARTICLE_FIELDS)
+    projectiles = game.projectiles
+    parts.append(COUNT.pack(projectiles.count))
+    parts.append(projectiles.positions[:projectiles.count].tobytes())
+    parts.append(projectiles.velocities[:projectiles.count].tobytes())
+    return b''.join(parts)
+
+def restore(game, data):
+    # Everything is parsed before the game is touched, so a truncated or
+    # corrupt snapshot raises ValueError and leaves the game as it was
+    try:
+        parsed = _parse(data)
+    except (struct.error, KeyError, IndexError) as e:
+        raise ValueError(f"Corrupt snapshot: {e}") from e
+    (state, ticks, wave_kills, rng_state, enemies, bullets, powerups, effect_records, particles,
+     projectile_arrays) = parsed
+
+    (game.time, game.score, game.wave, game.last_shot, game.wave_timer, game_over,
+     x, y, lives, speed, has_shield, spread_shot, invulnerable, invulnerable_timer,
+     spawn_rate, spawner_time, powerup_timer,
+     shake, shake_intensity, effect_time,
+     has_gauss, gauss_next) = state
+    game.ticks = ticks
+    game.wave_kills = wave_kills
+    game.rng.setstate(rng_state)
+
+    game.game_over = bool(game_over)
+    player = game.player
+    player.position.update(x, y)
+    player.rect.center = player.position
+    player.lives = lives
+    player.speed = speed
+    player.has_shield = bool(has_shield)
+    player.spread_shot = bool(spread_shot)
+    player.invulnerable = bool(invulnerable)
+    player.invulnerable_timer = invulnerable_timer
+    player.image = player.original_image
+
+    game.enemy_spawner.spawn_rate = spawn_rate
+    game.enemy_spawner.time_elapsed = spawner_time
+    game.powerup_manager.spawn_timer = powerup_timer
+    effects = game.effect_manager
+    effects.screen_shake = shake
+    effects.screen_shake_intensity = shake_intensity
+    effects.time = effect_time
+
+    for group in (game.enemies, game.bullets, game.powerups):
+        for sprite in group:
+            sprite.kill()
+    game.enemies.add(enemies)
+    game.bullets.add(bullets)
+    game.all_sprites.add(enemies, bullets)
+    game.powerups.add(powerups)
+    game.powerup_manager.restore_effects(effect_records)
+    effects.particles = particles
+
+    projectiles = game.projectiles
+    projectiles.clear()
+    if projectile_arrays is not None:
+        positions, velocities = projectile_arrays
+        count = len(positions)
+        projectiles.positions[:count] = positions
+        projectiles.velocities[:count] = velocities
+        projectiles.count = count
+    return game
+
+def _parse(data):
+    magic, version = HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a game snapshot")
+    if not 1 <= version <= SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    offset = HEADER.size
+
+    state = STATE.unpack_from(data, offset)
+    offset += STATE.size
+    has_gauss, gauss_next = state[-2:]
+    ticks = 0
+    if version >= 3:
+        (ticks,) = TICKS.unpack_from(data, offset)
+        offset += TICKS.size
+    wave_kills = 0
+    if version >= 4:
+        (wave_kills,) = WAVE_KILLS.unpack_from(data, offset)
+        offset += WAVE_KILLS.size
+
+    mt_state = array('I')
+    end = offset + RNG_WORDS * mt_state.itemsize
+    if end > len(data):
+        raise ValueError("Truncated snapshot")
+    mt_state.frombytes(data[offset:end])
+    offset = end
+    rng_state = (3, tuple(mt_state), gauss_next if has_gauss else None)
+
+    enemy_fields = 5 if version == 1 else ENEMY_FIELDS
+    table, offset = _unpack_table(data, offset, enemy_fields)
+    enemies = []
+    for i in range(0, len(table), enemy_fields):
+        record = table[i:i + enemy_fields]
+        type_id, ex, ey, health, angle = record[:5]
+        enemy = ENEMY_CLASSES[int(type_id)](pos=(ex, ey))
+        enemy.health = int(health)
+        if hasattr(enemy, 'angle'):
+            enemy.angle = angle
+        if enemy.ranged and version >= 2:
+            enemy.next_shot = record[5]
+            enemy.pattern = int(record[6])
+        enemies.append(enemy)
+
+    table, offset = _unpack_table(data, offset, BULLET_FIELDS)
+    bullets = []
+    for i in range(0, len(table), BULLET_FIELDS):
+        bx, by, vx, vy = table[i:i + BULLET_FIELDS]
+        bullet = Bullet((bx, by), (bx, by))
+        bullet.velocity = pygame.math.Vector2(vx, vy)
+        bullets.append(bullet)
+
+    table, offset = _unpack_table(data, offset, POWERUP_FIELDS)
+    powerups = []
+    for i in range(0, len(table), POWERUP_FIELDS):
+        type_id, px, py = table[i:i + POWERUP_FIELDS]
+        powerups.append(PowerUp((int(px), int(py)), POWERUP_TYPES[int(type_id)]))
+
+    table, offset = _unpack_table(data, offset, EFFECT_FIELDS)
+    effect_records = [
+        (POWERUP_TYPES[int(table[i])], table[i + 1], table[i + 2])
+        for i in range(0, len(table), EFFECT_FIELDS)
+    ]
+
+    table, offset = _unpack_table(data, offset, PARTICLE_FIELDS)
+    particles = []
+    for i in range(0, len(table), PARTICLE_FIELDS):
+        px, py, vx, vy, r, g, b, lifetime, birth_time = table[i:i + PARTICLE_FIELDS]
+        particle = Particle((px, py), (r, g, b), 0, lifetime, birth_time)
+        particle.velocity.update(vx, vy)
+        particles.append(particle)
+
+    projectile_arrays = None
+    if version >= 2:
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        size = count * 2 * 8
+        if count > MAX_ENEMY_PROJECTILES or offset + 2 * size > len(data):
+            raise ValueError("Truncated snapshot")
+        positions = np.frombuffer(data, np.float64, count * 2, offset).reshape(count, 2)
+        offset += size
+        velocities = np.frombuffer(data, np.float64, count * 2, offset).reshape(count, 2)
+        projectile_arrays = (positions, velocities)
+    return state, ticks, wave_kills, rng_state, enemies, bullets, powerups, effect_records, particles, projectile_arrays
+
+def fork(game):
+    # An independent copy of a running game, e.g. to branch a simulation
+    from game import Game
+    copy = Game(game.settings, game.sound_manager)
+    copy.quality = game.quality
+    copy.effect_manager.quality = game.effect_manager.quality
+    return restore(copy, save(game))
+
+class RewindBuffer:
+    # Ring of the most recent snapshots, oldest dropped first
+    def __init__(self, capacity=FPS * 5, interval=1):
+        self.snapshots = deque(maxlen=capacity)
+        self.interval = interval
+        self.frame = 0
+
+    def record(self, game):
+        self.frame += 1
+        if self.frame % self.interval == 0:
+            self.snapshots.append(save(game))
+
+    def rewind(self, game, frames):
+        # Restore the state from about `frames` frames ago and forget everything newer
+        if not self.snapshots:
+            return False
+        steps = min(len(self.snapshots), max(1, frames // self.interval))
+        for _ in range(steps - 1):
+            self.snapshots.pop()
+        restore(game, self.snapshots.pop())
+        return True
+
+    def clear(self):
+        self.snapshots.clear()
@@ -1,34 +1,41 @@
 # sounds.py
-import pygame
-import os
+from asset_manager import assets
+
+SOUND_FILES = {
+    'shoot': 'laser.mp3',
+    'kill': 'ough.mp3',
+    'shield': 'shield.mp3'
+}
+
+class SilentSounds:
+    # For headless games (bots, servers) that never play audio
+    def play(self, sound_name):
+        pass
+
+    def set_volume(self, volume):
+        pass
 
 class SoundManager:
-    def __init__(self):
-        # Initialize the mixer
-        pygame.mixer.init()
-        
-        # Load sound effects
-        self.sounds = {
-            'shoot': self.load_sound('laser.mp3'),
-            'kill': self.load_sound('ough.mp3'),
-            'shield': self.load_sound('shield.mp3')
-        }
-        
-        # Set volume for all sounds
-        self.set_volume(0.3)
-    
-    def load_sound(self, filename):
-        try:
-            sound_path = os.path.join('assets', 'sounds', filename)
-            return pygame.mixer.Sound(sound_path)
-        except:
-            print(f"Couldn't load sound: {filename}")
-            # Return a dummy sound object that does nothing
-            return type('DummySound', (), {'play': lambda: None, 'set_volume': lambda x: None})()
-    
+    def __init__(self, volume=0.3, asset_manager=assets):
+        self.sounds = {}
+        self.volume = volume
+
+        # Sounds are decoded on the asset workers; play() is a no-op for a
+        # sound until it has arrived, and reloaded files replace it in place
+        for sound_name, filename in SOUND_FILES.items():
+            asset_manager.load_sound(f'sounds/{filename}',
+                                     on_load=lambda sound, name=sound_name: self.add_sound(name, sound))
+
+    def add_sound(self, sound_name, sound):
+        sound.set_volume(self.volume)
+        self.sounds[sound_name] = sound
+
     def play(self, sound_name):
-        self.sounds[sound_name].play()
-    
+        sound = self.sounds.get(sound_name)
+        if sound is not None:
+            sound.play()
+
     def set_volume(self, volume):
+        self.volume = volume
         for sound in self.sounds.values():
-            sound.set_volume(volume)
\ No newline at end of file
+            sound.set_volume(volume)
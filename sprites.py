@@ -1,6 +1,8 @@
 import pygame
 import math
 from constants import *
+from display import config
+from asset_manager import assets, solid_surface
 
 class Player(pygame.sprite.Sprite):
     def __init__(self):
@@ -8,8 +10,18 @@ class Player(pygame.sprite.Sprite):
         self.image = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
         self.image.fill(GREEN)
         self.original_image = self.image.copy()
+        self.flash_image = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
+        self.flash_image.fill(YELLOW)
+        # Shielded variants are built once so images are never mutated in place
+        self.shield_images = {}
+        for key, base in (('normal', self.original_image), ('flash', self.flash_image)):
+            shielded = base.copy()
+            pygame.draw.circle(shielded, LIGHT_BLUE,
+                             (PLAYER_SIZE // 2, PLAYER_SIZE // 2),
+                             PLAYER_SIZE // 2 + 2, 2)
+            self.shield_images[key] = shielded
         self.rect = self.image.get_rect()
-        self.rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.rect.center = config.center
         self.position = pygame.math.Vector2(self.rect.center)
         
         # Stats
@@ -17,6 +29,8 @@ class Player(pygame.sprite.Sprite):
         self.lives = 3
         self.has_shield = False
         self.spread_shot = False
+        self.shot_pattern = ()  # Extra shot angles in degrees, set by power-ups
+        self.last_shot = -SHOOT_DELAY
         
         # Invulnerability
         self.invulnerable = False
@@ -24,62 +38,58 @@ class Player(pygame.sprite.Sprite):
         self.invulnerable_duration = 2000
         self.flash_interval = 200
 
-    def move(self, dx: float, dy: float) -> None:
+    def move(self, dx: float, dy: float, scale: float = 1.0) -> None:
         if dx != 0 and dy != 0:
             # Normalize diagonal movement
             length = math.sqrt(dx * dx + dy * dy)
             dx /= length
             dy /= length
 
-        self.position.x += dx * self.speed
-        self.position.y += dy * self.speed
+        self.position.x += dx * self.speed * scale
+        self.position.y += dy * self.speed * scale
         
         # Keep player on screen
-        self.position.x = max(PLAYER_SIZE // 2, min(SCREEN_WIDTH - PLAYER_SIZE // 2, self.position.x))
-        self.position.y = max(PLAYER_SIZE // 2, min(SCREEN_HEIGHT - PLAYER_SIZE // 2, self.position.y))
+        self.position.x = max(PLAYER_SIZE // 2, min(config.width - PLAYER_SIZE // 2, self.position.x))
+        self.position.y = max(PLAYER_SIZE // 2, min(config.height - PLAYER_SIZE // 2, self.position.y))
         self.rect.center = self.position
 
-    def update(self):
-        current_time = pygame.time.get_ticks()
-        
+    def update(self, current_time):
         # Handle invulnerability
+        flashing = False
         if self.invulnerable:
             if current_time - self.invulnerable_timer > self.invulnerable_duration:
                 self.invulnerable = False
-                self.image = self.original_image
             else:
                 # Flash effect
-                if (current_time // self.flash_interval) % 2:
-                    self.image = self.original_image
-                else:
-                    self.image = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
-                    self.image.fill(YELLOW)
+                flashing = not (current_time // self.flash_interval) % 2
 
         # Shield visual effect
         if self.has_shield:
-            pygame.draw.circle(self.image, LIGHT_BLUE, 
-                             (PLAYER_SIZE // 2, PLAYER_SIZE // 2), 
-                             PLAYER_SIZE // 2 + 2, 2)
+            self.image = self.shield_images['flash' if flashing else 'normal']
+        else:
+            self.image = self.flash_image if flashing else self.original_image
 
-    def hit(self) -> bool:
+    def hit(self, current_time) -> bool:
         """Returns True if player dies from this hit"""
         if not self.invulnerable:
             self.lives -= 1
-            self.make_invulnerable()
+            self.make_invulnerable(current_time)
             return self.lives <= 0
         return False
 
-    def make_invulnerable(self):
+    def make_invulnerable(self, current_time):
         self.invulnerable = True
-        self.invulnerable_timer = pygame.time.get_ticks()
+        self.invulnerable_timer = current_time
 
 class Bullet(pygame.sprite.Sprite):
-    def __init__(self, start_pos, target_pos, angle_offset=0):
+    def __init__(self, start_pos, target_pos, angle_offset=0, late=0.0):
         super().__init__()
-        self.image = pygame.Surface((BULLET_SIZE, BULLET_SIZE))
-        self.image.fill(YELLOW)
+        self.late = late  # Part of the first tick that passed before it was fired, in 60 FPS frames
+        # All bullets look the same, so they share one surface
+        self.image = assets.surface('bullet', lambda: solid_surface((BULLET_SIZE, BULLET_SIZE), YELLOW))
         self.rect = self.image.get_rect()
         self.position = pygame.math.Vector2(start_pos)
+        self.previous = (self.position.x, self.position.y)  # Start of this tick's path, for swept collisions
         self.rect.center = self.position
 
         # Calculate direction with angle offset
@@ -97,10 +107,14 @@ class Bullet(pygame.sprite.Sprite):
 
         self.velocity = direction * BULLET_SPEED
 
-    def update(self):
-        self.position += self.velocity
-        self.rect.center = self.position
-        
-        # Kill if off screen
-        if not (0 <= self.position.x <= SCREEN_WIDTH and 0 <= self.position.y <= SCREEN_HEIGHT):
-            self.kill()
\ No newline at end of file
+    def update(self, scale=1.0):
+        # scale: length of the tick in 60 FPS frames
+        x, y = self.position
+        # Kill if it ended the last tick off screen, after its chance to hit on the way out
+        if not (0 <= x <= config.width and 0 <= y <= config.height):
+            self.kill()
+            return
+        self.previous = (x, y)
+        self.position += self.velocity * (scale - self.late)
+        self.late = 0.0
+        self.rect.center = self.position
\ No newline at end of file
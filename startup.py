@@ -0,0 +1,94 @@
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+class _TimingLoader:
+    # Wraps a module loader so exec_module is timed
+    def __init__(self, loader, profiler):
+        self.loader = loader
+        self.profiler = profiler
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        started = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Always list the game's own modules, other libraries only when slow
+            origin = getattr(module, '__file__', None) or ''
+            if elapsed >= self.profiler.slow_import or os.path.dirname(os.path.abspath(origin)) == self.profiler.root:
+                self.profiler.record(f'import {module.__name__}', started, elapsed)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+class _TimingFinder:
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        # Only time top-level modules, submodules are included in their parent
+        if '.' in fullname:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimingLoader(spec.loader, self.profiler)
+                return spec
+        return None
+
+class StartupProfiler:
+    # Records how long each import and initialization step takes, relative to launch
+    def __init__(self, enabled=False, slow_import=0.005):
+        self.enabled = enabled
+        self.slow_import = slow_import
+        self.root = os.path.dirname(os.path.abspath(__file__))
+        self.start = time.perf_counter()
+        self.records = []  # (name, started_at, elapsed, thread name)
+        self.finder = None
+
+    def install_import_hook(self):
+        if self.enabled and self.finder is None:
+            self.finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self.finder)
+
+    def remove_import_hook(self):
+        if self.finder is not None:
+            sys.meta_path.remove(self.finder)
+            self.finder = None
+
+    @contextmanager
+    def measure(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter() - started)
+
+    def record(self, name, started, elapsed):
+        self.records.append((name, started - self.start, elapsed,
+                             threading.current_thread().name))
+
+    def mark(self, name):
+        if self.enabled:
+            self.record(name, time.perf_counter(), 0.0)
+
+    def report(self, title):
+        if not self.enabled:
+            return
+        print(f"--- startup profile: {title} ---")
+        for name, started, elapsed, thread in sorted(self.records, key=lambda r: r[1]):
+            where = '' if thread == 'MainThread' else f'  [{thread}]'
+            print(f"{started * 1000:9.1f} ms  {elapsed * 1000:8.1f} ms  {name}{where}")
+        self.records = []
@@ -0,0 +1,156 @@
+import math
+import numpy as np
+
+SMALL_CROWD = 160  # Up to this many points, all pairs are checked directly
+SWEEP_CROWD = 16  # Up to this many, sweep_forces beats any numpy pass
+
+class NeighborGrid:
+    # Cell list over a set of points. Points are bucketed into square
+    # cells at least as wide as the query radius, so every neighbour of a
+    # point lies in the 3x3 block of cells around it. A query takes at most
+    # `per_cell` points from each of those cells, which bounds the work per
+    # point no matter how crowded a cell gets.
+    OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+    def __init__(self, cell_size, per_cell=8):
+        self.cell_size = cell_size
+        self.per_cell = per_cell
+
+    def build(self, positions):
+        cells = np.floor(positions / self.cell_size).astype(np.int64)
+        # Shift to non-negative cells with a border of one, so neighbour
+        # keys never wrap into another column
+        cells -= cells.min(axis=0) - 1
+        self.rows = int(cells[:, 1].max()) + 2
+        self.keys = cells[:, 0] * self.rows + cells[:, 1]
+        self.order = np.argsort(self.keys, kind='stable')
+        self.sorted_keys = self.keys[self.order]
+        # Dense start/end table per cell, unless the points are spread so far
+        # apart that it would dwarf the point count
+        cell_count = (int(cells[:, 0].max()) + 2) * self.rows
+        if cell_count <= 16 * len(positions) + 4096:
+            bounds = np.searchsorted(self.sorted_keys, np.arange(cell_count + 1))
+            self.starts = bounds[:-1]
+            self.ends = bounds[1:]
+        else:
+            self.starts = self.ends = None
+
+    def candidates(self):
+        # (n, 9 * per_cell) point indices near each point, -1 for empty slots
+        offsets = np.array([dx * self.rows + dy for dx, dy in self.OFFSETS])
+        neighbor_keys = self.keys[:, None] + offsets[None, :]
+        if self.starts is not None:
+            starts = self.starts[neighbor_keys]
+            ends = self.ends[neighbor_keys]
+        else:
+            starts = np.searchsorted(self.sorted_keys, neighbor_keys, 'left')
+            ends = np.searchsorted(self.sorted_keys, neighbor_keys, 'right')
+        # Each point starts its window at a different place in a crowded
+        # cell, so together they still see every pair there
+        counts = (ends - starts)[:, :, None]
+        steps = np.arange(self.per_cell)
+        valid = steps < counts
+        rotation = np.arange(len(self.keys))[:, None, None]
+        slots = starts[:, :, None] + (rotation + steps) % np.maximum(counts, 1)
+        found = self.order[np.where(valid, slots, 0)]
+        found[~valid] = -1
+        return found.reshape(len(self.keys), -1)
+
+def any_close(points, radius):
+    # Whether any two (x, y) points are closer than `radius`. A sweep along
+    # x in plain Python, cheaper than a numpy pass for the small, spread out
+    # crowds most ticks see.
+    points = sorted(points)
+    limit = radius * radius
+    count = len(points)
+    for i in range(count - 1):
+        x, y = points[i]
+        for j in range(i + 1, count):
+            dx = points[j][0] - x
+            if dx >= radius:
+                break
+            dy = points[j][1] - y
+            if dx * dx + dy * dy < limit:
+                return True
+    return False
+
+def sweep_forces(points, radius):
+    # separation_forces for a short list of (x, y) points, as the same sweep
+    # along x that any_close does. Returns a list of [x, y] pushes.
+    order = sorted(range(len(points)), key=points.__getitem__)
+    limit = radius * radius
+    forces = [[0.0, 0.0] for _ in points]
+    for a in range(len(order) - 1):
+        i = order[a]
+        x, y = points[i]
+        for b in range(a + 1, len(order)):
+            j = order[b]
+            dx = x - points[j][0]
+            if dx <= -radius:
+                break
+            dy = y - points[j][1]
+            dist2 = dx * dx + dy * dy
+            if dist2 >= limit:
+                continue
+            if dist2:
+                distance = math.sqrt(dist2)
+                weight = (radius - distance) / (radius * distance)
+                forces[i][0] += dx * weight
+                forces[i][1] += dy * weight
+                forces[j][0] -= dx * weight
+                forces[j][1] -= dy * weight
+            else:
+                # Same fixed per-point directions as separation_forces
+                weight = (radius - 1.0) / radius
+                for k in (i, j):
+                    forces[k][0] += math.cos(k * 2.39996) * weight
+                    forces[k][1] += math.sin(k * 2.39996) * weight
+    return forces
+
+def separation_forces(positions, radius, grid=None):
+    # Push apart every pair of points closer than `radius`, harder the more
+    # they overlap. Returns one (x, y) push per point.
+    count = len(positions)
+    if count < 2:
+        return np.zeros_like(positions)
+    x = positions[:, 0]
+    y = positions[:, 1]
+    if count <= SMALL_CROWD:
+        # Checking every pair is cheaper than building the grid
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        dist2 = dx * dx + dy * dy
+        near = dist2 < radius * radius
+        np.fill_diagonal(near, False)
+    else:
+        if grid is None:
+            grid = NeighborGrid(radius)
+        grid.build(positions)
+        neighbors = grid.candidates()
+
+        # Offsets to every candidate, then only the pairs that actually overlap
+        others = np.maximum(neighbors, 0)
+        dx = x[:, None] - x[others]
+        dy = y[:, None] - y[others]
+        dist2 = dx * dx + dy * dy
+        near = (neighbors >= 0) & (neighbors != np.arange(count)[:, None]) & (dist2 < radius * radius)
+    rows, cols = np.nonzero(near)
+    if not len(rows):
+        return np.zeros_like(positions)
+    dx = dx[rows, cols]
+    dy = dy[rows, cols]
+    distance = np.sqrt(dist2[rows, cols])
+
+    # Points exactly on top of each other separate along a fixed per-point direction
+    stacked = distance == 0
+    if stacked.any():
+        angle = rows[stacked] * 2.39996
+        dx[stacked] = np.cos(angle)
+        dy[stacked] = np.sin(angle)
+        distance[stacked] = 1.0
+
+    weight = (radius - distance) / (radius * distance)
+    forces = np.empty_like(positions)
+    forces[:, 0] = np.bincount(rows, dx * weight, minlength=count)
+    forces[:, 1] = np.bincount(rows, dy * weight, minlength=count)
+    return forces
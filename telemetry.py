@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+
+# Field names for each event kind, in the order emit() receives them
+EVENT_FIELDS = {
+    'session': ('renderer', 'resolution'),
+    'kill': ('enemy', 'x', 'y', 'wave'),
+    'player_hit': ('lives', 'wave'),
+    'death': ('wave', 'score', 'time_ms'),
+    'powerup': ('type', 'wave'),
+    'wave': ('wave', 'duration_ms', 'kills', 'score'),
+    'quality': ('level', 'p95_ms'),
+    'frames': ('count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'),
+    'input_latency': ('count', 'p50_ms', 'p95_ms', 'max_ms'),
+}
+
+class Telemetry:
+    # Structured gameplay events for per-session analytics.
+    # emit() only stores a tuple into a preallocated ring and never touches
+    # the disk; a background thread drains the ring in
+    # batches into rotating newline-delimited JSON files. If the writer
+    # falls a full ring behind, new events are dropped and counted.
+    def __init__(self, capacity=1 << 14, directory='telemetry', max_file_bytes=4 * 1024 * 1024,
+                 max_files=8, flush_interval=0.5):
+        self.enabled = False
+        self.capacity = capacity
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.slots = [None] * capacity
+        self.head = 0  # Next slot the game thread writes
+        self.tail = 0  # Next slot the writer reads
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.session = None
+        self.writer = None
+        self.stop_event = threading.Event()
+        self.file = None
+        self.file_index = 0
+        self.file_bytes = 0
+
+    def start(self, **session_info):
+        if self.enabled:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.session = time.strftime('%Y%m%d-%H%M%S') + f'-{os.getpid()}'
+            self.rotate()  # Opened here so an unwritable directory shows up now
+        except OSError as e:
+            print(f"Telemetry disabled: {e}")
+            return
+        self.enabled = True
+        self.stop_event.clear()
+        self.writer = threading.Thread(target=self.write_loop, name='telemetry', daemon=True)
+        self.writer.start()
+        self.emit('session', session_info.get('renderer'), session_info.get('resolution'))
+
+    def emit(self, kind, *values):
+        if not self.enabled:
+            return
+        # The lock only orders game threads (simulation and render in
+        # pipelined mode); the writer never takes it
+        with self.lock:
+            head = self.head
+            if head - self.tail >= self.capacity:
+                self.dropped += 1
+                return
+            self.slots[head % self.capacity] = (time.time(), kind, values)
+            self.head = head + 1
+
+    # Writer thread
+
+    def drain(self):
+        head = self.head
+        tail = self.tail
+        if head == tail:
+            return []
+        batch = []
+        for i in range(tail, head):
+            index = i % self.capacity
+            batch.append(self.slots[index])
+            self.slots[index] = None
+        self.tail = head
+        return batch
+
+    def write_batch(self, batch):
+        lines = []
+        for timestamp, kind, values in batch:
+            record = {'t': round(timestamp, 4), 'event': kind}
+            record.update(zip(EVENT_FIELDS.get(kind, ()), values))
+            lines.append(json.dumps(record, separators=(',', ':')))
+        if self.dropped:
+            lines.append(json.dumps({'t': round(time.time(), 4), 'event': 'dropped', 'count': self.dropped}))
+            self.dropped = 0
+        data = '\n'.join(lines) + '\n'
+        if self.file is None or self.file_bytes + len(data) > self.max_file_bytes:
+            self.rotate()
+        self.file.write(data)
+        self.file.flush()
+        self.file_bytes += len(data)
+
+    def rotate(self):
+        if self.file is not None:
+            self.file.close()
+        self.file_index += 1
+        path = os.path.join(self.directory, f'session-{self.session}-{self.file_index:03d}.ndjson')
+        self.file = open(path, 'w')
+        self.file_bytes = 0
+        # Keep only the newest files
+        files = sorted(f for f in os.listdir(self.directory) if f.endswith('.ndjson'))
+        for old in files[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass
+
+    def write_loop(self):
+        try:
+            while not self.stop_event.wait(self.flush_interval):
+                batch = self.drain()
+                if batch:
+                    self.write_batch(batch)
+            batch = self.drain()
+            if batch:
+                self.write_batch(batch)
+        except OSError as e:
+            print(f"Telemetry disabled: {e}")
+            self.enabled = False
+        finally:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.stop_event.set()
+        self.writer.join(timeout=2)
+
+class FrameStats:
+    # Collects frame times and emits a summary every `window` frames
+    def __init__(self, telemetry, window=120):
+        self.telemetry = telemetry
+        self.window = window
+        self.samples = []
+
+    def add(self, frame_ms):
+        if not self.telemetry.enabled:
+            return
+        self.samples.append(frame_ms)
+        if len(self.samples) >= self.window:
+            samples = sorted(self.samples)
+            n = len(samples)
+            self.telemetry.emit('frames', n, round(sum(samples) / n, 3),
+                                round(samples[n // 2], 3), round(samples[int(n * 0.95)], 3),
+                                round(samples[min(n - 1, int(n * 0.99))], 3), round(samples[-1], 3))
+            self.samples = []
+
+telemetry = Telemetry()
@@ -0,0 +1,64 @@
+import threading
+from asset_manager import AssetManager, solid_surface, surface_bytes
+
+def test_surfaces_evict_least_recently_used():
+    manager = AssetManager(memory_budget=3 * 10 * 10 * 4)
+    for key in 'abc':
+        manager.surface(key, lambda: solid_surface((10, 10), (255, 0, 0)))
+    manager.surface('a', None)  # Cached, so the factory isn't called
+    manager.surface('d', lambda: solid_surface((10, 10), (0, 255, 0)))
+    assert list(manager.cache) == ['c', 'a', 'd']
+
+def test_cache_stays_consistent_across_threads():
+    manager = AssetManager(memory_budget=20 * 8 * 8 * 4)
+
+    def build(offset):
+        for i in range(500):
+            manager.surface((offset + i) % 60, lambda: solid_surface((8, 8), (0, 0, 255)))
+
+    threads = [threading.Thread(target=build, args=(n * 7,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert manager.memory_used == sum(size for _, size in manager.cache.values())
+    assert manager.memory_used <= manager.memory_budget
+    assert all(surface_bytes(surface) == size for surface, size in manager.cache.values())
+
+def test_surfaces_still_in_use_are_not_evicted():
+    manager = AssetManager(memory_budget=2 * 10 * 10 * 4)
+    held = manager.surface('bullet', lambda: solid_surface((10, 10), (255, 255, 0)))
+    for key in 'abc':
+        manager.surface(key, lambda: solid_surface((10, 10), (255, 0, 0)))
+    assert manager.surface('bullet', None) is held
+    assert list(manager.cache) == ['c', 'bullet']
+
+def test_images_load_in_the_background_and_reload_on_change(tmp_path):
+    import os
+    import time
+    import pygame
+    path = tmp_path / 'sheet.png'
+    pygame.image.save(solid_surface((4, 4), (255, 0, 0)), str(path))
+    manager = AssetManager(root=str(tmp_path), watch_interval=0.02)
+    loaded = []
+    manager.load_image('sheet.png', alpha=True, on_load=loaded.append)
+    manager.wait()
+    manager.update()
+    assert len(loaded) == 1 and manager.get('sheet.png') is loaded[0]
+    assert loaded[0].get_at((0, 0)) == (255, 0, 0, 255)
+
+    manager.watch()
+    try:
+        time.sleep(0.1)  # Let the watcher take its first scan
+        pygame.image.save(solid_surface((4, 4), (0, 0, 255)), str(path))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        deadline = time.monotonic() + 5
+        while len(loaded) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+            manager.update()
+    finally:
+        manager.shutdown()
+    assert len(loaded) == 2
+    assert manager.get('sheet.png') is loaded[1]
+    assert loaded[1].get_at((0, 0)) == (0, 0, 255, 255)
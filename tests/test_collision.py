@@ -0,0 +1,31 @@
+from scenarios import tunneling_hit_rate
+
+def hit_rate(swept, rate):
+    kills, shots = tunneling_hit_rate(swept, rate, seconds=20)
+    return kills / shots
+
+def test_swept_hits_hold_up_at_coarse_tick_rates():
+    baseline = hit_rate(True, 60)
+    assert hit_rate(True, 15) >= baseline - 0.1
+    assert hit_rate(True, 10) >= baseline - 0.1
+    # Without sweeping, bullets skip over the same targets
+    assert hit_rate(False, 15) < baseline - 0.3
+
+def test_small_sweeps_agree_with_the_batched_path():
+    import numpy as np
+    from collision import swept_hits, SMALL_SWEEP
+    rng = np.random.default_rng(3)
+    boxes = rng.uniform(0, 200, (8, 2)).round()
+    boxes = np.hstack([boxes, boxes + 20])
+    starts = rng.uniform(-20, 220, (SMALL_SWEEP, 2)).round()
+    ends = starts + rng.uniform(-60, 60, (SMALL_SWEEP, 2)).round()
+    ends[:8, 0] = starts[:8, 0]  # Some segments only move along one axis
+    segments, firsts = swept_hits(starts, ends, boxes)
+    assert len(segments)
+    batched = dict(zip(segments.tolist(), firsts.tolist()))
+    small = {}
+    for s in range(len(starts)):
+        hit, first = swept_hits(starts[s:s + 1].tolist(), ends[s:s + 1].tolist(), boxes.tolist())
+        if hit:
+            small[s] = first[0]
+    assert small == batched
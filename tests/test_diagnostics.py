@@ -0,0 +1,17 @@
+import json
+from diagnostics import Diagnostics
+
+def test_sampled_frames_are_flagged_and_timed(tmp_path):
+    diagnostics = Diagnostics(directory=str(tmp_path), interval=3600, trace_frames=0)
+    diagnostics.start()
+    try:
+        assert diagnostics.add_frame(16.0) is False
+        diagnostics.next_sample = 0.0
+        assert diagnostics.add_frame(17.0) is True
+    finally:
+        diagnostics.stop()
+    [samples] = tmp_path.glob('samples-*.ndjson')
+    [record] = [json.loads(line) for line in samples.read_text().splitlines()]
+    assert record['frames']['max_ms'] == 17.0
+    assert record['sample_ms'] > 0
+    assert 'Sampling took' in next(tmp_path.glob('report-*.txt')).read_text()
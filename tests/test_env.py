@@ -0,0 +1,25 @@
+import numpy as np
+from env import ShooterEnv, VectorEnv
+
+def test_step_returns_independent_observations():
+    env = ShooterEnv(seed=3)
+    first = env.reset()
+    second, _, _, _ = env.step((1, 0, 1, 400, 0))
+    assert not np.array_equal(first, second)
+    assert first is not second and second is not env.obs
+
+def test_vector_env_matches_single_env():
+    vector = VectorEnv(2, seed=5)
+    single = ShooterEnv(seed=5)
+    obs = vector.reset()
+    assert np.array_equal(obs[0], single.reset())
+    rng = np.random.default_rng(0)
+    for _ in range(120):
+        actions = np.column_stack([rng.integers(-1, 2, (2, 2)), rng.random(2) < 0.5,
+                                   rng.uniform(0, 800, 2), rng.uniform(0, 600, 2)]).astype(np.float32)
+        obs, rewards, dones, _ = vector.step(actions)
+        expected, reward, done, _ = single.step(actions[0])
+        if done:
+            expected = single.reset()
+        assert np.array_equal(obs[0], expected)
+        assert rewards[0] == reward
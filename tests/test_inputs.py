@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+import pygame
+import pytest
+from constants import *
+from game import Game
+from inputs import InputBuffer
+from sounds import SilentSounds
+
+TICK_MS = 1000 / FPS
+
+def run_clicks(events, ticks):
+    # Feeds (time_ms, event type) mouse events through an InputBuffer into a
+    # game ticking at 60 FPS and returns the times shots were fired at
+    game = Game(None, SilentSounds(), seed=0)
+    game.player.last_shot = -SHOOT_DELAY
+    shots = []
+    game.shoot = lambda target_pos, player=None, late=0.0: shots.append(game.time - TICK_MS + late * 1000 / FPS)
+    buffer = InputBuffer(SimpleNamespace(controls=DEFAULT_CONTROLS))
+    buffer.tick_start = 0
+    events = sorted(events)
+    for tick in range(1, ticks + 1):
+        now = tick * TICK_MS
+        while events and events[0][0] <= now:
+            stamp, kind = events.pop(0)
+            buffer.add(pygame.event.Event(kind, button=pygame.BUTTON_LEFT, pos=(100, 100)), stamp)
+        game.player.invulnerable = True
+        game.player.invulnerable_timer = game.time
+        dx, dy, shooting, target, trigger = buffer.tick(now)
+        game.step(dx, dy, shooting, target or (0, 0), TICK_MS, trigger)
+    return shots
+
+def test_release_mid_tick_keeps_shots_due_before_it():
+    # Held from 10 ms and released at 215 ms, inside the tick the 210 ms shot falls in
+    shots = run_clicks([(10, pygame.MOUSEBUTTONDOWN), (215, pygame.MOUSEBUTTONUP)], 30)
+    assert shots == pytest.approx([10, 210])
+
+def test_click_shorter_than_a_tick_fires_at_its_time():
+    shots = run_clicks([(5, pygame.MOUSEBUTTONDOWN), (7, pygame.MOUSEBUTTONUP)], 10)
+    assert shots == pytest.approx([5])
+
+def test_no_shots_after_release():
+    shots = run_clicks([(10, pygame.MOUSEBUTTONDOWN), (150, pygame.MOUSEBUTTONUP)], 60)
+    assert shots == pytest.approx([10])
@@ -0,0 +1,71 @@
+from net import GameServer, FIRST_ENTITY_ID
+from sprites import Bullet
+
+def test_entity_ids_skip_live_ids_after_wrapping():
+    server = GameServer('127.0.0.1', 0, seed=0)
+    try:
+        player_id = server.entity_id(server.game.player)
+        survivor = Bullet((0, 0), (1, 0))
+        survivor_id = server.entity_id(survivor)
+        # Short-lived bullets free their ids, so allocation wraps all the way
+        # around and comes back to the survivor's id
+        ids = set()
+        for _ in range(0xFFFF - FIRST_ENTITY_ID + 2):
+            ids.add(server.entity_id(Bullet((0, 0), (1, 0))))
+        assert player_id < FIRST_ENTITY_ID
+        assert player_id not in ids
+        assert survivor_id not in ids
+        assert server.entity_id(survivor) == survivor_id
+    finally:
+        server.sock.close()
+
+def test_client_ignores_strangers_and_bad_packets():
+    import socket
+    import time
+    from net import GameClient, SNAPSHOT, MSG_SNAPSHOT, MSG_WELCOME, WELCOME
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    stranger = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    client = GameClient(None, server.getsockname())
+    try:
+        client.send(b'\x01')
+        _, client_address = server.recvfrom(64)
+        stranger.sendto(WELCOME.pack(MSG_WELCOME, 7, 30), client_address)
+        server.sendto(b'', client_address)
+        # Claims three changed entities but carries none
+        server.sendto(SNAPSHOT.pack(MSG_SNAPSHOT, 5, 0, 0, 1, 3, 0, 1, 3, 0, 0), client_address)
+        time.sleep(0.05)
+        client.receive(0.0)
+        assert client.player_id is None
+        assert client.latest_tick == 0
+    finally:
+        for sock in (server, stranger, client.sock):
+            sock.close()
+
+def test_visible_entities_are_the_nearest_in_range():
+    import random
+    from types import SimpleNamespace
+    from net import INTEREST_RADIUS, MAX_ENTITIES, quantize
+    from enemies import BasicEnemy
+    server = GameServer('127.0.0.1', 0, seed=0)
+    try:
+        game = server.game
+        rng = random.Random(1)
+        for _ in range(600):
+            enemy = BasicEnemy(pos=(rng.uniform(-300, 1100), rng.uniform(-300, 900)), rng=rng)
+            game.enemies.add(enemy)
+        client = SimpleNamespace(player=game.player)
+        records, center = server.visible_entities(client)
+        ids = {server.ids.get(enemy): enemy for enemy in game.enemies}
+        shown = [ids[i] for i in records if i in ids]
+        assert len(shown) == MAX_ENTITIES
+        distance = lambda enemy: center.distance_to(enemy.rect.center)
+        farthest_shown = max(map(distance, shown))
+        assert farthest_shown <= INTEREST_RADIUS
+        assert all(distance(e) >= farthest_shown for e in game.enemies if e not in shown)
+        for enemy in shown:
+            kind, x, y, extra = records[server.ids[enemy]]
+            assert (x, y) == (quantize(enemy.rect.centerx), quantize(enemy.rect.centery))
+            assert extra == enemy.health
+    finally:
+        server.sock.close()
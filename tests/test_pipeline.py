@@ -0,0 +1,28 @@
+import pytest
+from game import Game
+from pipeline import SimulationThread
+from sounds import SilentSounds
+
+def test_worker_error_is_raised_on_main_thread():
+    sim = SimulationThread(Game(None, SilentSounds(), seed=0), timeout=2.0)
+    try:
+        sim.latest_state()  # The initial state
+        def fail(game):
+            raise ValueError("bad save")
+        sim.call(fail)
+        sim.submit(0, 0, False, None, 1000 / 60)
+        with pytest.raises(ValueError, match="bad save"):
+            sim.latest_state()
+    finally:
+        sim.stop()
+
+def test_steps_still_publish_states():
+    sim = SimulationThread(Game(None, SilentSounds(), seed=0), timeout=2.0)
+    try:
+        sim.latest_state()
+        for _ in range(5):
+            sim.submit(1, 0, False, None, 1000 / 60)
+            state = sim.latest_state()
+        assert state.game_over is False
+    finally:
+        sim.stop()
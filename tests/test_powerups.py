@@ -0,0 +1,83 @@
+from constants import PLAYER_SPEED
+from game import Game
+from powerups import EFFECTS
+from sounds import SilentSounds
+
+def new_game():
+    return Game(None, SilentSounds(), seed=0)
+
+def advance(game, ms):
+    game.time += ms
+    game.powerup_manager.update()
+
+def test_speed_stacks_up_to_max_then_refreshes_the_oldest():
+    game = new_game()
+    manager = game.powerup_manager
+    max_stacks = EFFECTS['speed']['max_stacks']
+    for _ in range(max_stacks):
+        manager.add_effect('speed', 5000)
+        advance(game, 1000)
+    assert game.player.speed == PLAYER_SPEED * 1.5 ** max_stacks
+    oldest = manager.active_effects['speed'][0]
+    manager.add_effect('speed', 5000)
+    stacks = manager.active_effects['speed']
+    assert len(stacks) == max_stacks
+    assert stacks[0] is oldest and oldest['start_time'] == game.time
+    assert game.player.speed == PLAYER_SPEED * 1.5 ** max_stacks
+
+def test_extend_is_capped_at_max_duration():
+    game = new_game()
+    manager = game.powerup_manager
+    for _ in range(5):
+        manager.add_effect('spread_shot', 10000)
+    stack, = manager.active_effects['spread_shot']
+    assert stack['duration'] == EFFECTS['spread_shot']['max_duration']
+    advance(game, EFFECTS['spread_shot']['max_duration'] - 1)
+    assert game.player.spread_shot
+    advance(game, 2)
+    assert not game.player.spread_shot
+    assert 'spread_shot' not in manager.active_effects
+
+def test_refreshed_shield_outlives_its_stale_heap_entry():
+    game = new_game()
+    manager = game.powerup_manager
+    manager.add_effect('shield', 8000)
+    advance(game, 5000)
+    manager.add_effect('shield', 8000)
+    advance(game, 3001)  # Past the first pickup's expiry
+    assert game.player.has_shield
+    assert len(manager.active_effects['shield']) == 1
+    advance(game, 5000)
+    assert not game.player.has_shield
+    assert not manager.active_effects
+
+def test_spent_shield_is_not_restored_by_another_pickup():
+    game = new_game()
+    manager = game.powerup_manager
+    manager.add_effect('shield', 8000)
+    game.damage_player(game.player)
+    assert not game.player.has_shield
+    manager.add_effect('speed', 5000)
+    manager.add_effect('spread_shot', 10000)
+    assert not game.player.has_shield
+
+def test_equal_stacks_expire_one_at_a_time():
+    game = new_game()
+    manager = game.powerup_manager
+    # Same tick, same duration: the stacks compare equal but are distinct
+    manager.add_effect('speed', 5000)
+    manager.add_effect('speed', 5000)
+    first, second = manager.active_effects['speed']
+    manager.remove_stack('speed', second)
+    assert manager.active_effects['speed'][0] is first
+
+def test_expiry_pops_only_due_entries():
+    game = new_game()
+    manager = game.powerup_manager
+    manager.add_effect('speed', 1000)
+    manager.add_effect('shield', 3000)
+    manager.add_effect('spread_shot', 5000)
+    advance(game, 2000)
+    assert [entry[2] for entry in sorted(manager.expirations)] == ['shield', 'spread_shot']
+    assert set(manager.active_effects) == {'shield', 'spread_shot'}
+    assert game.player.speed == PLAYER_SPEED
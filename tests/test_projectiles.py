@@ -0,0 +1,75 @@
+import numpy as np
+from constants import ENEMY_PROJECTILE_RADIUS, PLAYER_SIZE
+from display import config
+from game import Game
+from projectiles import ProjectileEngine
+from sounds import SilentSounds
+
+def test_emit_past_capacity_drops_the_extras():
+    engine = ProjectileEngine(capacity=10)
+    engine.ring((100, 100), 8)
+    engine.ring((200, 200), 8)
+    assert engine.count == 10
+    assert (engine.positions[8:10] == (200, 200)).all()
+    engine.ring((300, 300), 4)
+    assert engine.count == 10
+
+def test_update_culls_and_compacts_only_off_screen_projectiles():
+    engine = ProjectileEngine(capacity=8)
+    margin = ENEMY_PROJECTILE_RADIUS
+    engine.emit((100, 100), [0.0])
+    engine.emit((config.width + margin - 1, 100), [0.0])  # Leaves this tick
+    engine.emit((200, 100), [0.0])
+    engine.emit((100, -margin + 1), [-np.pi / 2])  # Leaves this tick
+    engine.emit((300, 300), [np.pi])
+    engine.update()
+    assert engine.count == 3
+    assert np.allclose(engine.positions[:3], [(103, 100), (203, 100), (297, 300)])
+    assert np.allclose(engine.velocities[:3], [(3, 0), (3, 0), (-3, 0)])
+
+def test_collide_circle_removes_only_touching_projectiles():
+    engine = ProjectileEngine(capacity=8)
+    reach = 10 + ENEMY_PROJECTILE_RADIUS
+    for x in (100 + reach - 0.5, 100 + reach + 0.5, 100, 300):
+        engine.emit((x, 100), [0.0])
+    assert engine.collide_circle((100, 100), 10) == 2
+    assert engine.count == 2
+    assert np.allclose(engine.positions[:2], [(100 + reach + 0.5, 100), (300, 100)])
+    assert engine.collide_circle((100, 100), 10) == 0
+
+def test_projectile_hit_spends_the_shield_before_a_life():
+    game = Game(None, SilentSounds(), seed=0)
+    player = game.player
+    game.powerup_manager.add_effect('shield', 8000)
+    lives = player.lives
+    game.projectiles.emit(player.rect.center, [0.0], speed=0)
+    game.check_collisions()
+    assert not player.has_shield
+    assert player.lives == lives
+    assert not player.invulnerable
+    assert game.projectiles.count == 0
+
+    game.projectiles.emit(player.rect.center, [0.0], speed=0)
+    game.check_collisions()
+    assert player.lives == lives - 1
+    assert player.invulnerable
+
+def test_many_projectiles_update_and_collide():
+    engine = ProjectileEngine()
+    rng = np.random.default_rng(0)
+    count = 5000
+    engine.positions[:count] = rng.uniform((0, 0), (config.width, config.height), (count, 2))
+    engine.velocities[:count] = rng.uniform(-3, 3, (count, 2))
+    engine.count = count
+    center = (config.width / 2, config.height / 2)
+    radius = PLAYER_SIZE // 2
+    for _ in range(120):
+        positions = engine.positions[:engine.count] + engine.velocities[:engine.count]
+        margin = ENEMY_PROJECTILE_RADIUS
+        inside = ((positions > -margin) & (positions < (config.width + margin, config.height + margin))).all(axis=1)
+        touching = (np.hypot(*(positions[inside] - center).T) < radius + ENEMY_PROJECTILE_RADIUS).sum()
+        engine.update()
+        assert engine.count == inside.sum()
+        assert np.array_equal(engine.positions[:engine.count], positions[inside])
+        assert engine.collide_circle(center, radius) == touching
+        assert engine.count == inside.sum() - touching
@@ -0,0 +1,78 @@
+import random
+from quality import QualityGovernor, QUALITY_LEVELS
+
+# Work time per frame at each level for a scene that is over budget at
+# high quality, borderline at medium and comfortable below that
+LEVEL_COST = [(24, 28), (13, 20), (6, 8), (4, 6)]
+
+def run(governor, frames, seed=0):
+    rng = random.Random(seed)
+    times = []
+    levels = []
+    for _ in range(frames):
+        frame_ms = rng.uniform(*LEVEL_COST[governor.level])
+        times.append(frame_ms)
+        levels.append(governor.level)
+        governor.add_frame(frame_ms)
+    return times, levels
+
+def test_auto_quality_stays_within_budget():
+    governor = QualityGovernor()
+    times, _ = run(governor, 20000)
+    settled = sorted(times[600:])
+    assert settled[int(len(settled) * 0.99)] <= governor.budget_ms
+
+def test_governor_does_not_oscillate():
+    governor = QualityGovernor()
+    _, levels = run(governor, 20000)
+    changes = sum(1 for a, b in zip(levels[600:], levels[601:]) if a != b)
+    # Each failed recovery costs one trial and one step back down, and the
+    # wait between trials doubles, so there are only a handful in 20000 frames
+    assert changes <= 12
+    assert max(levels[600:]) < len(QUALITY_LEVELS) - 1
+
+def test_recovers_when_load_drops():
+    governor = QualityGovernor()
+    for _ in range(300):
+        governor.add_frame(30)
+    assert governor.level == len(QUALITY_LEVELS) - 1
+    for _ in range(3000):
+        governor.add_frame(4)
+    assert governor.level == 0
+
+def loaded_game(level, enemies=60):
+    from enemies import BasicEnemy
+    from game import Game
+    from sounds import SilentSounds
+    game = Game(None, SilentSounds(), seed=0)
+    governor = QualityGovernor()
+    governor.level = level
+    governor.apply(game)
+    rng = random.Random(0)
+    for i in range(enemies):
+        # Half the crowd waits off the left edge of the screen
+        x = rng.uniform(-400, -100) if i % 2 else rng.uniform(100, 500)
+        game.enemies.add(BasicEnemy(pos=(x, rng.uniform(100, 400)), rng=rng))
+    return game
+
+def offscreen_moves(game, ticks):
+    moved = 0
+    for _ in range(ticks):
+        game.ticks += 1
+        offscreen = [e for e in game.enemies if not game.screen_rect.colliderect(e.rect)]
+        before = [tuple(e.position) for e in offscreen]
+        game.update_enemies()
+        moved += sum(tuple(e.position) != position for e, position in zip(offscreen, before))
+    return moved
+
+def test_lower_levels_do_less_work_on_a_loaded_game():
+    particles = []
+    moves = []
+    for level in range(len(QUALITY_LEVELS)):
+        game = loaded_game(level)
+        game.effect_manager.create_explosion((400, 300), (255, 0, 0))
+        particles.append(len(game.effect_manager.particles))
+        moves.append(offscreen_moves(game, 12))
+    assert particles == [20, 12, 6, 2]
+    # 30 off-screen enemies for 12 ticks, each moving every Nth tick
+    assert moves == [30 * 12 // level['offscreen_interval'] for level in QUALITY_LEVELS]
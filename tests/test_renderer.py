@@ -0,0 +1,15 @@
+import pytest
+from display import DisplayConfig
+from game import Game
+from renderer import SurfaceRenderer, TextureRenderer, create_renderer
+from sounds import SilentSounds
+
+@pytest.mark.parametrize('name, backend', [('software', SurfaceRenderer), ('sdl2-software', TextureRenderer)])
+def test_renderer_draws_a_game(name, backend):
+    renderer = create_renderer(name, DisplayConfig(), 'test')
+    assert isinstance(renderer, backend)
+    game = Game(None, SilentSounds(), seed=0)
+    for _ in range(120):
+        game.step(1, 0, True, (320, 0))
+        game.draw(renderer)
+        renderer.present()
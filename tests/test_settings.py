@@ -0,0 +1,32 @@
+import json
+import pytest
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from settings import Settings
+
+def load(tmp_path, monkeypatch, **data):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'game_settings.json').write_text(json.dumps(data))
+    return Settings()
+
+@pytest.mark.parametrize('resolution', [[0, 480], [-640, 480], [640], [640, 480, 2], '640x480',
+                                        [640.5, 480], [True, 480], [100000, 480], None])
+def test_bad_resolution_falls_back_to_default(tmp_path, monkeypatch, resolution):
+    settings = load(tmp_path, monkeypatch, resolution=resolution, sound_volume=0.25)
+    assert settings.resolution == (SCREEN_WIDTH, SCREEN_HEIGHT)
+    assert settings.sound_volume == 0.25  # The rest of the file still loads
+
+def test_valid_resolution_loads(tmp_path, monkeypatch):
+    assert load(tmp_path, monkeypatch, resolution=[1280, 720]).resolution == (1280, 720)
+
+@pytest.mark.parametrize('window_scale, expected', [(2, 2), (0, 0), (100, 0), (-1, 1), (1.5, 1), ('3', 1), (True, 1)])
+def test_window_scale_is_validated(tmp_path, monkeypatch, window_scale, expected):
+    assert load(tmp_path, monkeypatch, window_scale=window_scale).window_scale == expected
+
+def test_window_scale_is_clamped_to_the_desktop(monkeypatch):
+    import pygame
+    from display import DisplayConfig
+    monkeypatch.setattr(pygame.display, 'get_desktop_sizes', lambda: [(1920, 1080)])
+    config = DisplayConfig(640, 480)
+    assert config.fit_window_size(1) == (640, 480)
+    assert config.fit_window_size(0) == (1280, 960)
+    assert config.fit_window_size(100) == (1280, 960)
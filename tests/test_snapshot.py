@@ -0,0 +1,48 @@
+import pytest
+import snapshot
+from game import Game
+from sounds import SilentSounds
+
+def played_game(seed=0, ticks=300):
+    game = Game(None, SilentSounds(), seed=seed)
+    for tick in range(ticks):
+        game.player.invulnerable = True
+        game.player.invulnerable_timer = game.time
+        game.step(tick % 3 - 1, 0, True, (320, 40))
+    return game
+
+@pytest.mark.parametrize('cut', [3, 10, 200, -5])
+def test_truncated_snapshot_leaves_game_untouched(cut):
+    data = snapshot.save(played_game(seed=1))
+    game = played_game(seed=2)
+    before = snapshot.save(game)
+    with pytest.raises(ValueError):
+        snapshot.restore(game, data[:cut])
+    assert snapshot.save(game) == before
+
+def test_restore_round_trip():
+    game = played_game()
+    game.wave_kills = 7
+    data = snapshot.save(game)
+    copy = snapshot.restore(Game(None, SilentSounds()), data)
+    assert copy.wave_kills == 7
+    assert snapshot.save(copy) == data
+
+def gameplay_state(game):
+    return (game.time, game.ticks, game.score, game.wave, tuple(game.player.position),
+            sorted((type(e).__name__, round(e.position.x, 6), round(e.position.y, 6)) for e in game.enemies))
+
+def test_fork_matches_source_at_reduced_quality():
+    from quality import QUALITY_LEVELS
+    game = played_game(ticks=100)
+    game.quality = QUALITY_LEVELS[2]  # Off-screen enemies move on staggered ticks
+    for _ in range(300):
+        game.step(0, 0, False, None)
+    copy = snapshot.fork(game)
+    assert copy.ticks == game.ticks
+    for tick in range(300):
+        for g in (game, copy):
+            g.player.invulnerable = True
+            g.player.invulnerable_timer = g.time
+            g.step(tick % 3 - 1, 0, True, (320, 40))
+        assert gameplay_state(copy) == gameplay_state(game)
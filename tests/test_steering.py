@@ -0,0 +1,20 @@
+import numpy as np
+from steering import any_close, separation_forces, sweep_forces
+
+def test_any_close_agrees_with_separation_forces():
+    rng = np.random.default_rng(1)
+    for count in (2, 3, 8, 20):
+        for _ in range(200):
+            positions = rng.uniform(0, 400, (count, 2)).round()
+            pushed = separation_forces(positions, 30.0).any()
+            assert any_close(positions.tolist(), 30.0) == pushed
+
+def test_sweep_forces_match_separation_forces():
+    rng = np.random.default_rng(2)
+    for count in (2, 5, 16):
+        for _ in range(200):
+            positions = rng.uniform(0, 120, (count, 2)).round()
+            positions[1] = positions[0]  # Always one stacked pair
+            expected = separation_forces(positions, 30.0)
+            assert np.allclose(sweep_forces(positions.tolist(), 30.0), expected)
+    assert sweep_forces([(0, 0), (100, 0)], 30.0) == [[0.0, 0.0], [0.0, 0.0]]
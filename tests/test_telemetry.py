@@ -0,0 +1,57 @@
+import json
+from telemetry import Telemetry
+
+def read_events(directory):
+    events = []
+    for path in sorted(directory.iterdir()):
+        events += [json.loads(line) for line in path.read_text().splitlines()]
+    return events
+
+def test_full_ring_drops_and_counts_new_events(tmp_path):
+    telemetry = Telemetry(capacity=4, directory=str(tmp_path), flush_interval=60)
+    telemetry.start(renderer='software', resolution=(640, 480))
+    for wave in range(5):
+        telemetry.emit('powerup', 'speed', wave)
+    assert telemetry.dropped == 2
+    telemetry.stop()
+    events = read_events(tmp_path)
+    assert [e['event'] for e in events] == ['session', 'powerup', 'powerup', 'powerup', 'dropped']
+    assert [e['wave'] for e in events[1:4]] == [0, 1, 2]
+    assert events[-1]['count'] == 2
+
+def test_drain_takes_everything_emitted_since_the_last_batch(tmp_path):
+    telemetry = Telemetry(capacity=8, directory=str(tmp_path), flush_interval=60)
+    telemetry.start()
+    telemetry.emit('player_hit', 2, 1)
+    batch = telemetry.drain()
+    assert [kind for _, kind, _ in batch] == ['session', 'player_hit']
+    assert telemetry.drain() == []
+    # Wraps around the ring
+    for lives in range(6):
+        telemetry.emit('player_hit', lives, 1)
+    assert [values for _, _, values in telemetry.drain()] == [(lives, 1) for lives in range(6)]
+    assert all(slot is None for slot in telemetry.slots)
+    telemetry.stop()
+
+def test_files_rotate_and_old_ones_are_pruned(tmp_path):
+    telemetry = Telemetry(directory=str(tmp_path), max_file_bytes=200, max_files=3)
+    telemetry.session = 'test'
+    for wave in range(40):
+        telemetry.write_batch([(0.0, 'wave', (wave, 30000, 12, 1000))])
+    telemetry.file.close()
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert len(files) == 3
+    assert files[-1] == f'session-test-{telemetry.file_index:03d}.ndjson'
+    assert all(path.stat().st_size <= 200 for path in tmp_path.iterdir())
+    assert read_events(tmp_path)[-1]['wave'] == 39
+
+def test_unwritable_directory_disables_telemetry(tmp_path):
+    blocker = tmp_path / 'telemetry'
+    blocker.write_text('not a directory')
+    telemetry = Telemetry(directory=str(blocker))
+    telemetry.start()
+    assert not telemetry.enabled
+    assert telemetry.writer is None
+    telemetry.emit('powerup', 'speed', 1)
+    assert telemetry.head == 0
+    telemetry.stop()